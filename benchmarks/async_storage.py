@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+"""Benchmark of the latency of requests served by an event loop while the
+objects are saved, with save() blocking the loop and with AsyncFileStorage
+
+Usage: python3 -m benchmarks.async_storage [number of objects] [seconds]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from time import perf_counter
+from unittest import mock
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.async_storage import AsyncFileStorage
+from models.engine.file_storage import FileStorage
+
+
+async def serve(async_storage, keys, duration, blocking):
+    """
+    Sends a request every millisecond, each reading an object, while an
+    object is changed and saved every 100 milliseconds
+
+    Args:
+        async_storage (AsyncFileStorage): the storage
+        keys (list): (class name, id) of the objects read
+        duration (float): seconds of the run
+        blocking (bool): save by calling save() of the FileStorage in the
+        event loop thread
+
+    Returns:
+        list: latency of every request in seconds, from the time it was
+        due to its response
+    """
+    latencies = []
+    end = perf_counter() + duration
+
+    async def request(n, due):
+        await async_storage.get(*keys[n % len(keys)])
+        latencies.append(perf_counter() - due)
+
+    async def write():
+        n = 0
+        while perf_counter() < end:
+            await asyncio.sleep(0.1)
+            obj = await async_storage.get(*keys[n % len(keys)])
+            obj.name = "changed {}".format(n)
+            if blocking:
+                async_storage.storage.save()
+            else:
+                await async_storage.save()
+            n += 1
+
+    writer = asyncio.ensure_future(write())
+    tasks = []
+    due = perf_counter()
+    n = 0
+    while due < end:
+        tasks.append(asyncio.ensure_future(request(n, due)))
+        due += 0.001
+        n += 1
+        await asyncio.sleep(max(0, due - perf_counter()))
+    await asyncio.gather(writer, *tasks)
+    return latencies
+
+
+def measure(values, directory, duration, blocking):
+    """
+    Returns the latency percentiles of the requests
+
+    Args:
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+        duration (float): seconds of the run
+        blocking (bool): save in the event loop thread
+
+    Returns:
+        tuple: median, 99th percentile and maximum latency in seconds
+    """
+    storage = FileStorage(thread_safe=True)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    with mock.patch("models.storage", storage):
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        for value in values:
+            storage.new(classes[value["__class__"]](**value))
+        storage.save()
+        keys = [(value["__class__"], value["id"]) for value in values
+                if "name" in value]
+        async_storage = AsyncFileStorage(storage)
+        try:
+            latencies = sorted(asyncio.run(
+                serve(async_storage, keys, duration, blocking)))
+        finally:
+            async_storage.close()
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        storage.save()
+    return (latencies[len(latencies) // 2],
+            latencies[len(latencies) * 99 // 100], latencies[-1])
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print("{:<22}{:>10}{:>10}{:>10}".format("objects: {}".format(count),
+                                            "median", "p99", "max"))
+    values = make_values(count)
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        for label, blocking in (("save() in the loop", True),
+                                ("await save()", False)):
+            latencies = measure(values, directory, duration, blocking)
+            print("{:<22}".format(label) + "".join(
+                "{:>8.1f}ms".format(latency * 1000)
+                for latency in latencies))
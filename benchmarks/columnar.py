@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+
+"""Benchmark of FileStorage.aggregate() with and without the column store
+
+Usage: python3 -m benchmarks.columnar [number of places]
+"""
+
+import sys
+from timeit import timeit
+from models import storage
+from models.engine import columnar
+from models.place import Place
+
+
+def make_places(count):
+    """
+    Stores places spread over 100 cities
+
+    Args:
+        count (int): number of places
+
+    Returns:
+        None
+    """
+    for n in range(count):
+        storage.new(Place(id="{:08d}".format(n),
+                          created_at="2023-08-13T15:53:37.646643",
+                          updated_at="2023-08-13T15:53:37.646643",
+                          city_id="city {}".format(n % 100),
+                          price_by_night=n % 300,
+                          max_guest=n % 8))
+
+
+def average_price_per_city():
+    """
+    Returns the average price of the places for 4 guests or more, per city
+
+    Returns:
+        dict: average price by city id
+    """
+    return storage.aggregate(Place, "mean", "price_by_night", by="city_id",
+                             max_guest__ge=4)
+
+
+if __name__ == "__main__":
+    if columnar.numpy is None:
+        sys.exit("numpy is not installed")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    make_places(count)
+    # Without NumPy no column store is built and the objects are iterated
+    numpy, columnar.numpy = columnar.numpy, None
+    objects_time = timeit(average_price_per_city, number=1)
+    columnar.numpy = numpy
+    build_time = timeit(lambda: storage.aggregate(Place, "count"), number=1)
+    columns_time = timeit(average_price_per_city, number=1)
+    print("{:<22}{}".format("places:", count))
+    print("{:<22}{:.3f}s".format("column store build:", build_time))
+    print("{:<22}{:.3f}s".format("objects:", objects_time))
+    print("{:<22}{:.3f}s ({:.1f}x)".format(
+        "column store:", columns_time, objects_time / columns_time))
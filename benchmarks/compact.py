@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+
+"""Benchmark of the memory used by the models and by the compact models
+
+Usage: python3 -m benchmarks.compact [number of objects]
+"""
+
+import gc
+import sys
+import tracemalloc
+from timeit import timeit
+from models.compact import compact_model
+from models.place import Place
+
+
+def make_values(count):
+    """
+    Returns serialized places with all their attributes set
+
+    Args:
+        count (int): number of objects
+
+    Returns:
+        list: dictionaries returned by to_dict()
+    """
+    values = []
+    for n in range(count):
+        values.append({
+            "id": "{:08d}-0000-4000-8000-000000000000".format(n),
+            "created_at": "2023-08-13T15:53:37.646643",
+            "updated_at": "2023-08-13T15:53:37.646655",
+            "__class__": "Place",
+            "city_id": "0001",
+            "user_id": "0002",
+            "name": "Place {}".format(n),
+            "description": "",
+            "number_rooms": n % 5,
+            "number_bathrooms": n % 3,
+            "max_guest": n % 8,
+            "price_by_night": n % 300,
+            "latitude": 48.85,
+            "longitude": 2.35,
+            "amenity_ids": [],
+        })
+    return values
+
+
+def measure(cls, values):
+    """
+    Returns the memory and the time taken to build the objects
+
+    Args:
+        cls (type): class of the objects
+        values (list): serialized objects
+
+    Returns:
+        tuple: bytes per object, time in seconds
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = [cls(**value) for value in values]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    seconds = timeit(lambda: [cls(**value) for value in values], number=1)
+    return size / len(values), seconds
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = make_values(count)
+    place_size, place_time = measure(Place, values)
+    compact_size, compact_time = measure(compact_model(Place), values)
+    print("{:<16}{}".format("objects:", count))
+    print("{:<16}{:.0f} bytes/object, built in {:.3f}s".format(
+        "Place:", place_size, place_time))
+    print("{:<16}{:.0f} bytes/object, built in {:.3f}s".format(
+        "compact Place:", compact_size, compact_time))
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+"""Benchmark of DBStorage against FileStorage: save() of one changed
+object, reload() followed by a get(), and a query on a foreign key
+
+Usage: python3 -m benchmarks.db_storage [number of places] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from unittest import mock
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def make_places(count):
+    """
+    Returns places spread over 100 cities
+
+    Args:
+        count (int): number of places
+
+    Returns:
+        list: Place objects
+    """
+    return [Place(id="{:08d}-0000-4000-8000-000000000000".format(n),
+                  created_at="2023-08-13T15:53:37.646643",
+                  updated_at="2023-08-13T15:53:37.646655",
+                  name="place {}".format(n), city_id="city {}".format(n % 100),
+                  price_by_night=n % 500)
+            for n in range(count)]
+
+
+def make_storage(directory, engine):
+    """
+    Returns an empty storage writing to directory
+
+    Args:
+        directory (str): directory of the files
+        engine (str): "snapshot", "journal" or "sqlite"
+
+    Returns:
+        FileStorage or DBStorage: the storage
+    """
+    if engine == "sqlite":
+        storage = DBStorage(os.path.join(directory, "file.db"))
+        storage.reload()
+        return storage
+    storage = FileStorage(journal=engine == "journal", compact_threshold=0)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    storage.all().clear()
+    return storage
+
+
+def measure(places, engine, repeats):
+    """
+    Returns the times of the operations on a storage holding places
+
+    Args:
+        places (list): Place objects
+        engine (str): "snapshot", "journal" or "sqlite"
+        repeats (int): number of times each operation is measured
+
+    Returns:
+        tuple: mean times in seconds of save() after changing one place, of
+        reload() and get() of one place, and of a query on city_id
+    """
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        storage = make_storage(directory, engine)
+        with mock.patch("models.storage", storage):
+            for place in places:
+                storage.new(place)
+            storage.save()
+            place = storage.get(Place, places[0].id)
+            n = [0]
+
+            def update():
+                n[0] += 1
+                place.name = "changed {}".format(n[0])
+                storage.save()
+
+            def reload():
+                storage.reload()
+                storage.get(Place, places[-1].id)
+
+            save_time = timeit(update, number=repeats) / repeats
+            reload_time = timeit(reload, number=repeats) / repeats
+            storage.query(Place, city_id="city 1")
+            query_time = timeit(lambda: storage.query(Place, city_id="city 7"),
+                                number=repeats) / repeats
+            if engine == "sqlite":
+                storage.close()
+            else:
+                storage.all().clear()
+    return save_time, reload_time, query_time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    places = make_places(count)
+    print("{:<20}{:>14}{:>14}{:>14}".format(
+        "places: {}".format(count), "save one", "reload+get", "query"))
+    for engine in ("snapshot", "journal", "sqlite"):
+        times = measure(places, engine, repeats)
+        print("{:<20}".format(engine) + "".join(
+            "{:>12.3f}ms".format(elapsed * 1000) for elapsed in times))
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+"""Benchmark of the durability levels: save() of a whole snapshot, and
+save() of one change appended to the journal
+
+Usage: python3 -m benchmarks.durability [number of objects] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.durability import DURABILITY_LEVELS
+from models.engine.file_storage import FileStorage
+
+
+def measure(values, directory, durability, repeats):
+    """
+    Returns the mean time of save() with and without the journal
+
+    Args:
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+        durability (str): durability level
+        repeats (int): number of saves measured
+
+    Returns:
+        tuple: snapshot and journal save times in seconds
+    """
+    times = []
+    for journal in (False, True):
+        storage = FileStorage(journal=journal, compact_threshold=0,
+                              durability=durability)
+        storage._FileStorage__file_path = os.path.join(directory,
+                                                       "file.json")
+        storage.all().clear()
+        for value in values:
+            storage.new(classes[value["__class__"]](**value))
+        storage.save()
+        review = next(iter(storage.all("Review").values()))
+        total = 0
+        for n in range(repeats):
+            review.text = "changed {}".format(n)
+            total += timeit(storage.save, number=1)
+        times.append(total / repeats)
+        storage.all().clear()
+        storage.save()
+    return tuple(times)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print("{:<16}{:>12}{:>12}".format("objects: {}".format(count),
+                                      "snapshot", "journal"))
+    values = make_values(count)
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        for durability in DURABILITY_LEVELS:
+            snapshot_time, journal_time = measure(values, directory,
+                                                  durability, repeats)
+            print("{:<16}{:>10.2f}ms{:>10.2f}ms".format(
+                durability, snapshot_time * 1000, journal_time * 1000))
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+
+"""Benchmark of the storage engines on the same workload, run through the
+StorageEngine interface only: creating and saving the objects, reload()
+followed by a get(), get(), query() on a foreign key, count(), and save()
+after changing or deleting one object
+
+An engine is compared with the others by adding a function creating it to
+ENGINES.
+
+Usage: python3 -m benchmarks.engines [number of objects] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from unittest import mock
+from models.base_model import classes
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def file_storage(directory, **options):
+    """
+    Returns a FileStorage writing to directory
+
+    Args:
+        directory (str): directory of the files
+        **options: options of FileStorage
+
+    Returns:
+        FileStorage: the storage
+    """
+    storage = FileStorage(compact_threshold=0, **options)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    return storage
+
+
+ENGINES = {
+    "snapshot": file_storage,
+    "journal": lambda directory: file_storage(directory, journal=True),
+    "sharded, lazy": lambda directory: file_storage(directory, sharded=True,
+                                                    lazy=True),
+    "sqlite": lambda directory: DBStorage(os.path.join(directory,
+                                                       "file.db")),
+}
+
+
+def make_values(count):
+    """
+    Returns serialized objects of every model, a third of them places
+    spread over 100 cities
+
+    Args:
+        count (int): number of objects
+
+    Returns:
+        list: dictionaries returned by to_dict()
+    """
+    models = ["User", "Place", "City", "Place", "Review", "Place"]
+    values = []
+    for n in range(count):
+        values.append({
+            "id": "{:08d}-0000-4000-8000-000000000000".format(n),
+            "created_at": "2023-08-13T15:53:37.646643",
+            "updated_at": "2023-08-13T15:53:37.646655",
+            "__class__": models[n % len(models)],
+            "name": "name {}".format(n),
+            "city_id": "city {}".format(n % 100),
+        })
+    return values
+
+
+def measure(make_storage, values, repeats):
+    """
+    Returns the times of the workload on an engine
+
+    Args:
+        make_storage (callable): returns an empty engine writing to the
+        directory it is given
+        values (list): serialized objects
+        repeats (int): number of times each operation is measured
+
+    Returns:
+        list: time in seconds of the creation and save of the objects, and
+        mean times of reload() and get(), get(), query(), count(), save()
+        of one change and save() of one deletion
+    """
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        storage = make_storage(directory)
+        with mock.patch("models.storage", storage):
+            storage.reload()
+
+            def create():
+                for value in values:
+                    storage.new(classes[value["__class__"]](**value))
+                storage.save()
+
+            places = [value["id"] for value in values
+                      if value["__class__"] == "Place"]
+            n = [0]
+
+            def reload():
+                storage.reload()
+                storage.get(Place, places[-1])
+
+            def get():
+                for obj_id in places[:1000]:
+                    storage.get(Place, obj_id)
+
+            def update():
+                n[0] += 1
+                storage.get(Place, places[0]).name = "changed {}".format(n[0])
+                storage.save()
+
+            def delete():
+                storage.delete(storage.get(Place, places[n[0]]))
+                storage.save()
+                n[0] += 1
+
+            times = [timeit(create, number=1)]
+            for func in (reload, get,
+                         lambda: storage.query(Place, city_id="city 7"),
+                         lambda: storage.count(Place), update):
+                times.append(timeit(func, number=repeats) / repeats)
+            n[0] = 0
+            times.append(timeit(delete, number=repeats) / repeats)
+            for obj in list(storage.all().values()):
+                storage.delete(obj)
+            storage.save()
+            storage.close()
+    return times
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    values = make_values(count)
+    print("{:<15}".format("objects: {}".format(count)) + "".join(
+        "{:>11}".format(label) for label in (
+            "create", "reload+get", "get x1000", "query", "count",
+            "update", "delete")))
+    for name, make_storage in ENGINES.items():
+        times = measure(make_storage, values, repeats)
+        print("{:<15}".format(name) + "".join(
+            "{:>9.2f}ms".format(elapsed * 1000) for elapsed in times))
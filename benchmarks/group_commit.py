@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+
+"""Benchmark of the throughput of save() after every change, written one
+by one, grouped by group commit, and in a batch()
+
+Usage: python3 -m benchmarks.group_commit [number of objects] [saves]
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import nullcontext
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.file_storage import FileStorage
+
+
+def measure(values, directory, saves, journal, commit_size, batch):
+    """
+    Returns the number of saves per second, changing one review per save
+
+    Args:
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+        saves (int): number of saves measured
+        journal (bool): append the changes to the log
+        commit_size (int): number of changed objects grouped in a write
+        batch (bool): make the saves in a batch()
+
+    Returns:
+        float: saves per second
+    """
+    storage = FileStorage(journal=journal, compact_threshold=0,
+                          commit_size=commit_size)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    storage.all().clear()
+    for value in values:
+        storage.new(classes[value["__class__"]](**value))
+    storage.save()
+    storage.flush()
+    reviews = list(storage.all("Review").values())
+
+    def run():
+        with storage.batch() if batch else nullcontext():
+            for n in range(saves):
+                reviews[n % len(reviews)].text = "changed {}".format(n)
+                storage.save()
+        storage.flush()
+
+    elapsed = timeit(run, number=1)
+    storage.all().clear()
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    return saves / elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print("{:<20}{:>14}{:>14}".format("objects: {}".format(count),
+                                      "snapshot", "journal"))
+    values = make_values(count)
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        for label, commit_size, batch in (("every save", 0, False),
+                                          ("commit size 10", 10, False),
+                                          ("commit size 100", 100, False),
+                                          ("batch()", 0, True)):
+            rates = [measure(values, directory, saves, journal, commit_size,
+                             batch) for journal in (False, True)]
+            print("{:<20}{:>10.0f}/s{:>12.0f}/s".format(label, *rates))
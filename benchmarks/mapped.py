@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+
+"""Benchmark of the startup of a lazy FileStorage reading show-like lookups
+from a JSON snapshot and from a mapped snapshot
+
+Usage: python3 -m benchmarks.mapped [number of objects]
+"""
+
+import gc
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import SERIALIZERS
+
+STATE = ("_FileStorage__objects", "_FileStorage__pending",
+         "_FileStorage__serialized", "_FileStorage__unloaded",
+         "_FileStorage__by_class", "_FileStorage__indexes",
+         "_FileStorage__grids", "_FileStorage__column_stores")
+
+
+def clear():
+    """
+    Empties the state shared by the FileStorage instances
+
+    Returns:
+        None
+    """
+    for name in STATE:
+        getattr(FileStorage, name).clear()
+    gc.collect()
+
+
+def measure(serializer, values, directory, lookups):
+    """
+    Returns the time and the memory a lazy FileStorage takes to start, and
+    the time it takes to look objects up
+
+    Args:
+        serializer (str): key of SERIALIZERS
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+        lookups (list): (class name, id) pairs to look up
+
+    Returns:
+        tuple: startup time in seconds, memory in bytes, lookup time in
+        seconds
+    """
+    path = os.path.join(directory, "file" + SERIALIZERS[serializer].extension)
+    SERIALIZERS[serializer]().dump(
+        {"{}.{}".format(value["__class__"], value["id"]): value
+         for value in values}, path)
+    storage = FileStorage(lazy=True, serializer=serializer)
+    storage._FileStorage__file_path = path
+    clear()
+    startup_time = timeit(storage.reload, number=1)
+    clear()
+    tracemalloc.start()
+    storage.reload()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    lookup_time = timeit(lambda: [storage.get(*lookup) for lookup in lookups],
+                         number=1)
+    clear()
+    return startup_time, memory, lookup_time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = make_values(count)
+    lookups = [(value["__class__"], value["id"])
+               for value in random.sample(values, min(1000, count))]
+    print("{:<10}{:>10}{:>14}{:>16}".format("format", "startup", "memory",
+                                            "1000 lookups"))
+    with tempfile.TemporaryDirectory() as directory:
+        for serializer in ("json", "mapped"):
+            startup_time, memory, lookup_time = measure(
+                serializer, values, directory, lookups)
+            print("{:<10}{:>9.3f}s{:>10.1f} MiB{:>15.3f}s".format(
+                serializer, startup_time, memory / 2 ** 20, lookup_time))
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+
+"""Benchmark of a large class kept in one file and split into partitions:
+save() after changing one object, and reload() with a pool of processes
+
+Usage: python3 -m benchmarks.partitioned [number of reviews] [partitions]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from models.engine.file_storage import FileStorage
+from models.review import Review
+
+
+def make_storage(directory, partitions, workers=1):
+    """
+    Returns a sharded FileStorage writing to directory
+
+    Args:
+        directory (str): directory of the snapshot
+        partitions (int): number of partitions of Review, 1 for one file
+        workers (int): number of processes reading the files on reload
+
+    Returns:
+        FileStorage: the storage
+    """
+    storage = FileStorage(sharded=True, workers=workers, partitions={
+        "Review": partitions} if partitions > 1 else None)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    return storage
+
+
+def measure(count, partitions, workers):
+    """
+    Returns the time save() takes after one review is changed, and the time
+    reload() takes
+
+    Args:
+        count (int): number of reviews
+        partitions (int): number of partitions of Review, 1 for one file
+        workers (int): number of processes reading the files on reload
+
+    Returns:
+        tuple: save time, reload time in seconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        storage = make_storage(directory, partitions, workers)
+        storage.all().clear()
+        for n in range(count):
+            storage.new(Review(id="{:08d}".format(n),
+                               created_at="2023-08-13T15:53:37.646643",
+                               updated_at="2023-08-13T15:53:37.646643",
+                               place_id="place {}".format(n % 1000),
+                               user_id="user {}".format(n % 5000),
+                               text="Review {}".format(n)))
+        storage.save()
+        storage.get(Review, "00000000").text = "changed"
+        save_time = timeit(storage.save, number=1)
+        storage.all().clear()
+        reload_time = timeit(storage.reload, number=1)
+        storage.all().clear()
+        return save_time, reload_time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    partitions = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print("{:<26}{:>10}{:>10}".format("reviews: {}".format(count), "save",
+                                      "reload"))
+    for label, layout, workers in (
+            ("one file", 1, 1),
+            ("{} partitions".format(partitions), partitions, 1),
+            ("{} partitions, 4 workers".format(partitions), partitions, 4)):
+        save_time, reload_time = measure(count, layout, workers)
+        print("{:<26}{:>9.3f}s{:>9.3f}s".format(label, save_time,
+                                                reload_time))
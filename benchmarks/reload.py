@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+"""Benchmark of FileStorage.reload() and of the way it builds objects
+
+Usage: python3 -m benchmarks.reload [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from models.base_model import classes
+from models.engine.file_storage import FileStorage
+
+MODELS = ["User", "State", "City", "Amenity", "Place", "Review"]
+
+
+def make_values(count):
+    """
+    Returns serialized objects as stored in file.json
+
+    Args:
+        count (int): number of objects
+
+    Returns:
+        list: dictionaries returned by to_dict()
+    """
+    values = []
+    for n in range(count):
+        values.append({
+            "id": "{:08d}-0000-4000-8000-000000000000".format(n),
+            "created_at": "2023-08-13T15:53:37.646643",
+            "updated_at": "2023-08-13T15:53:37.646655",
+            "__class__": MODELS[n % len(MODELS)],
+            "name": "name {}".format(n),
+        })
+    return values
+
+
+def build_with_eval(values):
+    """
+    Builds the objects the way reload() used to, with eval()
+
+    Args:
+        values (list): serialized objects
+
+    Returns:
+        None
+    """
+    for value in values:
+        eval(value["__class__"] + "(**value)", None,
+             {"value": value, **classes})
+
+
+def build_with_registry(values):
+    """
+    Builds the objects the way reload() does, with the model registry
+
+    Args:
+        values (list): serialized objects
+
+    Returns:
+        None
+    """
+    for value in values:
+        classes[value["__class__"]](**value)
+
+
+def time_reload(values):
+    """
+    Returns the time reload() takes to load the serialized objects
+
+    Args:
+        values (list): serialized objects
+
+    Returns:
+        float: time in seconds
+    """
+    storage = FileStorage()
+    with tempfile.TemporaryDirectory() as directory:
+        storage._FileStorage__file_path = os.path.join(directory, "file.json")
+        for value in values:
+            storage.new(classes[value["__class__"]](**value))
+        storage.save()
+        storage.all().clear()
+        return timeit(storage.reload, number=1)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = make_values(count)
+    eval_time = timeit(lambda: build_with_eval(values), number=1)
+    registry_time = timeit(lambda: build_with_registry(values), number=1)
+    print("{:<22}{}".format("objects:", count))
+    print("{:<22}{:.3f}s".format("build with eval:", eval_time))
+    print("{:<22}{:.3f}s ({:.1f}x)".format(
+        "build with registry:", registry_time, eval_time / registry_time))
+    print("{:<22}{:.3f}s".format("reload():", time_reload(values)))
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+"""Benchmark of the snapshot formats: save and reload time, file size
+
+Usage: python3 -m benchmarks.serializers [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import SERIALIZERS
+
+
+def measure(serializer, values, directory):
+    """
+    Returns the time FileStorage takes to save and reload the objects with
+    a serializer, and the size of the snapshot
+
+    The save is timed after a reload, once every object is serialized, so
+    only the writing of the snapshot read back is measured.
+
+    Args:
+        serializer (str): key of SERIALIZERS
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+
+    Returns:
+        tuple: save time, reload time in seconds, size in bytes
+    """
+    storage = FileStorage(serializer=serializer)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    storage.all().clear()
+    for value in values:
+        storage.new(classes[value["__class__"]](**value))
+    storage.save()
+    storage.all().clear()
+    reload_time = timeit(storage.reload, number=1)
+    save_time = timeit(storage.save, number=1)
+    path = os.path.join(directory, "file" + SERIALIZERS[serializer].extension)
+    return save_time, reload_time, os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = make_values(count)
+    print("{:<10}{:>10}{:>10}{:>14}".format("format", "save", "reload",
+                                            "size"))
+    with tempfile.TemporaryDirectory() as directory:
+        for serializer in SERIALIZERS:
+            save_time, reload_time, size = measure(serializer, values,
+                                                   directory)
+            print("{:<10}{:>9.3f}s{:>9.3f}s{:>8.1f} MiB".format(
+                serializer, save_time, reload_time, size / 2 ** 20))
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+"""Benchmark of save() after changing one object, with one snapshot file
+and with one file per class
+
+Usage: python3 -m benchmarks.sharded [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.file_storage import FileStorage
+
+
+def time_save(values, directory, sharded):
+    """
+    Returns the time save() takes after one Review is changed
+
+    Args:
+        values (list): serialized objects
+        directory (str): directory of the snapshot
+        sharded (bool): write one file per class
+
+    Returns:
+        float: time in seconds
+    """
+    storage = FileStorage(sharded=sharded)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    storage.all().clear()
+    for value in values:
+        storage.new(classes[value["__class__"]](**value))
+    storage.save()
+    review = next(iter(storage.all("Review").values()))
+    review.text = "changed"
+    save_time = timeit(storage.save, number=1)
+    storage.all().clear()
+    storage.save()
+    return save_time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = make_values(count)
+    with tempfile.TemporaryDirectory() as directory:
+        single_time = time_save(values, directory, False)
+        sharded_time = time_save(values, directory, True)
+    print("{:<22}{}".format("objects:", count))
+    print("{:<22}{:.3f}s".format("single file:", single_time))
+    print("{:<22}{:.3f}s ({:.1f}x)".format(
+        "one file per class:", sharded_time, single_time / sharded_time))
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+"""Benchmark of processes sharing the same files: objects lost when they
+save at the same time with and without shared mode, and time of refresh()
+when nothing changed compared to reload()
+
+Usage: python3 -m benchmarks.shared [processes] [saves per process]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+from timeit import timeit
+from benchmarks.reload import make_values
+from models.base_model import classes
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def make_storage(directory, **options):
+    """
+    Returns a FileStorage writing to directory
+
+    Args:
+        directory (str): directory of the files
+        **options: options of FileStorage
+
+    Returns:
+        FileStorage: the storage
+    """
+    storage = FileStorage(**options)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    return storage
+
+
+def save_users(directory, number, saves, options):
+    """
+    Creates and saves users one at a time, run in each process, which
+    exits with status 1 if a save fails
+
+    Args:
+        directory (str): directory of the files
+        number (int): number of the process
+        saves (int): number of users
+        options (dict): options of FileStorage
+
+    Returns:
+        None
+    """
+    storage = make_storage(directory, **options)
+    storage.all().clear()
+    storage.reload()
+    try:
+        for n in range(saves):
+            storage.new(User(id="{}-{}".format(number, n),
+                             created_at="2023-08-13T15:53:37.646643",
+                             updated_at="2023-08-13T15:53:37.646643"))
+            storage.save()
+    except OSError:
+        sys.exit(1)
+
+
+def measure_writers(processes, saves, options):
+    """
+    Returns the number of users saved by processes at the same time that
+    are in the files at the end, the number of processes that failed and
+    the time they took
+
+    Args:
+        processes (int): number of processes
+        saves (int): number of users saved by each process
+        options (dict): options of FileStorage
+
+    Returns:
+        tuple: users kept, processes failed, time in seconds
+    """
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        workers = [context.Process(target=save_users,
+                                   args=(directory, number, saves, options))
+                   for number in range(processes)]
+
+        def run():
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        elapsed = timeit(run, number=1)
+        storage = make_storage(directory, **options)
+        storage.all().clear()
+        storage.reload()
+        kept = sum(1 for key in storage.all() if key.startswith("User."))
+        storage.all().clear()
+    failed = sum(1 for worker in workers if worker.exitcode)
+    return kept, failed, elapsed
+
+
+def measure_refresh(count):
+    """
+    Returns the time of refresh() when no other process wrote, and of
+    reload(), in shared mode
+
+    Args:
+        count (int): number of objects in the files
+
+    Returns:
+        tuple: refresh and reload times in seconds
+    """
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        storage = make_storage(directory, shared=True)
+        storage.all().clear()
+        for value in make_values(count):
+            storage.new(classes[value["__class__"]](**value))
+        storage.save()
+        refresh_time = timeit(storage.refresh, number=1000) / 1000
+        reload_time = timeit(storage.reload, number=1)
+        storage.all().clear()
+    return refresh_time, reload_time
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print("{:<20}{:>10}{:>10}{:>10}".format(
+        "{}x{} users".format(processes, saves), "kept", "failed", "time"))
+    for label, options in (("snapshot", {}),
+                           ("snapshot, shared", {"shared": True}),
+                           ("journal", {"journal": True}),
+                           ("journal, shared", {"journal": True,
+                                                "shared": True})):
+        kept, failed, elapsed = measure_writers(processes, saves, options)
+        print("{:<20}{:>10}{:>10}{:>9.3f}s".format(label, kept, failed,
+                                                    elapsed))
+    refresh_time, reload_time = measure_refresh(10000)
+    print("{:<20}{:>8.1f}us".format("refresh, unchanged:",
+                                    refresh_time * 1e6))
+    print("{:<20}{:>8.1f}ms".format("reload:", reload_time * 1e3))
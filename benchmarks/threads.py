@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+
+"""Stress benchmark of the thread-safe mode: operations per second of
+threads creating, reading, updating, deleting and saving objects at the
+same time
+
+Usage: python3 -m benchmarks.threads [operations per thread]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from time import perf_counter
+from unittest import mock
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def work(storage, number, operations, errors):
+    """
+    Runs operations on the storage: every tenth creates a place, the
+    others read, update or delete one, and every hundredth saves
+
+    Args:
+        storage (FileStorage): the storage
+        number (int): number of the thread
+        operations (int): number of operations
+        errors (list): exceptions raised, appended to
+
+    Returns:
+        None
+    """
+    places = []
+    try:
+        for n in range(operations):
+            if n % 10 == 0 or not places:
+                place = Place()
+                place.name = "place {} {}".format(number, n)
+                places.append(place)
+            elif n % 100 == 99:
+                storage.save()
+            elif n % 10 == 9:
+                storage.delete(places.pop())
+            elif n % 2:
+                places[n % len(places)].max_guest = n
+            else:
+                storage.get(Place, places[n % len(places)].id)
+    except Exception as error:
+        errors.append(error)
+
+
+def measure(thread_count, operations, thread_safe, directory):
+    """
+    Returns the operations per second of threads sharing a storage
+
+    Args:
+        thread_count (int): number of threads
+        operations (int): number of operations per thread
+        thread_safe (bool): use the thread-safe mode
+        directory (str): directory of the snapshot
+
+    Returns:
+        tuple: operations per second, number of errors
+    """
+    storage = FileStorage(journal=True, compact_threshold=0,
+                          thread_safe=thread_safe)
+    storage._FileStorage__file_path = os.path.join(directory, "file.json")
+    errors = []
+    threads = [threading.Thread(target=work, args=(storage, number,
+                                                   operations, errors))
+               for number in range(thread_count)]
+    with mock.patch("models.storage", storage):
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        storage.save()
+    return thread_count * operations / elapsed, len(errors)
+
+
+if __name__ == "__main__":
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{:<12}{:>17}{:>17}".format("threads", "unsafe", "thread-safe"))
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        for thread_count in (1, 2, 4, 8):
+            results = [measure(thread_count, operations, thread_safe,
+                               directory) for thread_safe in (False, True)]
+            print("{:<12}".format(thread_count) + "".join(
+                "{:>9.0f}/s {:>2} err".format(rate, errors)
+                for rate, errors in results))
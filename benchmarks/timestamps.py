@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+
+"""Benchmark of the timestamp codec used by BaseModel
+
+Usage: python3 -m benchmarks.timestamps [number of timestamps]
+"""
+
+import sys
+from datetime import datetime, timedelta
+from timeit import timeit
+from models.base_model import (DATE_ISO8601_FORMAT, format_datetime,
+                               parse_datetime)
+
+
+def make_timestamps(count):
+    """
+    Returns distinct timestamps as stored in file.json
+
+    Args:
+        count (int): number of timestamps
+
+    Returns:
+        list: timestamps in ISO 8601 format
+    """
+    start = datetime(2023, 8, 13, 15, 53, 37, 646643)
+    step = timedelta(microseconds=1237)
+    return [(start + n * step).isoformat(timespec="microseconds")
+            for n in range(count)]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    texts = make_timestamps(count)
+    values = [parse_datetime(text) for text in texts]
+    assert values == [datetime.strptime(text, DATE_ISO8601_FORMAT)
+                      for text in texts]
+    strptime_time = timeit(lambda: [datetime.strptime(
+        text, DATE_ISO8601_FORMAT) for text in texts], number=1)
+    parse_time = timeit(lambda: [parse_datetime(text) for text in texts],
+                        number=1)
+    format_time = timeit(lambda: [format_datetime(value)
+                                  for value in values], number=1)
+    print("{:<20}{}".format("timestamps:", count))
+    print("{:<20}{:.3f}s".format("strptime():", strptime_time))
+    print("{:<20}{:.3f}s ({:.1f}x)".format(
+        "parse_datetime():", parse_time, strptime_time / parse_time))
+    print("{:<20}{:.3f}s".format("format_datetime():", format_time))
@@ -3,7 +3,7 @@
 """AirBnB Clone - Command Line Interface (CLI) Module"""
 
 import cmd
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
 from models.place import Place
 from models.review import Review
 from models.user import User
@@ -11,6 +11,7 @@ from models.state import State
 from models import storage
 from models.city import City
 from models.amenity import Amenity
+from models.engine.query import OPERATORS
 import json
 import shlex
 
@@ -18,15 +19,15 @@ import shlex
 class HBNBCommand(cmd.Cmd):
     """ Holberton command prompt to access models data """
     prompt = '(hbnb) '
-    class_names = {
-        "BaseModel": BaseModel,
-        "State": State,
-        "City": City,
-        "Amenity": Amenity,
-        "Place": Place,
-        "User": User,
-        "Review": Review
-    }
+    class_names = classes
+
+    def precmd(self, line):
+        """
+        Called before an input line is run. Reloads the objects changed by
+        the other processes sharing the storage files, if any.
+        """
+        storage.refresh()
+        return line
 
     def default(self, arg):
         """
@@ -39,9 +40,11 @@ class HBNBCommand(cmd.Cmd):
             "count": self.do_count,
             "show": self.do_show,
             "destroy": self.do_destroy,
-            "update": self.do_update
+            "update": self.do_update,
+            "nearby": self.do_nearby,
+            "aggregate": self.do_aggregate
         }
-        commands = arg.strip().split(".")
+        commands = arg.strip().split(".", 1)
         if len(commands) != 2:
             cmd.Cmd.default(self, arg)
             return
@@ -155,10 +158,9 @@ class HBNBCommand(cmd.Cmd):
         if len(command_args) <= 1:
             print("** instance id missing **")
             return
-        inst_dicts = storage.all()
-        key = "{}.{}".format(command_args[0], command_args[1])
-        if key in inst_dicts:
-            obj_instance = str(inst_dicts[key])
+        inst = storage.get(command_args[0], command_args[1])
+        if inst is not None:
+            obj_instance = str(inst)
             print(obj_instance)
         else:
             print("** no instance found **")
@@ -186,10 +188,9 @@ class HBNBCommand(cmd.Cmd):
         if len(command_args) <= 1:
             print("** instance id missing **")
             return
-        inst_dicts = storage.all()
-        key = "{}.{}".format(command_args[0], command_args[1])
-        if key in inst_dicts:
-            del inst_dicts[key]
+        inst = storage.get(command_args[0], command_args[1])
+        if inst is not None:
+            storage.delete(inst)
             storage.save()
         else:
             print("** no instance found **")
@@ -213,9 +214,8 @@ class HBNBCommand(cmd.Cmd):
             return
         command_arg = shlex.split(arg)
         if command_arg[0] in HBNBCommand.class_names.keys():
-            for key in inst_dicts:
-                if command_arg[0] in key:
-                    json_data.append(str(inst_dicts[key]))
+            for obj in storage.all(command_arg[0]).values():
+                json_data.append(str(obj))
             print(json.dumps(json_data))
         else:
             print("** class doesn't exist **")
@@ -235,17 +235,14 @@ class HBNBCommand(cmd.Cmd):
             print("** class name missing **")
             return
         command_arg = shlex.split(arg)
-        insts_dicts = storage.all()
         if command_arg[0] not in HBNBCommand.class_names.keys():
             print("** class doesn't exist **")
             return
         if (len(command_arg) == 1):
             print("** instance id missing **")
             return
-        try:
-            key = command_arg[0] + "." + command_arg[1]
-            insts_dicts[key]
-        except KeyError:
+        inst = storage.get(command_arg[0], command_arg[1])
+        if inst is None:
             print("** no instance found **")
             return
         if (len(command_arg) == 2):
@@ -254,7 +251,6 @@ class HBNBCommand(cmd.Cmd):
         if (len(command_arg) == 3):
             print("** value missing **")
             return
-        inst = insts_dicts[key]
         if hasattr(inst, command_arg[2]):
             data_type = type(getattr(inst, command_arg[2]))
             setattr(inst, command_arg[2], data_type(command_arg[3]))
@@ -272,17 +268,14 @@ class HBNBCommand(cmd.Cmd):
             return
         dictionary_data = "{" + arg.split("{")[1]
         data_arg = shlex.split(arg)
-        objs_dict = storage.all()
         if data_arg[0] not in HBNBCommand.class_names.keys():
             print("** class doesn't exist **")
             return
         if (len(data_arg) == 1):
             print("** instance id missing **")
             return
-        try:
-            key = data_arg[0] + "." + data_arg[1]
-            objs_dict[key]
-        except KeyError:
+        inst = storage.get(data_arg[0], data_arg[1])
+        if inst is None:
             print("** no instance found **")
             return
         if (dictionary_data == "{"):
@@ -291,7 +284,6 @@ class HBNBCommand(cmd.Cmd):
 
         dictionary_data = dictionary_data.replace("\'", "\"")
         dictionary_data = json.loads(dictionary_data)
-        inst = objs_dict[key]
         for my_key in dictionary_data:
             if hasattr(inst, my_key):
                 data_type = type(getattr(inst, my_key))
@@ -309,12 +301,112 @@ class HBNBCommand(cmd.Cmd):
         Args:
             arg (str): class name of the instance to count
         """
-        counter = 0
-        objects_dict = storage.all()
-        for key in objects_dict:
-            if (arg in key):
-                counter += 1
-        print(counter)
+        print(storage.count(arg or None))
+
+    def do_nearby(self, arg):
+        """
+        Prints the string representation of the instances of a class within
+        a radius (in kilometers) of a point, nearest first
+
+        Usage: nearby <class> <latitude> <longitude> <radius> or
+        <class>.nearby(<latitude>, <longitude>, <radius>)
+
+        Args:
+            arg (str): class name, latitude, longitude and radius
+        """
+        command_arg = shlex.split(arg)
+        if len(command_arg) == 0:
+            print("** class name missing **")
+            return
+        if command_arg[0] not in HBNBCommand.class_names.keys():
+            print("** class doesn't exist **")
+            return
+        if len(command_arg) < 4:
+            print("** coordinates missing **")
+            return
+        try:
+            latitude, longitude, radius = map(float, command_arg[1:4])
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        try:
+            objs = storage.nearby(command_arg[0], latitude, longitude, radius)
+        except ValueError:
+            print("** class has no coordinates **")
+            return
+        print(json.dumps([str(obj) for obj in objs]))
+
+    def do_aggregate(self, arg):
+        """
+        Prints the count, sum, average, minimum or maximum of an attribute
+        over the instances of a class, computed by the storage
+
+        The conditions are <attribute>__<operator>=<value> with operator
+        one of eq (the default), lt, le, gt, ge and in, the values of "in"
+        being separated by "|". by=<attribute> prints one result per value
+        of the attribute, or per element when it holds a list.
+
+        Usage: aggregate <class> <function> [<attribute>] [by=<attribute>]
+        [<condition> ...] or
+        <class>.aggregate(<function>, [<attribute>, ][by=<attribute>, ]...)
+
+        Example: Place.aggregate(avg, price_by_night, by=city_id,
+        max_guest__ge=4)
+
+        Args:
+            arg (str): class name, function, attribute, grouping attribute
+            and conditions
+        """
+        functions = {"count": "count", "sum": "sum", "avg": "mean",
+                     "mean": "mean", "min": "min", "max": "max"}
+        command_arg = shlex.split(arg)
+        if len(command_arg) == 0:
+            print("** class name missing **")
+            return
+        if command_arg[0] not in HBNBCommand.class_names.keys():
+            print("** class doesn't exist **")
+            return
+        if len(command_arg) < 2:
+            print("** function missing **")
+            return
+        if command_arg[1] not in functions:
+            print("** unknown function **")
+            return
+        cls = HBNBCommand.class_names[command_arg[0]]
+        attribute, by, conditions = None, None, {}
+        for word in command_arg[2:]:
+            name, equal, value = word.partition("=")
+            if not equal:
+                attribute = name
+            elif name == "by":
+                by = value
+            else:
+                attr_name, _, operator = name.rpartition("__")
+                if not attr_name or operator not in OPERATORS:
+                    attr_name, operator = name, "eq"
+                # Values take the type of the class attribute, as in update
+                data_type = type(getattr(cls, attr_name, ""))
+                if data_type not in (int, float):
+                    data_type = str
+                try:
+                    if operator == "in":
+                        value = [data_type(item) for item in value.split("|")]
+                    else:
+                        value = data_type(value)
+                except ValueError:
+                    print("** invalid value **")
+                    return
+                conditions[name] = value
+        if attribute is None and functions[command_arg[1]] != "count":
+            print("** attribute name missing **")
+            return
+        try:
+            result = storage.aggregate(cls, functions[command_arg[1]],
+                                       attribute, by, **conditions)
+        except ValueError:
+            print("** invalid grouping attribute **")
+            return
+        print(json.dumps(result))
 
 
 if __name__ == '__main__':
@@ -1,11 +1,66 @@
 #!/usr/bin/python3
 
-"""This module initializes the application's file storage"""
+"""This module initializes the application's storage"""
 
+from importlib import import_module
+from os import getenv
+from models.engine.db_storage import DBStorage
 from models.engine.file_storage import FileStorage
+from models.engine.storage import StorageEngine
+from models.compact import use_compact_models
 
-# Create a unique FileStorage instance for the application
-storage = FileStorage()
+# Create a unique storage instance for the application
+# HBNB_TYPE_STORAGE=db stores the objects in a SQLite database instead, at
+# HBNB_DB_PATH (file.db by default); the HBNB_FS_ options but the
+# durability only apply to the FileStorage
+# HBNB_TYPE_STORAGE=<module>:<class> creates a StorageEngine of another
+# module, without arguments
+# HBNB_FS_JOURNAL=1 appends changes to a log instead of rewriting the file
+# HBNB_FS_COMPACT_THRESHOLD sets how many log records trigger a compaction
+# HBNB_FS_LAZY=1 builds the objects read from the file on first access
+# HBNB_FS_FORMAT=binary writes file.bin instead of file.json, =mapped writes
+# file.snap, mapped with mmap instead of read in lazy mode
+# HBNB_FS_SHARDED=1 writes one file per class in file/ instead of file.json
+# HBNB_FS_PARTITIONS=Place=8,Review=16 splits classes into partition files
+# HBNB_FS_WORKERS sets how many processes read the files on reload
+# HBNB_FS_DURABILITY=atomic|fsync|full sets which writes are flushed to disk
+# HBNB_FS_COMMIT_DELAY=0.05 groups the saves made within 50 ms into a write
+# HBNB_FS_COMMIT_SIZE=100 writes grouped saves once 100 objects are changed
+# HBNB_FS_THREAD_SAFE=1 lets several threads use the objects at the same time
+# HBNB_FS_SHARED=1 lets several processes use the same files, with locks
+partitions = {}
+for partition in getenv("HBNB_FS_PARTITIONS", "").split(","):
+    if partition:
+        class_name, _, count = partition.partition("=")
+        partitions[class_name] = int(count)
+storage_type = getenv("HBNB_TYPE_STORAGE", "file")
+if storage_type == "db":
+    storage = DBStorage(getenv("HBNB_DB_PATH", "file.db"),
+                        durability=getenv("HBNB_FS_DURABILITY", "fsync"))
+elif ":" in storage_type:
+    module_name, _, engine_name = storage_type.partition(":")
+    storage = getattr(import_module(module_name), engine_name)()
+    if not isinstance(storage, StorageEngine):
+        raise TypeError("{} is not a StorageEngine".format(storage_type))
+else:
+    storage = FileStorage(
+        journal=getenv("HBNB_FS_JOURNAL") == "1",
+        compact_threshold=int(getenv("HBNB_FS_COMPACT_THRESHOLD", "10000")),
+        lazy=getenv("HBNB_FS_LAZY") == "1",
+        serializer=getenv("HBNB_FS_FORMAT", "json"),
+        sharded=getenv("HBNB_FS_SHARDED") == "1",
+        partitions=partitions,
+        workers=int(getenv("HBNB_FS_WORKERS", "1")),
+        durability=getenv("HBNB_FS_DURABILITY", "fsync"),
+        commit_delay=float(getenv("HBNB_FS_COMMIT_DELAY", "0")),
+        commit_size=int(getenv("HBNB_FS_COMMIT_SIZE", "0")),
+        thread_safe=getenv("HBNB_FS_THREAD_SAFE") == "1",
+        shared=getenv("HBNB_FS_SHARED") == "1")
 
-# Call the reload() method to populate __objects from the JSON file
+# HBNB_COMPACT_MODELS=1 builds the objects with __slots__ instead of __dict__
+if getenv("HBNB_COMPACT_MODELS") == "1":
+    use_compact_models()
+
+# Call the reload() method to populate __objects from the JSON file, or
+# to open the database
 storage.reload()
@@ -9,6 +9,74 @@ from datetime import datetime
 
 DATE_ISO8601_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
 
+# Model classes by name, filled as BaseModel subclasses are defined
+classes = {}
+
+
+def parse_datetime(text):
+    """
+    Parses a timestamp written by format_datetime()
+
+    datetime.fromisoformat() is several times faster than strptime();
+    strptime() is kept for the strings it does not accept.
+
+    Args:
+        text (str): timestamp in ISO 8601 format, or a datetime returned
+        as is
+
+    Returns:
+        datetime: the parsed timestamp
+    """
+    if isinstance(text, datetime):
+        return text
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return datetime.strptime(text, DATE_ISO8601_FORMAT)
+
+
+def format_datetime(value):
+    """
+    Formats a timestamp for to_dict()
+
+    Args:
+        value (datetime): timestamp to format
+
+    Returns:
+        str: timestamp in ISO 8601 format
+    """
+    return value.isoformat()
+
+
+def copy_attributes(source, target):
+    """
+    Makes target hold the attributes of source, in place and without
+    marking target as changed, so that the references held to target see
+    the values of source; the attributes source does not have are removed
+
+    Args:
+        source (BaseModel): object holding the attributes
+        target (BaseModel): object to update, of the class of source
+
+    Returns:
+        None
+    """
+    if hasattr(target, "__dict__"):
+        attributes = vars(target)
+        attributes.clear()
+        attributes.update(vars(source))
+    for klass in type(target).__mro__:
+        for name in vars(klass).get("__slots__", ()):
+            try:
+                value = object.__getattribute__(source, name)
+            except AttributeError:
+                try:
+                    object.__delattr__(target, name)
+                except AttributeError:
+                    pass
+            else:
+                object.__setattr__(target, name, value)
+
 
 class BaseModel:
     """
@@ -22,12 +90,25 @@ class BaseModel:
         BaseModel instance was updated
 
     Methods:
+        __init_subclass__(**kwargs): registers a subclass in classes
         __init__(*args, **kwargs): initializes a BaseModel instance
+        __setattr__(name, value): sets an attribute and marks the instance
+        as changed in the storage
         __str__(): returns the string representation of the BaseModel instance
         save(): updates the updated_at attribute with the current datetime
         to_dict(): returns a dictionary containing all keys/values of the
         BaseModel instance
     """
+    def __init_subclass__(cls, **kwargs):
+        """
+        Registers a BaseModel subclass in classes by its name
+
+        Returns:
+            None
+        """
+        super().__init_subclass__(**kwargs)
+        classes[cls.__name__] = cls
+
     def __init__(self, *args, **kwargs):
         """
         Initializes a BaseModel instance
@@ -47,12 +128,21 @@ class BaseModel:
             None
         """
         if kwargs:
+            # The instance is not stored yet, so its attributes are set
+            # without going through __setattr__
+            attributes = self.__dict__
             for key in kwargs:
                 if key != "__class__":
-                    setattr(self, key, kwargs[key])
-                if key == "created_at" or key == "updated_at":
-                    setattr(self, key, datetime.strptime(
-                        kwargs[key], DATE_ISO8601_FORMAT))
+                    attributes[key] = kwargs[key]
+            if "created_at" in kwargs:
+                attributes["created_at"] = parse_datetime(kwargs["created_at"])
+            if "updated_at" in kwargs:
+                if kwargs["updated_at"] == kwargs.get("created_at"):
+                    # Never updated: share the datetime parsed above
+                    attributes["updated_at"] = attributes["created_at"]
+                else:
+                    attributes["updated_at"] = parse_datetime(
+                        kwargs["updated_at"])
         else:
             self.id = str(uuid4())
             self.created_at = datetime.now()
@@ -61,6 +151,21 @@ class BaseModel:
             # Add a call to the new(self) method on storage
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and marks the BaseModel instance as changed so the
+        storage serializes it again on the next save
+
+        Args:
+            name (str): attribute name
+            value: attribute value
+
+        Returns:
+            None
+        """
+        super().__setattr__(name, value)
+        models.storage.mark_dirty(self, name)
+
     def __str__(self):
         """
         Returns the string representation of the BaseModel instance"
@@ -93,7 +198,10 @@ class BaseModel:
         obj_dict = self.__dict__.copy()
 
         obj_dict["__class__"] = self.__class__.__name__
-        obj_dict["created_at"] = self.created_at.isoformat()
-        obj_dict["updated_at"] = self.updated_at.isoformat()
+        obj_dict["created_at"] = format_datetime(self.created_at)
+        obj_dict["updated_at"] = format_datetime(self.updated_at)
 
         return obj_dict
+
+
+classes["BaseModel"] = BaseModel
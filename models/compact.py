@@ -0,0 +1,284 @@
+#!/usr/bin/python3
+
+"""This module defines the compact representation of the models
+
+A compact model is a subclass of a model keeping the id, the timestamps and
+the attributes declared on the model class in __slots__ instead of a
+per-instance __dict__. The attributes that are not declared (e.g. set with
+the console update command) go to an overflow dictionary, only created when
+the first one is set. The names of the attributes are kept in the order
+they were set, which is the order of the __dict__ of a model instance, in
+a tuple shared by the instances that set the same names in the same order.
+
+use_compact_models() registers the compact models under the names of the
+models, so the objects built by FileStorage.reload() and by the console are
+compact. The classes imported from the model modules are left unchanged.
+"""
+
+import models
+from models.base_model import BaseModel, classes
+from models.base_model import format_datetime, parse_datetime
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+MODELS = (User, State, City, Amenity, Place, Review)
+
+# Compact models by name, filled by compact_model()
+compact_classes = {}
+
+# Attribute name orders shared by the instances, by order
+orders = {}
+
+# Order following an order when a name is set, by (order, name)
+next_orders = {}
+
+
+class CompactModel:
+    """
+    Mixin storing the attributes of a model in __slots__
+
+    An attribute declared on the model and never set reads the default
+    value of the model class, as it does for the model itself.
+
+    Attributes:
+        __model (type): the model, set on the compact model
+        __fields (tuple): names of the slots holding declared attributes,
+        set on the compact model
+        __extra (dict): attributes that are not declared, by name
+        __order (tuple): names of the attributes set, in assignment order,
+        shared with the other instances through orders
+
+    Methods:
+        __init__(*args, **kwargs): initializes a compact instance
+        __setattr__(name, value): sets an attribute and marks the instance
+        as changed in the storage
+        __getattr__(name): returns the model default of an unset attribute
+        __str__(): returns the string representation of the instance
+        to_dict(): returns a dictionary containing all keys/values of the
+        instance
+    """
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a compact instance
+
+        Args:
+            *args: unused
+            **kwargs: keyword arguments passed to the constructor, as for
+            BaseModel
+
+        Returns:
+            None
+        """
+        set_attribute = object.__setattr__
+        if not kwargs:
+            set_attribute(self, "_CompactModel__order", ())
+            super().__init__(*args)
+            return
+        # The instance is not stored yet, so its attributes are set
+        # without marking it as changed
+        fields = type(self).__fields
+        names = tuple(key for key in kwargs if key != "__class__")
+        set_attribute(self, "_CompactModel__order",
+                      orders.setdefault(names, names))
+        for key in names:
+            if key in fields:
+                set_attribute(self, key, kwargs[key])
+            else:
+                self.__set(key, kwargs[key])
+        if "created_at" in kwargs:
+            set_attribute(self, "created_at",
+                          parse_datetime(kwargs["created_at"]))
+        if "updated_at" in kwargs:
+            if kwargs["updated_at"] == kwargs.get("created_at"):
+                # Never updated: share the datetime parsed above
+                set_attribute(self, "updated_at", self.created_at)
+            else:
+                set_attribute(self, "updated_at",
+                              parse_datetime(kwargs["updated_at"]))
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and marks the instance as changed so the storage
+        serializes it again on the next save
+
+        Args:
+            name (str): attribute name
+            value: attribute value
+
+        Returns:
+            None
+        """
+        order = self.__order
+        if name not in order:
+            following = next_orders.get((order, name))
+            if following is None:
+                following = order + (name,)
+                following = orders.setdefault(following, following)
+                next_orders[order, name] = following
+            object.__setattr__(self, "_CompactModel__order", following)
+        self.__set(name, value)
+        models.storage.mark_dirty(self, name)
+
+    def __getattr__(self, name):
+        """
+        Returns an attribute that is not declared, or the default value of a
+        declared attribute that was not set
+
+        Only called when the lookup of the slots and of the class fails.
+
+        Args:
+            name (str): attribute name
+
+        Returns:
+            the value of the attribute
+
+        Raises:
+            AttributeError: if the instance has no such attribute
+        """
+        cls = type(self)
+        if name in cls.__fields:
+            return getattr(cls.__model, name)
+        extra = self.__overflow()
+        if extra is None or name not in extra:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                cls.__name__, name))
+        return extra[name]
+
+    def __str__(self):
+        """
+        Returns the string representation of the instance, in the format of
+        the model
+
+        The attributes are listed in the order they were set.
+
+        Returns:
+            str: string representation of the instance
+        """
+        return "[{}] ({}) {}".format(type(self).__name__, self.id,
+                                     self.__attributes())
+
+    def to_dict(self):
+        """
+        Returns a dictionary containing all keys/values of the instance, in
+        the format of the model
+
+        Returns:
+            dict: dictionary containing all keys/values of the instance
+        """
+        obj_dict = self.__attributes()
+
+        obj_dict["__class__"] = type(self).__name__
+        obj_dict["created_at"] = format_datetime(self.created_at)
+        obj_dict["updated_at"] = format_datetime(self.updated_at)
+
+        return obj_dict
+
+    def __set(self, name, value):
+        """
+        Stores an attribute in its slot or in the overflow dictionary
+
+        Args:
+            name (str): attribute name
+            value: attribute value
+
+        Returns:
+            None
+        """
+        if name in type(self).__fields:
+            object.__setattr__(self, name, value)
+            return
+        extra = self.__overflow()
+        if extra is None:
+            extra = {}
+            object.__setattr__(self, "_CompactModel__extra", extra)
+        extra[name] = value
+
+    def __overflow(self):
+        """
+        Returns the overflow dictionary without creating it
+
+        Returns:
+            dict: attributes that are not declared, None if there are none
+        """
+        try:
+            return object.__getattribute__(self, "_CompactModel__extra")
+        except AttributeError:
+            return None
+
+    def __attributes(self):
+        """
+        Returns the attributes set on the instance, the equivalent of the
+        __dict__ of a model instance
+
+        Returns:
+            dict: attribute values by name
+        """
+        attributes = {}
+        fields = type(self).__fields
+        get = object.__getattribute__
+        extra = self.__overflow()
+        for name in self.__order:
+            if name not in fields:
+                attributes[name] = extra[name]
+                continue
+            try:
+                attributes[name] = get(self, name)
+            except AttributeError:
+                continue  # deleted, the model default applies
+        return attributes
+
+
+def compact_model(model):
+    """
+    Returns the compact subclass of a model, defining it on first call, and
+    registers it in models.base_model.classes in place of the model
+
+    The subclass has the name of the model, so its instances are stored and
+    serialized as instances of the model.
+
+    Args:
+        model (type): BaseModel subclass
+
+    Returns:
+        type: the compact model
+    """
+    name = model.__name__
+    if name not in compact_classes:
+        fields = ["id", "created_at", "updated_at"]
+        for klass in reversed(model.__mro__):
+            if issubclass(klass, BaseModel):
+                fields.extend(attribute for attribute, value
+                              in vars(klass).items()
+                              if not attribute.startswith("_") and
+                              not callable(value) and
+                              attribute not in fields)
+        compact_classes[name] = type(name, (CompactModel, model), {
+            "__slots__": tuple(fields) + ("_CompactModel__extra",
+                                          "_CompactModel__order"),
+            "__doc__": "Compact {} storing its attributes in __slots__"
+                       .format(name),
+            "__module__": __name__,
+            "__qualname__": name,
+            "_CompactModel__model": model,
+            "_CompactModel__fields": tuple(fields),
+        })
+    classes[name] = compact_classes[name]
+    return compact_classes[name]
+
+
+def use_compact_models():
+    """
+    Registers the compact subclasses of the built-in models in
+    models.base_model.classes
+
+    Returns:
+        None
+    """
+    for model in MODELS:
+        compact_model(model)
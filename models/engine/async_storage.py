@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+
+"""This module defines the asyncio front end of FileStorage
+
+AsyncFileStorage lets coroutines use the storage without blocking the event
+loop: saves, flushes and reloads run one at a time in a dedicated thread,
+where the objects are serialized and the files written, and lookups run in
+the default executor of the loop, so they are not queued behind a save.
+The objects stay shared with the event loop thread, so the storage must be
+in thread-safe mode (HBNB_FS_THREAD_SAFE=1).
+
+    storage = AsyncFileStorage(models.storage)
+    place = await storage.get(Place, place_id)
+    place.name = "Loft"
+    await storage.save()
+    async for place in storage.iter_query(Place, max_guest__ge=4):
+        ...
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncFileStorage:
+    """
+    Awaitable methods over a thread-safe FileStorage
+
+    Attributes:
+        storage (FileStorage): the storage used
+
+    Methods:
+        save(self): serializes the objects to the snapshot
+        flush(self): writes the saves deferred by group commit
+        reload(self, *, class_names=None): reads the snapshot
+        refresh(self): reloads the objects changed by another process
+        all(self, cls=None): returns the objects, or only those of cls
+        count(self, cls=None): returns the number of objects
+        get(self, cls, obj_id): returns the cls object with id obj_id
+        children(self, cls, obj_id, child_cls): returns the child_cls
+        objects referencing an object
+        query(self, cls, **conditions): returns the objects matching the
+        conditions
+        iter_query(self, cls, batch_size=100, **conditions): yields the
+        objects matching the conditions
+        nearby(self, cls, latitude, longitude, radius): returns the objects
+        within radius kilometers of a point
+        within(self, cls, south, west, north, east): returns the objects
+        inside a bounding box
+        aggregate(self, cls, func, attribute=None, by=None, **conditions):
+        aggregates an attribute over the objects of cls
+        new(self, obj): stores obj
+        delete(self, obj): deletes obj
+        close(self): stops the thread writing the files
+    """
+
+    def __init__(self, storage, executor=None):
+        """
+        Initializes an AsyncFileStorage instance
+
+        Args:
+            storage (FileStorage): storage in thread-safe mode
+            executor (Executor): runs the saves and reloads, in the order
+            they are awaited; by default a thread of its own, stopped by
+            close()
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if storage is not in thread-safe mode
+        """
+        if not storage.thread_safe:
+            raise ValueError("the storage is not thread-safe")
+        self.storage = storage
+        self.__owned = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1,
+                                          thread_name_prefix="FileStorage")
+        self.__executor = executor
+
+    async def __aenter__(self):
+        """Returns the instance, for an async with block"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Writes the deferred saves and closes the instance"""
+        try:
+            await self.flush()
+        finally:
+            self.close()
+
+    async def save(self):
+        """
+        Serializes the objects to the snapshot in the writing thread
+
+        Returns:
+            None
+        """
+        await self.__write(self.storage.save)
+
+    async def flush(self):
+        """
+        Writes the saves deferred by group commit in the writing thread
+
+        Returns:
+            None
+        """
+        await self.__write(self.storage.flush)
+
+    async def reload(self, *, class_names=None):
+        """
+        Reads the snapshot in the writing thread
+
+        Args:
+            class_names (iterable): in sharded mode, names of the classes to
+            load, all of them by default
+
+        Returns:
+            None
+        """
+        await self.__write(partial(self.storage.reload,
+                                   class_names=class_names))
+
+    async def refresh(self):
+        """
+        Reloads the objects changed by another process in shared mode, in
+        the writing thread
+
+        Returns:
+            bool: True if the objects were reloaded
+        """
+        return await self.__write(self.storage.refresh)
+
+    async def all(self, cls=None):
+        """
+        Returns a dictionary of the objects, or only of those of cls
+
+        Args:
+            cls (type or str): class or class name to filter on
+
+        Returns:
+            dict: objects by <class name>.id
+        """
+        return await self.__read(self.storage.all, cls)
+
+    async def count(self, cls=None):
+        """
+        Returns the number of objects stored, or only of the class cls
+
+        Args:
+            cls (type or str): class or class name to count
+
+        Returns:
+            int: number of objects
+        """
+        return await self.__read(self.storage.count, cls)
+
+    async def get(self, cls, obj_id):
+        """
+        Returns the cls object with id obj_id
+
+        Args:
+            cls (type or str): class or class name of the object
+            obj_id (str): id of the object
+
+        Returns:
+            BaseModel: the object, None if there is none
+        """
+        return await self.__read(self.storage.get, cls, obj_id)
+
+    async def children(self, cls, obj_id, child_cls):
+        """
+        Returns the child_cls objects referencing the cls object with id
+        obj_id
+
+        Args:
+            cls (type or str): class or class name of the parent
+            obj_id (str): id of the parent
+            child_cls (type or str): class or class name of the children
+
+        Returns:
+            list: child objects
+        """
+        return await self.__read(self.storage.children, cls, obj_id,
+                                 child_cls)
+
+    async def query(self, cls, **conditions):
+        """
+        Returns the objects of cls matching the conditions
+
+        Args:
+            cls (type or str): class or class name to search
+            **conditions: <attribute>[__<operator>]=<value> conditions
+
+        Returns:
+            list: matching objects
+        """
+        return await self.__read(partial(self.storage.query, cls,
+                                         **conditions))
+
+    async def iter_query(self, cls, batch_size=100, **conditions):
+        """
+        Yields the objects of cls matching the conditions, letting the
+        other tasks run after every batch
+
+        Args:
+            cls (type or str): class or class name to search
+            batch_size (int): number of objects yielded between two yields
+            to the event loop
+            **conditions: <attribute>[__<operator>]=<value> conditions
+
+        Yields:
+            BaseModel: every matching object
+        """
+        objects = await self.query(cls, **conditions)
+        for start in range(0, len(objects), batch_size):
+            for obj in objects[start:start + batch_size]:
+                yield obj
+            await asyncio.sleep(0)
+
+    async def nearby(self, cls, latitude, longitude, radius):
+        """
+        Returns the objects of cls within radius kilometers of a point
+
+        Args:
+            cls (type or str): class or class name with coordinates
+            latitude (float): latitude of the point
+            longitude (float): longitude of the point
+            radius (float): distance in kilometers
+
+        Returns:
+            list: objects, nearest first
+        """
+        return await self.__read(self.storage.nearby, cls, latitude,
+                                 longitude, radius)
+
+    async def within(self, cls, south, west, north, east):
+        """
+        Returns the objects of cls inside a bounding box
+
+        Args:
+            cls (type or str): class or class name with coordinates
+            south (float): minimum latitude
+            west (float): minimum longitude
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Returns:
+            list: objects inside the box
+        """
+        return await self.__read(self.storage.within, cls, south, west,
+                                 north, east)
+
+    async def aggregate(self, cls, func, attribute=None, by=None,
+                        **conditions):
+        """
+        Aggregates an attribute over the objects of cls matching the
+        conditions
+
+        Args:
+            cls (type or str): class or class name to aggregate
+            func (str): aggregate function, count, sum, mean, min or max
+            attribute (str): attribute to aggregate, None for count
+            by (str): attribute to group by, None for a single result
+            **conditions: <attribute>[__<operator>]=<value> conditions
+
+        Returns:
+            value or dict: the result, or the results by group
+        """
+        return await self.__read(partial(self.storage.aggregate, cls, func,
+                                         attribute, by, **conditions))
+
+    def new(self, obj):
+        """
+        Stores obj, without writing it
+
+        Args:
+            obj (BaseModel): object to store
+
+        Returns:
+            None
+        """
+        self.storage.new(obj)
+
+    def delete(self, obj=None):
+        """
+        Deletes obj, without writing it
+
+        Args:
+            obj (BaseModel): object to delete
+
+        Returns:
+            None
+        """
+        self.storage.delete(obj)
+
+    def close(self):
+        """
+        Stops the thread writing the files after the pending writes, if it
+        was created by the instance
+
+        Returns:
+            None
+        """
+        if self.__owned:
+            self.__executor.shutdown(wait=True)
+
+    async def __write(self, func):
+        """
+        Runs a function in the writing thread
+
+        Args:
+            func (callable): function called without arguments
+
+        Returns:
+            value returned by func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, func)
+
+    async def __read(self, func, *args):
+        """
+        Runs a lookup in the default executor of the event loop
+
+        Args:
+            func (callable): lookup
+            *args: arguments of func
+
+        Returns:
+            value returned by func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
@@ -0,0 +1,558 @@
+#!/usr/bin/python3
+
+"""This module defines the column store kept by FileStorage for analytics
+
+A ColumnStore keeps the numeric attributes of the objects of one class in
+typed NumPy arrays and the string attributes as codes into a table of
+interned strings, so filters and aggregates run vectorized over whole
+columns instead of iterating objects.
+
+NumPy is optional: without it numpy is None, ColumnStore cannot be
+created and FileStorage answers the same calls by iterating the objects.
+"""
+
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Aggregate functions accepted by FileStorage.aggregate()
+FUNCTIONS = ("count", "sum", "mean", "min", "max")
+
+COMPARISONS = {
+    "eq": operator.eq,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+}
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+# Value of an attribute an object does not have
+MISSING = object()
+
+
+def is_number(value):
+    """
+    Tells if value is a number that can be aggregated
+
+    Args:
+        value: value to test
+
+    Returns:
+        bool: True for int and float values
+    """
+    return isinstance(value, (int, float))
+
+
+def aggregate(func, values):
+    """
+    Applies an aggregate function to Python values, the values that are not
+    numbers being ignored
+
+    Args:
+        func (str): one of FUNCTIONS
+        values (iterable): values to aggregate
+
+    Returns:
+        the result, None for the mean, min or max of no number
+    """
+    numbers = [value for value in values if is_number(value)]
+    if func == "count":
+        return len(numbers)
+    if func == "sum":
+        return sum(numbers)
+    if not numbers:
+        return None
+    if func == "mean":
+        return sum(numbers) / len(numbers)
+    return min(numbers) if func == "min" else max(numbers)
+
+
+def sort_groups(groups):
+    """
+    Returns grouped results in ascending order of the group values, or in
+    the given order when the values cannot be compared
+
+    Args:
+        groups (iterable): (group value, result) pairs
+
+    Returns:
+        dict: results by group value
+    """
+    groups = list(groups)
+    try:
+        groups.sort(key=lambda group: group[0])
+    except TypeError:
+        pass
+    return dict(groups)
+
+
+class ColumnStore:
+    """
+    Columns of the attributes of the objects of one class
+
+    Each column has the type of the default value of the attribute: int
+    columns are int64 arrays, float columns float64 arrays and str columns
+    int32 arrays of codes into the table of interned strings. A value of
+    another type is kept out of the column; predicates on a column holding
+    such values are not answered, so the caller falls back to the objects.
+    Rows are kept dense: removing an object moves the last row in its place.
+
+    Attributes:
+        defaults (dict): default value of each column by attribute name
+        __ids (list): id of the object of each row
+        __rows (dict): row of each object by id
+        __capacity (int): number of rows the arrays can hold
+        __values (dict): array of the values of each column
+        __present (dict): array telling which rows hold a value, by column
+        __irregular (dict): array telling which rows hold a value of another
+        type, by column
+        __strings (list): interned strings by code
+        __codes (dict): code of each interned string
+
+    Methods:
+        add(self, obj): stores the attributes of obj
+        add_values(self, obj_id, values): stores a serialized object
+        extend(self, ids, columns): appends objects column by column
+        remove(self, obj_id): removes the object with id obj_id
+        mask(self, predicates): returns the rows matching the predicates
+        ids(self, mask): returns the ids of the rows of a mask
+        can_aggregate(self, attribute, by): tells if aggregate() can answer
+        aggregate(self, func, attribute, by, mask): aggregates a column
+    """
+
+    def __init__(self, defaults):
+        """
+        Initializes a ColumnStore instance
+
+        Args:
+            defaults (dict): default value of each column by attribute name,
+            its type (int, float or str) sets the type of the column
+
+        Returns:
+            None
+
+        Raises:
+            ImportError: if NumPy is not installed
+        """
+        if numpy is None:
+            raise ImportError("ColumnStore requires numpy")
+        self.defaults = dict(defaults)
+        self.__ids = []
+        self.__rows = {}
+        self.__values = {}
+        self.__present = {}
+        self.__irregular = {}
+        self.__capacity = 16
+        for name, default in self.defaults.items():
+            dtype = {int: numpy.int64, float: numpy.float64,
+                     str: numpy.int32}[type(default)]
+            self.__values[name] = numpy.zeros(self.__capacity, dtype)
+            self.__present[name] = numpy.zeros(self.__capacity, bool)
+            self.__irregular[name] = numpy.zeros(self.__capacity, bool)
+        self.__strings = []
+        self.__codes = {}
+
+    def __len__(self):
+        """
+        Returns the number of rows
+
+        Returns:
+            int: number of objects stored
+        """
+        return len(self.__ids)
+
+    def add(self, obj):
+        """
+        Stores the attributes of obj, replacing the row it had before
+
+        Args:
+            obj (BaseModel): object to store
+
+        Returns:
+            None
+        """
+        row = self.__row_of(obj.id)
+        for name in self.defaults:
+            self.__set(name, row, getattr(obj, name, MISSING))
+
+    def add_values(self, obj_id, values):
+        """
+        Stores a serialized object, the attributes it does not hold taking
+        their default value, replacing the row it had before
+
+        Args:
+            obj_id (str): id of the object
+            values (dict): dictionary returned by to_dict()
+
+        Returns:
+            None
+        """
+        row = self.__row_of(obj_id)
+        for name, default in self.defaults.items():
+            self.__set(name, row, values.get(name, default))
+
+    def extend(self, ids, columns):
+        """
+        Appends objects not stored yet, converting each column at once
+
+        Args:
+            ids (list): ids of the objects
+            columns (dict): list of the values of the objects by attribute
+            name, MISSING for an object without the attribute
+
+        Returns:
+            None
+        """
+        start = len(self.__ids)
+        end = start + len(ids)
+        while end > self.__capacity:
+            self.__grow()
+        self.__ids.extend(ids)
+        self.__rows.update(zip(ids, range(start, end)))
+        for name, default in self.defaults.items():
+            values = columns[name]
+            array = self.__convert(type(default), values)
+            if array is None:
+                for row, value in enumerate(values, start):
+                    self.__set(name, row, value)
+            else:
+                self.__values[name][start:end] = array
+                self.__present[name][start:end] = True
+                self.__irregular[name][start:end] = False
+
+    def remove(self, obj_id):
+        """
+        Removes the object with id obj_id, moving the last row in its place
+
+        Args:
+            obj_id (str): id of the object
+
+        Returns:
+            None
+        """
+        row = self.__rows.pop(obj_id, None)
+        if row is None:
+            return
+        last = len(self.__ids) - 1
+        last_id = self.__ids.pop()
+        if row != last:
+            self.__ids[row] = last_id
+            self.__rows[last_id] = row
+            for arrays in (self.__values, self.__present, self.__irregular):
+                for array in arrays.values():
+                    array[row] = array[last]
+
+    def mask(self, predicates):
+        """
+        Returns the rows matching all the predicates
+
+        Args:
+            predicates (list): (attribute, operator, value) tuples, see
+            models/engine/query.py
+
+        Returns:
+            numpy.ndarray: boolean array by row, None if a predicate is on
+            an attribute without a regular column or cannot be evaluated
+            on the column
+        """
+        size = len(self.__ids)
+        mask = numpy.ones(size, bool)
+        for attribute, op, operand in predicates:
+            if attribute not in self.defaults or \
+                    self.__irregular[attribute][:size].any():
+                return None
+            values = self.__values[attribute][:size]
+            if isinstance(self.defaults[attribute], str):
+                matches = self.__string_mask(values, op, operand)
+            else:
+                matches = self.__number_mask(values, op, operand)
+            if matches is None:
+                return None
+            mask &= matches
+            mask &= self.__present[attribute][:size]
+        return mask
+
+    def ids(self, mask):
+        """
+        Returns the ids of the rows of a mask
+
+        Args:
+            mask (numpy.ndarray): boolean array returned by mask()
+
+        Returns:
+            list: ids of the objects
+        """
+        ids = self.__ids
+        return [ids[row] for row in numpy.flatnonzero(mask)]
+
+    def can_aggregate(self, attribute, by=None):
+        """
+        Tells if aggregate() can answer for a column and a grouping column
+
+        Args:
+            attribute (str): aggregated attribute, None to count objects
+            by (str): grouping attribute, None for no grouping
+
+        Returns:
+            bool: True if attribute is a regular numeric column and by a
+            regular column; a value kept out of the column, e.g. a float in
+            an int column, would be left out of the result
+        """
+        size = len(self.__ids)
+        if attribute is not None and (
+                attribute not in self.defaults or
+                isinstance(self.defaults[attribute], str) or
+                self.__irregular[attribute][:size].any()):
+            return False
+        if by is not None and (
+                by not in self.defaults or
+                self.__irregular[by][:size].any()):
+            return False
+        return True
+
+    def aggregate(self, func, attribute, by, mask):
+        """
+        Aggregates the numeric values of a column over the rows of a mask,
+        the rows without a number being ignored
+
+        Args:
+            func (str): one of FUNCTIONS
+            attribute (str): aggregated attribute, None to count the rows
+            by (str): grouping attribute, None for no grouping
+            mask (numpy.ndarray): boolean array returned by mask()
+
+        Returns:
+            the result, or the results by value of by in ascending order;
+            None for the mean, min or max of no number
+        """
+        size = len(self.__ids)
+        if attribute is None:
+            values = numpy.zeros(size, numpy.int64)
+            present = numpy.ones(size, bool)
+        else:
+            values = self.__values[attribute][:size]
+            present = self.__present[attribute][:size]
+        if by is None:
+            return self.__reduce(func, values[mask & present])
+        selected = mask & self.__present[by][:size]
+        keys, groups = numpy.unique(self.__values[by][:size][selected],
+                                    return_inverse=True)
+        groups = groups.reshape(-1)
+        valid = present[selected]
+        values, groups = values[selected][valid], groups[valid]
+        results = self.__reduce_groups(func, values, groups, len(keys))
+        if isinstance(self.defaults[by], str):
+            keys = [self.__strings[code] for code in keys.tolist()]
+        else:
+            keys = keys.tolist()
+        return sort_groups(zip(keys, results))
+
+    @staticmethod
+    def __reduce(func, values):
+        """
+        Applies an aggregate function to an array
+
+        Args:
+            func (str): one of FUNCTIONS
+            values (numpy.ndarray): values to aggregate
+
+        Returns:
+            the result as a Python value
+        """
+        if func == "count":
+            return int(values.size)
+        if func == "sum":
+            return values.sum().item()
+        if values.size == 0:
+            return None
+        return getattr(values, func)().item()
+
+    @staticmethod
+    def __reduce_groups(func, values, groups, count):
+        """
+        Applies an aggregate function to every group of an array
+
+        Args:
+            func (str): one of FUNCTIONS
+            values (numpy.ndarray): values to aggregate
+            groups (numpy.ndarray): group number of each value
+            count (int): number of groups
+
+        Returns:
+            list: result of every group
+        """
+        sizes = numpy.bincount(groups, minlength=count)
+        if func == "count":
+            return sizes.tolist()
+        if func in ("sum", "mean"):
+            sums = numpy.zeros(count, values.dtype)
+            numpy.add.at(sums, groups, values)
+            if func == "sum":
+                return sums.tolist()
+            return [total / size if size else None
+                    for total, size in zip(sums.tolist(), sizes.tolist())]
+        extremes = numpy.zeros(count, values.dtype)
+        if values.size:
+            # Start every group from one of its values
+            extremes[groups] = values
+            getattr(numpy, "minimum" if func == "min" else "maximum").at(
+                extremes, groups, values)
+        return [extreme if size else None
+                for extreme, size in zip(extremes.tolist(), sizes.tolist())]
+
+    def __string_mask(self, codes, op, operand):
+        """
+        Evaluates a predicate on a str column
+
+        Args:
+            codes (numpy.ndarray): codes of the column
+            op (str): operator, only "eq" and "in" are evaluated
+            operand: operand of the operator
+
+        Returns:
+            numpy.ndarray: boolean array by row, None for other operators
+        """
+        if op == "eq":
+            operand = [operand]
+        elif op != "in":
+            return None
+        known = [self.__codes[value] for value in operand
+                 if isinstance(value, str) and value in self.__codes]
+        return numpy.isin(codes, known)
+
+    @staticmethod
+    def __number_mask(values, op, operand):
+        """
+        Evaluates a predicate on a numeric column
+
+        An operand that is not a number matches no row, as comparing it
+        with a number is either False or an error for query.matches().
+
+        Args:
+            values (numpy.ndarray): values of the column
+            op (str): operator
+            operand: operand of the operator
+
+        Returns:
+            numpy.ndarray: boolean array by row, None if the operand cannot
+            be compared with the column
+        """
+        try:
+            if op == "in":
+                numbers = [value for value in operand if is_number(value)]
+                return numpy.isin(values, numpy.array(numbers))
+            if not is_number(operand):
+                return numpy.zeros(values.size, bool)
+            return COMPARISONS[op](values, operand)
+        except (OverflowError, TypeError, ValueError):
+            return None
+
+    def __row_of(self, obj_id):
+        """
+        Returns the row of an object, appending one for a new object
+
+        Args:
+            obj_id (str): id of the object
+
+        Returns:
+            int: row number
+        """
+        row = self.__rows.get(obj_id)
+        if row is None:
+            row = len(self.__ids)
+            if row == self.__capacity:
+                self.__grow()
+            self.__ids.append(obj_id)
+            self.__rows[obj_id] = row
+        return row
+
+    def __grow(self):
+        """
+        Doubles the capacity of the arrays
+
+        Returns:
+            None
+        """
+        self.__capacity *= 2
+        for arrays in (self.__values, self.__present, self.__irregular):
+            for name, array in arrays.items():
+                grown = numpy.zeros(self.__capacity, array.dtype)
+                grown[:array.size] = array
+                arrays[name] = grown
+
+    def __convert(self, kind, values):
+        """
+        Converts a list of values to the array of a column when they all
+        have the type of the column
+
+        Args:
+            kind (type): int, float or str
+            values (list): values of the column
+
+        Returns:
+            numpy.ndarray: the column, None if a value needs to be stored
+            on its own
+        """
+        types = set(map(type, values))
+        if kind is str:
+            if not types <= {str}:
+                return None
+            codes, strings = self.__codes, self.__strings
+            for value in set(values).difference(codes):
+                codes[value] = len(strings)
+                strings.append(value)
+            return numpy.array([codes[value] for value in values],
+                               numpy.int32)
+        if not types <= ({int, bool} if kind is int else {int, bool, float}):
+            return None
+        try:
+            array = numpy.array(values, {int: numpy.int64,
+                                         float: numpy.float64}[kind])
+        except OverflowError:
+            return None
+        if kind is float and int in types and array.size and \
+                numpy.abs(array).max() > 2 ** 53:
+            return None
+        return array
+
+    def __set(self, name, row, value):
+        """
+        Stores the value of one attribute in its column
+
+        Args:
+            name (str): attribute name
+            row (int): row number
+            value: attribute value, MISSING if the object has none
+
+        Returns:
+            None
+        """
+        kind = type(self.defaults[name])
+        present = True
+        if value is MISSING:
+            present, irregular = False, False
+        elif kind is str:
+            irregular = not isinstance(value, str)
+            if not irregular:
+                code = self.__codes.get(value)
+                if code is None:
+                    code = self.__codes[value] = len(self.__strings)
+                    self.__strings.append(value)
+                value = code
+        elif kind is int:
+            irregular = not (isinstance(value, int) and
+                             INT64_MIN <= value <= INT64_MAX)
+        else:
+            irregular = not is_number(value) or (
+                isinstance(value, int) and abs(value) > 2 ** 53)
+        if irregular:
+            present = False
+        self.__present[name][row] = present
+        self.__irregular[name][row] = irregular
+        if present:
+            self.__values[name][row] = value
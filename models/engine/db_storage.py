@@ -0,0 +1,713 @@
+#!/usr/bin/python3
+
+"""This module defines a class to manage SQLite storage for hbnb clone
+
+DBStorage keeps the objects in a SQLite database instead of a JSON file, so
+saving a change writes the rows of the changed objects only, and a query
+reads the rows it needs through the indexes of the database.
+"""
+
+import json
+import sqlite3
+from models.engine import columnar, query
+from models.engine.durability import DURABILITY_LEVELS
+from models.engine.indexes import INDEX_KINDS
+from models.engine.spatial import inside
+from models.engine.storage import COORDINATES, FOREIGN_KEYS, StorageEngine
+# The model modules are imported to register their class in classes
+from models.base_model import BaseModel, classes, copy_attributes
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+
+class DBStorage(StorageEngine):
+    """
+    This class manages storage of hbnb models in a SQLite database, a
+    StorageEngine
+
+    Every class has a table named after it, with the id as primary key, the
+    serialized object (to_dict() in JSON) it is built from, and a column
+    for each attribute declared on the class that is not a list, holding
+    the value of the object when it is a string or a number. A list
+    attribute (e.g. Place.amenity_ids) has a table of its own named
+    <class name>.<attribute>, holding one row per element. The foreign keys
+    and the latitude are indexed. The tables are created when the database
+    is opened, and the columns of attributes declared since are added.
+
+    The database is in WAL mode, so the readers of other connections are
+    not blocked while it is written. The durability level sets the
+    synchronous mode of SQLite: OFF for "atomic", NORMAL for "fsync" and
+    FULL for "full".
+
+    The objects read from the database are kept by key, so reading an
+    object twice returns the same instance. The changes are kept in memory
+    until save(), which writes the rows of the changed objects in one
+    transaction with the same prepared statements. The queries read the
+    database and overlay the changes that are not saved yet.
+
+    A query condition on a column is evaluated by SQLite when the operand
+    is a string or a number; the rows found are tested again in Python, so
+    the results are those of FileStorage.query(). The conditions on other
+    attributes are only tested in Python.
+
+    Attributes:
+        __path (str): path to the database file
+        __synchronous (str): synchronous mode of SQLite
+        __connection (Connection): connection to the database, opened on
+        first use
+        __objects (dict): objects read or stored by <class name>.id
+        __pending (set): keys of objects changed since the last save
+        __schemas (dict): (columns, list attributes) by class name, for the
+        classes whose tables exist
+        __data_version (int): data version of the database at the last
+        refresh()
+        __synchronous_modes (dict): synchronous mode by durability level
+        __operators (dict): SQL operator of each comparison operator
+        __batch_size (int): number of ids read by refresh() per statement,
+        below the limit of SQLite on parameters
+
+    Methods:
+        all(self, cls=None): returns the objects, or only those of cls
+        count(self, cls=None): returns the number of objects, or only of cls
+        get(self, cls, obj_id): returns the cls object with id obj_id
+        create_index(self, cls, attribute, kind="hash"): indexes the column
+        of an attribute
+        query(self, cls, **conditions): returns the objects of cls matching
+        the conditions
+        within(self, cls, south, west, north, east): returns the objects of
+        cls inside a bounding box
+        new(self, obj): stores obj
+        delete(self, obj): deletes obj
+        mark_dirty(self, obj, name=None): marks a stored obj as changed
+        save(self): writes the changed objects to the database
+        reload(self): opens the database and forgets the objects read
+        refresh(self): reads the objects read again if another connection
+        wrote to the database
+        close(self): closes the connection
+
+    The other methods of StorageEngine keep their default implementation,
+    built on query() and within(). The storage is not thread-safe: a
+    connection is used by the thread that opened it.
+    """
+    __synchronous_modes = {"atomic": "OFF", "fsync": "NORMAL",
+                           "full": "FULL"}
+    __operators = {"eq": "=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+    __batch_size = 500
+
+    def __init__(self, path="file.db", *, durability="fsync"):
+        """
+        Initializes a DBStorage instance, without opening the database
+
+        Args:
+            path (str): path to the database file
+            durability (str): writes flushed to the disk, a key of
+            durability.DURABILITY_LEVELS
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if durability is unknown
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError("unknown durability: {}".format(durability))
+        self.__path = path
+        self.__synchronous = self.__synchronous_modes[durability]
+        self.__connection = None
+        self.__objects = {}
+        self.__pending = set()
+        self.__schemas = {}
+        self.__data_version = None
+
+    def all(self, cls=None):
+        """
+        Returns a new dictionary of the objects, or only of those of cls
+
+        Args:
+            cls (type or str): class or class name to filter on
+
+        Returns:
+            dict: objects by <class name>.id
+        """
+        if cls is None:
+            class_names = list(classes)
+        else:
+            class_names = [cls if isinstance(cls, str) else cls.__name__]
+        objects = {}
+        for class_name in class_names:
+            for obj in self.__select(class_name, []):
+                objects["{}.{}".format(class_name, obj.id)] = obj
+        return objects
+
+    def count(self, cls=None):
+        """
+        Returns the number of objects stored, or only of the class cls,
+        counted by SQLite
+
+        Args:
+            cls (type or str): class or class name to count
+
+        Returns:
+            int: number of objects
+        """
+        if cls is None:
+            class_names = set(classes)
+        else:
+            class_names = {cls if isinstance(cls, str) else cls.__name__}
+        connection = self.__connect()
+        total = 0
+        for class_name in class_names:
+            if self.__schema(class_name) is not None:
+                total += connection.execute(
+                    'SELECT COUNT(*) FROM "{}"'.format(class_name)
+                ).fetchone()[0]
+        for key in self.__pending:
+            class_name, obj_id = key.split(".", 1)
+            if class_name in class_names:
+                total += (key in self.__objects) - self.__stored(class_name,
+                                                                 obj_id)
+        return total
+
+    def get(self, cls, obj_id):
+        """
+        Returns the cls object with id obj_id, read by primary key if it was
+        not read yet
+
+        Args:
+            cls (type or str): class or class name of the object
+            obj_id (str): id of the object
+
+        Returns:
+            BaseModel: the object, None if there is none
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(class_name, obj_id)
+        if key in self.__objects or key in self.__pending:
+            return self.__objects.get(key)
+        if self.__schema(class_name) is None:
+            return None
+        row = self.__connect().execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(class_name),
+            (obj_id,)).fetchone()
+        if row is None:
+            return None
+        obj = self.__objects[key] = self.__build(class_name, row[0])
+        return obj
+
+    def create_index(self, cls, attribute, kind="hash"):
+        """
+        Creates an index of the database on the column of an attribute
+
+        Both kinds of index are B-trees, which answer equality and range
+        conditions. The list attributes are always indexed.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            attribute (str): name of the attribute to index
+            kind (str): kind of index, a key of indexes.INDEX_KINDS
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if kind is unknown, or the attribute has no column
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError("unknown index kind: {}".format(kind))
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        schema = self.__schema(class_name)
+        if schema is None or attribute not in schema[0] + schema[1]:
+            raise ValueError("{} has no column {}".format(class_name,
+                                                          attribute))
+        if attribute in schema[0]:
+            self.__create_index(class_name, attribute)
+
+    def query(self, cls, **conditions):
+        """
+        Returns the objects of cls matching all the conditions
+
+        The conditions are keyword arguments <attribute>__<operator>=<value>
+        (see models/engine/query.py). SQLite selects the rows with the
+        conditions on columns, through their indexes, and the objects built
+        from the rows are tested against all the conditions.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            **conditions: conditions the objects must satisfy
+
+        Returns:
+            list: matching objects
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        return self.__select(class_name, query.parse(conditions))
+
+    def within(self, cls, south, west, north, east):
+        """
+        Returns the objects of cls inside a bounding box, selected through
+        the index of the latitude
+
+        Args:
+            cls (type or str): class or class name of the objects
+            south (float): minimum latitude
+            west (float): minimum longitude, greater than east for a box
+            crossing the antimeridian
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Returns:
+            list: objects inside the box
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        if (class_name not in COORDINATES or
+                self.__schema(class_name) is None):
+            raise ValueError("{} has no coordinates".format(class_name))
+        lat, lon = COORDINATES[class_name]
+        where = ("typeof(\"{0}\") IN ('integer', 'real') AND "
+                 "\"{0}\" BETWEEN ? AND ? AND "
+                 "typeof(\"{1}\") IN ('integer', 'real') AND ").format(lat,
+                                                                      lon)
+        if west <= east:
+            where += '"{}" BETWEEN ? AND ?'.format(lon)
+        else:
+            where += '("{0}" >= ? OR "{0}" <= ?)'.format(lon)
+        located = []
+        for obj in self.__select(class_name, [], where,
+                                 (south, north, west, east)):
+            latitude = getattr(obj, lat, None)
+            longitude = getattr(obj, lon, None)
+            if (columnar.is_number(latitude) and
+                    columnar.is_number(longitude) and
+                    inside(latitude, longitude, south, west, north, east)):
+                located.append(obj)
+        return located
+
+    def new(self, obj):
+        """
+        Stores obj, written to the database on the next save
+
+        Calling it again on an object already stored marks it as changed.
+
+        Args:
+            obj (BaseModel): object to store
+
+        Returns:
+            None
+        """
+        if obj:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            self.__objects[key] = obj
+            self.__pending.add(key)
+
+    def delete(self, obj=None):
+        """
+        Deletes obj, removed from the database on the next save
+
+        Args:
+            obj (BaseModel): object to delete
+
+        Returns:
+            None
+        """
+        if obj:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            self.__objects.pop(key, None)
+            self.__pending.add(key)
+
+    def mark_dirty(self, obj, name=None):
+        """
+        Marks obj as changed if it is the object stored under its key
+
+        Called by BaseModel on every attribute assignment. Changes made in
+        place to a mutable attribute (e.g. list.append) are not seen; call
+        new(obj) again after such a change.
+
+        Args:
+            obj (BaseModel): object whose attribute was assigned
+            name (str): name of the assigned attribute, None if unknown
+
+        Returns:
+            None
+        """
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            self.__pending.add(key)
+
+    def save(self):
+        """
+        Writes the objects changed since the last save to the database, in
+        one transaction
+
+        Each changed object replaces its row and the rows of its list
+        attributes, each deleted object has its rows deleted; the
+        statements are prepared once per class and run with executemany().
+
+        Returns:
+            None
+        """
+        if not self.__pending:
+            return
+        changes = {}
+        for key in self.__pending:
+            class_name, obj_id = key.split(".", 1)
+            if self.__schema(class_name) is not None:
+                changes.setdefault(class_name, []).append(
+                    (obj_id, self.__objects.get(key)))
+        with self.__connect() as connection:
+            for class_name, objects in changes.items():
+                self.__write(connection, class_name, objects)
+        self.__pending.clear()
+
+    def reload(self):
+        """
+        Opens the database, creating the tables it misses, and forgets the
+        objects read and the changes not saved, so the objects are read
+        again from the database
+
+        Returns:
+            None
+        """
+        self.__connect()
+        self.__objects.clear()
+        self.__pending.clear()
+
+    def refresh(self):
+        """
+        Reads again the objects read that are not changed if another
+        connection wrote to the database since the last call
+
+        The rows are read into the instances already returned, so the
+        references held by the application see the changes; the objects
+        whose row was deleted are forgotten. Only the data version of the
+        database is read when nothing changed.
+
+        Returns:
+            bool: True if the objects were read again
+        """
+        version = self.__connect().execute(
+            "PRAGMA data_version").fetchone()[0]
+        if version == self.__data_version:
+            return False
+        self.__data_version = version
+        read = {}
+        for key, obj in self.__objects.items():
+            if key not in self.__pending:
+                class_name, _, obj_id = key.partition(".")
+                read.setdefault(class_name, {})[obj_id] = obj
+        for class_name, objects in read.items():
+            if self.__schema(class_name) is not None:
+                self.__read_again(class_name, objects)
+            for obj_id in objects:
+                del self.__objects["{}.{}".format(class_name, obj_id)]
+        return True
+
+    def close(self):
+        """
+        Closes the connection to the database, opened again on next use
+
+        Returns:
+            None
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+            self.__schemas.clear()
+
+    def __connect(self):
+        """
+        Returns the connection to the database, opening it in WAL mode and
+        creating the tables of the classes the first time
+
+        Returns:
+            Connection: the connection
+        """
+        if self.__connection is None:
+            connection = sqlite3.connect(self.__path, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous={}".format(
+                self.__synchronous))
+            self.__connection = connection
+            self.__data_version = connection.execute(
+                "PRAGMA data_version").fetchone()[0]
+            for class_name in list(classes):
+                self.__schema(class_name)
+        return self.__connection
+
+    def __schema(self, class_name):
+        """
+        Returns the columns and list attributes of a class, creating its
+        tables and indexes if needed
+
+        The columns are the attributes declared on the class and its model
+        superclasses whose default value is a string or a number.
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            tuple: (columns, list attributes) tuples of attribute names, None
+            for a name that is not a class
+        """
+        schema = self.__schemas.get(class_name)
+        if schema is not None or class_name not in classes:
+            return schema
+        connection = self.__connect()
+        columns, lists = [], []
+        for klass in reversed(classes[class_name].__mro__):
+            if not issubclass(klass, BaseModel) or klass is BaseModel:
+                continue
+            for name, value in vars(klass).items():
+                if name.startswith("_") or name in columns or name in lists:
+                    continue
+                if isinstance(value, list):
+                    lists.append(name)
+                elif isinstance(value, (str, int, float)):
+                    columns.append(name)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, '
+            'data TEXT NOT NULL{})'.format(class_name, "".join(
+                ', "{}"'.format(name) for name in columns)))
+        existing = {row[1] for row in connection.execute(
+            'PRAGMA table_info("{}")'.format(class_name))}
+        for name in columns:
+            if name not in existing:
+                connection.execute('ALTER TABLE "{}" ADD COLUMN "{}"'.format(
+                    class_name, name))
+        for name in lists:
+            table = "{}.{}".format(class_name, name)
+            connection.execute('CREATE TABLE IF NOT EXISTS "{}" '
+                               '(id TEXT NOT NULL, value)'.format(table))
+            self.__create_index(table, "id")
+            self.__create_index(table, "value")
+        schema = self.__schemas[class_name] = (tuple(columns), tuple(lists))
+        indexed = list(FOREIGN_KEYS.get(class_name, ()))
+        indexed += COORDINATES.get(class_name, ())[:1]
+        for name in indexed:
+            if name in columns:
+                self.__create_index(class_name, name)
+        return schema
+
+    def __create_index(self, table, column):
+        """
+        Creates the index <table>(<column>) if it does not exist
+
+        Args:
+            table (str): name of the table
+            column (str): name of the column
+
+        Returns:
+            None
+        """
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS "{0}({1})" ON "{0}"("{1}")'.format(
+                table, column))
+
+    def __write(self, connection, class_name, objects):
+        """
+        Writes the rows of changed objects of a class
+
+        Args:
+            connection (Connection): connection in a transaction
+            class_name (str): name of the class
+            objects (list): (id, object) pairs, the object being None for a
+            deleted object
+
+        Returns:
+            None
+        """
+        columns, lists = self.__schemas[class_name]
+        ids = [(obj_id,) for obj_id, _ in objects]
+        rows = [(obj_id, json.dumps(obj.to_dict())) + tuple(
+                    self.__column_value(getattr(obj, name, None))
+                    for name in columns)
+                for obj_id, obj in objects if obj is not None]
+        connection.executemany(
+            'DELETE FROM "{}" WHERE id = ?'.format(class_name),
+            [(obj_id,) for obj_id, obj in objects if obj is None])
+        connection.executemany(
+            'INSERT OR REPLACE INTO "{}" (id, data{}) VALUES (?, ?{})'.format(
+                class_name, "".join(', "{}"'.format(name) for name in columns),
+                ", ?" * len(columns)), rows)
+        for name in lists:
+            table = "{}.{}".format(class_name, name)
+            connection.executemany(
+                'DELETE FROM "{}" WHERE id = ?'.format(table), ids)
+            elements = []
+            for obj_id, obj in objects:
+                if obj is not None:
+                    value = getattr(obj, name, None)
+                    if not isinstance(value, list):
+                        value = [] if value is None else [value]
+                    elements.extend((obj_id, self.__column_value(item))
+                                    for item in value)
+            connection.executemany(
+                'INSERT INTO "{}" (id, value) VALUES (?, ?)'.format(table),
+                elements)
+
+    def __select(self, class_name, predicates, where="", params=()):
+        """
+        Returns the objects of a class matching predicates, reading the rows
+        selected by SQLite and overlaying the changes not saved
+
+        Args:
+            class_name (str): name of the class
+            predicates (list): (attribute, operator, value) tuples
+            where (str): additional SQL condition on the rows
+            params (tuple): parameters of where
+
+        Returns:
+            list: matching objects
+        """
+        schema = self.__schema(class_name)
+        if schema is None:
+            return []
+        clauses, values = self.__conditions(class_name, schema, predicates)
+        if where:
+            clauses.append(where)
+            values.extend(params)
+        sql = 'SELECT id, data FROM "{}"'.format(class_name)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        objects = []
+        prefix = class_name + "."
+        for obj_id, data in self.__connection.execute(sql, values):
+            key = prefix + obj_id
+            if key in self.__pending:
+                continue
+            obj = self.__objects.get(key)
+            if obj is None:
+                obj = self.__objects[key] = self.__build(class_name, data)
+            objects.append(obj)
+        objects.extend(self.__objects[key] for key in self.__pending
+                       if key.startswith(prefix) and key in self.__objects)
+        return [obj for obj in objects if query.matches(obj, predicates)]
+
+    def __read_again(self, class_name, objects):
+        """
+        Copies the rows of objects of a class into them, removing from
+        objects those which have a row
+
+        Args:
+            class_name (str): name of the class
+            objects (dict): objects by id
+
+        Returns:
+            None
+        """
+        ids = list(objects)
+        for start in range(0, len(ids), self.__batch_size):
+            batch = ids[start:start + self.__batch_size]
+            rows = self.__connection.execute(
+                'SELECT id, data FROM "{}" WHERE id IN ({})'.format(
+                    class_name, ", ".join("?" * len(batch))), batch)
+            for obj_id, data in rows:
+                copy_attributes(self.__build(class_name, data),
+                                objects.pop(obj_id))
+
+    def __conditions(self, class_name, schema, predicates):
+        """
+        Translates the predicates SQLite can evaluate to SQL conditions
+
+        A predicate is translated when its attribute is the id, a column or
+        a list attribute and its operands are strings or numbers. The
+        conditions select a superset of the matching rows: the rows whose
+        value is not a string or a number are also selected, to be tested
+        in Python.
+
+        Args:
+            class_name (str): name of the class
+            schema (tuple): (columns, list attributes) of the class
+            predicates (list): (attribute, operator, value) tuples
+
+        Returns:
+            tuple: list of SQL conditions, list of their parameters
+        """
+        columns, lists = schema
+        clauses, params = [], []
+        for attribute, op, value in predicates:
+            operands = value if op == "in" else [value]
+            if not all(self.__column_value(operand) is operand and
+                       operand is not None for operand in operands):
+                continue
+            if op == "in":
+                test = "{{0}} IN ({})".format(", ".join("?" * len(operands)))
+            elif op == "eq":
+                test = "{0} = ?"
+            else:
+                kinds = ("'text'" if isinstance(value, str)
+                         else "'integer', 'real'")
+                # Python cannot compare a string with a number
+                test = "typeof({{0}}) IN ({}) AND {{0}} {} ?".format(
+                    kinds, self.__operators[op])
+            if attribute == "id":
+                if not all(isinstance(operand, str) for operand in operands):
+                    continue
+                clauses.append(test.format("id"))
+            elif attribute in columns:
+                clauses.append("({} OR {} = x'')".format(
+                    test.format('"{}"'.format(attribute)),
+                    '"{}"'.format(attribute)))
+            elif attribute in lists:
+                clauses.append(
+                    'id IN (SELECT id FROM "{}.{}" WHERE {} OR value = x\'\')'
+                    .format(class_name, attribute, test.format("value")))
+            else:
+                continue
+            params.extend(operands)
+        return clauses, params
+
+    def __stored(self, class_name, obj_id):
+        """
+        Tells if the database has a row for an object
+
+        Args:
+            class_name (str): name of the class
+            obj_id (str): id of the object
+
+        Returns:
+            bool: True if the row exists
+        """
+        if self.__schema(class_name) is None:
+            return False
+        return self.__connection.execute(
+            'SELECT 1 FROM "{}" WHERE id = ?'.format(class_name),
+            (obj_id,)).fetchone() is not None
+
+    @staticmethod
+    def __build(class_name, data):
+        """
+        Builds an object from its serialized row
+
+        Args:
+            class_name (str): name of the class
+            data (str): to_dict() of the object in JSON
+
+        Returns:
+            BaseModel: the object
+        """
+        return classes[class_name](**json.loads(data))
+
+    @staticmethod
+    def __column_value(value):
+        """
+        Returns the value written in a column for an attribute value
+
+        Args:
+            value: attribute value
+
+        Returns:
+            the value if it is None, a string or a number SQLite holds, an
+            empty blob otherwise, selected by every condition
+        """
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, float) or (isinstance(value, int) and
+                                        -2 ** 63 <= value < 2 ** 63):
+            return value
+        return b""
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+
+"""This module defines how FileStorage makes its writes durable
+
+A file is never rewritten in place: it is written next to its path, then
+renamed over it, so a crash leaves either the old file or the new one.
+The durability level sets which writes are flushed to the disk:
+
+    atomic: none; a crash of the process loses nothing saved, a crash of
+    the system can lose the last saves
+    fsync: the new file before it is renamed, and the log after every
+    append; a crash of the system can only lose the last rename
+    full: also the directory after the rename, which makes it durable
+"""
+
+import os
+
+DURABILITY_LEVELS = ("atomic", "fsync", "full")
+
+
+def sync_file(path):
+    """
+    Flushes a file to the disk
+
+    Args:
+        path (str): path of the file
+
+    Returns:
+        None
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_directory(path):
+    """
+    Flushes the entries of a directory to the disk, so that the files
+    created or renamed in it are durable
+
+    Does nothing where directories cannot be opened (Windows).
+
+    Args:
+        path (str): path of the directory, "" for the current directory
+
+    Returns:
+        None
+    """
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(tmp_path, path, level):
+    """
+    Renames a file written next to path over it, flushing what the
+    durability level requires
+
+    Args:
+        tmp_path (str): path of the new file
+        path (str): path of the file to replace
+        level (str): durability level, one of DURABILITY_LEVELS
+
+    Returns:
+        None
+    """
+    if level != "atomic":
+        sync_file(tmp_path)
+    os.replace(tmp_path, path)
+    if level == "full":
+        sync_directory(os.path.dirname(path))
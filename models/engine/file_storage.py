@@ -2,8 +2,24 @@
 
 """This module defines a class to manage file storage for hbnb clone"""
 
+import atexit
 import json
-from models.base_model import BaseModel
+import multiprocessing
+import os
+import threading
+import zlib
+from contextlib import contextmanager, nullcontext
+from functools import partial, wraps
+from models.engine import columnar, locking, query
+from models.engine.durability import DURABILITY_LEVELS, replace_file
+from models.engine.durability import sync_directory, sync_file
+from models.engine.serializers import SERIALIZERS, MappedSerializer
+from models.engine.snapshot import MappedKeys
+from models.engine.indexes import INDEX_KINDS
+from models.engine.spatial import GridIndex
+from models.engine.storage import COORDINATES, FOREIGN_KEYS, StorageEngine
+# The model modules are imported to register their class in classes
+from models.base_model import BaseModel, classes, copy_attributes
 from models.user import User
 from models.state import State
 from models.city import City
@@ -12,36 +28,524 @@ from models.place import Place
 from models.review import Review
 
 
-class FileStorage:
+class FileStorage(StorageEngine):
     """
-    This class manages storage of hbnb models in JSON format
+    This class manages storage of hbnb models in JSON format, a
+    StorageEngine
+
+    The snapshot is written by a serializer (see
+    models/engine/serializers.py): JSON at __file_path by default, or the
+    binary format at the same path with the .bin extension.
+
+    In sharded mode the snapshot is split into one file per class, in the
+    directory named after __file_path without its extension (e.g.
+    file/Place.json): save() only rewrites the files of the classes with
+    changed objects, and reload() can load only some classes. A single-file
+    snapshot found by reload() is first split into that layout.
+
+    A class can also be split into a number of partitions by a hash of the
+    ids, one file each (e.g. file/Review.3-of-16.json), so that saving a
+    change only rewrites its partition. The partitions can be read by
+    several processes on reload. Files left by another number of
+    partitions are rewritten in the current layout by reload().
+
+    A snapshot file is never rewritten in place: it is written to
+    <path>.tmp, then renamed over the old one, so a crash in the middle of
+    a save leaves the previous snapshot. The durability level sets which
+    writes are also flushed to the disk (see models/engine/durability.py).
+
+    In thread-safe mode every method reading or changing the objects holds
+    __mutex, and all() returns a copy of __objects. save() only holds it
+    while it serializes the changes and copies what it writes; the files
+    are written outside of it, one save at a time, so other threads keep
+    reading and changing the objects during the write.
+
+    In shared mode several processes use the same files (see
+    models/engine/locking.py): the files are read holding a shared lock on
+    <file path>.lock and written holding an exclusive one, and every write
+    increases the generation kept in the lock file. Before writing, a
+    process that finds a generation, or a modification time of the files,
+    other than the ones it read reloads the objects and applies its
+    unsaved changes on top of them, so that it never writes over the
+    changes of another process. refresh() does the same without writing,
+    and only reads the lock file and the times when nothing changed.
+
+    In group commit mode save() only requests a write: the saves made
+    within commit_delay seconds of the first one, or until commit_size
+    objects are changed, are written together by a single write, from a
+    timer thread for the delay. flush() writes the requested saves at once,
+    and batch() defers every save made in a block to its end. The saves
+    still requested at exit are written. As the timer thread serializes the
+    changes while the application makes new ones, the methods hold __mutex
+    with a commit_delay, as in thread-safe mode.
+
+    Every change saved in journal mode is appended to a write-ahead log
+    (<file path>.log) instead of rewriting the whole JSON file. reload()
+    always replays that log on top of the JSON snapshot.
+
+    Compaction moves the log aside (<file path>.log.compacting) and folds it
+    into a new JSON snapshot in a background thread, while new saves keep
+    appending to a fresh log.
+
+    Only the objects changed since the last save are serialized again; the
+    others are written from the cache of their last serialized form.
+
+    In lazy mode reload() only keeps the dictionaries read from the file;
+    an object is built the first time it is looked up by get(), or with all
+    the objects of its class by all(), query() and the other lookups. With
+    the mapped serializer, reload() maps the snapshot instead of reading it
+    and __unloaded holds sets of keys backed by the file (see
+    models/engine/snapshot.py): an object is decoded from the file only
+    when it is built, and __serialized only holds the objects built or read
+    from the log.
+
+    With NumPy installed, the attributes listed in __columns are also kept
+    in a column store (see models/engine/columnar.py), built from the
+    objects and the unbuilt dictionaries alike, that answers aggregate()
+    and the query() conditions no index covers without building objects.
 
     Attributes:
-        __file_path (str): path to the JSON file
+        __file_path (str): path to the JSON file, its extension is replaced
+        by the one of the serializer
         __objects (dict): empty but will store all objects by <class name>.id
+        __pending (set): keys of objects changed since the last save
+        __serialized (dict): last serialized form of each object by key
+        __unloaded (dict): keys of the objects not built yet in lazy mode,
+        by class name, in a MappedKeys set for a mapped snapshot
+        __by_class (dict): objects by id for every class name
+        __foreign_keys (dict): class name referenced by each foreign key
+        attribute, by class name
+        __index_kinds (dict): kind of the indexes created with
+        create_index() by attribute name, by class name
+        __indexes (dict): attribute indexes by attribute name, by class name
+        __coordinates (dict): latitude and longitude attribute names, by
+        class name
+        __grids (dict): spatial index by class name
+        __columns (tuple): attributes kept in columns, by class name
+        __column_stores (dict): column store by class name
+        __lock (Lock): serializes appends to the log and its rotation
+        __mutex (RLock): held while the objects are read or changed, in
+        thread-safe mode or with a commit_delay
 
     Methods:
-        all(self): returns the dictionary __objects
+        all(self, cls=None): returns the dictionary __objects, or only the
+        objects of cls
+        count(self, cls=None): returns the number of objects, or only of cls
+        get(self, cls, obj_id): returns the cls object with id obj_id
+        children(self, cls, obj_id, child_cls): returns the child_cls objects
+        referencing the cls object with id obj_id
+        create_index(self, cls, attribute, kind="hash"): indexes the objects
+        of cls by attribute
+        query(self, cls, **conditions): returns the objects of cls matching
+        the conditions
+        nearby(self, cls, latitude, longitude, radius): returns the objects
+        of cls within radius kilometers of a point
+        within(self, cls, south, west, north, east): returns the objects of
+        cls inside a bounding box
+        aggregate(self, cls, func, attribute=None, by=None, **conditions):
+        aggregates an attribute over the objects of cls
         new(self, obj): sets in __objects the obj with key <obj class name>.id
-        save(self): serializes __objects to the JSON file (path: __file_path)
-        reload(self): deserializes the JSON file to __objects
+        delete(self, obj): deletes obj from __objects
+        mark_dirty(self, obj, name=None): marks a stored obj as changed
+        save(self): serializes __objects to the snapshot
+        refresh(self): reloads the objects changed by another process
+        flush(self): writes the saves deferred by group commit or batch()
+        batch(self): defers the saves made in a with block to its end
+        reload(self, *, class_names=None): deserializes the snapshot to
+        __objects
+        compact(self, wait=False): folds the log into the JSON file
+
+    Properties:
+        thread_safe (bool): True if several threads can use the storage
     """
     __file_path = "file.json"
     __objects = {}
+    __pending = set()
+    __serialized = {}
+    __unloaded = {}
+    __by_class = {}
+    __foreign_keys = FOREIGN_KEYS
+    __index_kinds = {}
+    __indexes = {}
+    __coordinates = COORDINATES
+    __grids = {}
+    __columns = {
+        "Place": ("city_id", "user_id", "name", "number_rooms",
+                  "number_bathrooms", "max_guest", "price_by_night",
+                  "latitude", "longitude"),
+    }
+    __column_stores = {}
+    __lock = threading.Lock()
+    __mutex = threading.RLock()
+
+    def __synchronized(method):
+        """
+        Decorates a method to run it holding __mutex in thread-safe mode
+        or with a commit_delay
+
+        Args:
+            method (function): method reading or changing the objects
+
+        Returns:
+            function: the decorated method
+        """
+        @wraps(method)
+        def synchronized(self, *args, **kwargs):
+            if not self.__synchronize:
+                return method(self, *args, **kwargs)
+            with self.__mutex:
+                return method(self, *args, **kwargs)
+        return synchronized
+
+    def __init__(self, *, journal=False, compact_threshold=10000,
+                 lazy=False, serializer="json", sharded=False,
+                 partitions=None, workers=1, durability="fsync",
+                 commit_delay=0, commit_size=0, thread_safe=False,
+                 shared=False):
+        """
+        Initializes a FileStorage instance
+
+        Args:
+            journal (bool): append changes to the log file on save instead
+            of rewriting the whole JSON file
+            compact_threshold (int): number of log records that triggers a
+            background compaction, 0 to compact only on demand
+            lazy (bool): build the objects read by reload() on first access
+            serializer (str): snapshot format, a key of
+            serializers.SERIALIZERS
+            sharded (bool): write one snapshot file per class
+            partitions (dict): number of partitions by class name, for the
+            classes split into several files in sharded mode
+            workers (int): number of processes reading the snapshot files
+            in sharded mode, 1 to read them in the calling process
+            durability (str): writes flushed to the disk, a key of
+            durability.DURABILITY_LEVELS
+            commit_delay (float): seconds during which saves are grouped
+            into one write, 0 to write on every save
+            commit_size (int): number of changed objects that triggers the
+            write of grouped saves, 0 for no limit
+            thread_safe (bool): let several threads read and change the
+            objects at the same time
+            shared (bool): let several processes use the same files
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if serializer or durability is unknown, if
+            partitions are given outside of sharded mode or are not a
+            positive number, if commit_delay or commit_size is negative, or
+            if shared is set where fcntl is not available
+        """
+        if serializer not in SERIALIZERS:
+            raise ValueError("unknown serializer: {}".format(serializer))
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError("unknown durability: {}".format(durability))
+        partitions = dict(partitions or {})
+        if partitions and not sharded:
+            raise ValueError("only a sharded snapshot has partitions")
+        for class_name, count in partitions.items():
+            if not isinstance(count, int) or count < 1:
+                raise ValueError("invalid number of partitions for {}: {}"
+                                 .format(class_name, count))
+        if commit_delay < 0 or commit_size < 0:
+            raise ValueError("invalid group commit: {}s, {} objects"
+                             .format(commit_delay, commit_size))
+        if shared and locking.fcntl is None:
+            raise ValueError("shared files need fcntl, only on Unix")
+        self.__serializer_name = serializer
+        self.__serializer = SERIALIZERS[serializer]()
+        self.__journal = journal
+        self.__lazy = lazy
+        self.__sharded = sharded
+        self.__partitions = partitions
+        self.__workers = workers
+        self.__durability = durability
+        self.__compact_threshold = compact_threshold
+        self.__journal_records = 0
+        self.__journal_checked = False
+        self.__compactor = None
+        self.__commit_delay = commit_delay
+        self.__commit_size = commit_size
+        self.__commit_lock = threading.RLock()
+        self.__commit_timer = None
+        self.__batches = 0
+        self.__deferred = False
+        self.__thread_safe = thread_safe
+        # A timer thread writes the grouped saves with a commit_delay
+        self.__synchronize = thread_safe or bool(commit_delay)
+        self.__shared = shared
+        self.__signature = None
+        if commit_delay or commit_size:
+            atexit.register(self.flush)
+
+    @property
+    def thread_safe(self):
+        """
+        Tells if several threads can read and change the objects at the
+        same time
+
+        Returns:
+            bool: True in thread-safe mode
+        """
+        return self.__thread_safe
+
+    @__synchronized
+    def all(self, cls=None):
+        """
+        Returns the dictionary __objects, or a new dictionary holding only
+        the objects of cls read from the per-class index
+
+        In thread-safe mode a copy of __objects is returned, which other
+        threads cannot change while it is iterated.
+
+        Args:
+            cls (type or str): class or class name to filter on
+
+        Returns:
+            dict: objects by <class name>.id
+        """
+        if cls is None:
+            for class_name in list(self.__unloaded):
+                self.__hydrate_class(class_name)
+            if self.__thread_safe:
+                return dict(self.__objects)
+            return self.__objects
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        self.__hydrate_class(class_name)
+        return {"{}.{}".format(class_name, obj_id): obj for obj_id, obj
+                in self.__by_class.get(class_name, {}).items()}
+
+    @__synchronized
+    def count(self, cls=None):
+        """
+        Returns the number of objects stored, or only of the class cls
+
+        Args:
+            cls (type or str): class or class name to count
+
+        Returns:
+            int: number of objects
+        """
+        if cls is None:
+            return len(self.__objects) + sum(
+                len(keys) for keys in self.__unloaded.values())
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        return (len(self.__by_class.get(class_name, ())) +
+                len(self.__unloaded.get(class_name, ())))
+
+    @__synchronized
+    def get(self, cls, obj_id):
+        """
+        Returns the cls object with id obj_id, building only this object in
+        lazy mode
+
+        Args:
+            cls (type or str): class or class name of the object
+            obj_id (str): id of the object
+
+        Returns:
+            BaseModel: the object, None if there is none
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(class_name, obj_id)
+        keys = self.__unloaded.get(class_name)
+        if keys is not None and key in keys:
+            value = self.__serialized.get(key)
+            if value is None:
+                # Only the objects of a mapped snapshot are not read yet
+                value = self.__serialized[key] = keys.value(key)
+            keys.remove(key)
+            if not keys:
+                del self.__unloaded[class_name]
+            self.__put(key, self.__build(value))
+        return self.__objects.get(key)
+
+    @__synchronized
+    def children(self, cls, obj_id, child_cls):
+        """
+        Returns the child_cls objects whose foreign key references the cls
+        object with id obj_id, read from the foreign key index
+
+        Args:
+            cls (type or str): class or class name of the referenced object
+            obj_id (str): id of the referenced object
+            child_cls (type or str): class or class name of the children
+
+        Returns:
+            list: child_cls objects
+
+        Raises:
+            ValueError: if child_cls has no foreign key to cls
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        child_name = (child_cls if isinstance(child_cls, str)
+                      else child_cls.__name__)
+        foreign_keys = self.__foreign_keys.get(child_name, {})
+        for attribute, referenced in foreign_keys.items():
+            if referenced == class_name:
+                self.__hydrate_class(child_name)
+                index = self.__class_indexes(child_name)[attribute]
+                return list(index.get(obj_id).values())
+        raise ValueError("{} has no foreign key to {}".format(
+            child_name, class_name))
 
-    def all(self):
+    @__synchronized
+    def create_index(self, cls, attribute, kind="hash"):
         """
-        Returns the dictionary __objects
+        Indexes the objects of cls by attribute for query()
+
+        A "hash" index answers equality and "in" conditions, a "sorted"
+        index also answers range conditions. The index replaces any index
+        already kept on the attribute.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            attribute (str): name of the attribute to index
+            kind (str): kind of index, a key of indexes.INDEX_KINDS
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if kind is unknown
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError("unknown index kind: {}".format(kind))
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        self.__index_kinds.setdefault(class_name, {})[attribute] = kind
+        indexes = self.__indexes.get(class_name)
+        if indexes is not None:
+            indexes[attribute] = self.__build_index(class_name, attribute)
+
+    @__synchronized
+    def query(self, cls, **conditions):
+        """
+        Returns the objects of cls matching all the conditions
+
+        The conditions are keyword arguments <attribute>__<operator>=<value>
+        (see models/engine/query.py). The candidates are read from the
+        index expected to return the fewest objects. When no condition is
+        on an indexed attribute, the column store of cls evaluates them if
+        it can, and only the matching objects are built in lazy mode;
+        otherwise all the objects of cls are tested.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            **conditions: conditions the objects must satisfy
+
+        Returns:
+            list: matching objects
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        predicates = query.parse(conditions)
+        indexed = set(self.__foreign_keys.get(class_name, ()))
+        indexed.update(self.__index_kinds.get(class_name, ()))
+        if predicates and not indexed.intersection(
+                attribute for attribute, _, _ in predicates):
+            store = self.__class_columns(class_name)
+            mask = store.mask(predicates) if store is not None else None
+            if mask is not None:
+                return [self.get(class_name, obj_id)
+                        for obj_id in store.ids(mask)]
+        self.__hydrate_class(class_name)
+        candidates = query.plan(self.__class_indexes(class_name), predicates,
+                                self.__by_class.get(class_name, {}))
+        return [obj for obj in candidates if query.matches(obj, predicates)]
+
+    @__synchronized
+    def nearby(self, cls, latitude, longitude, radius):
+        """
+        Returns the objects of cls within radius kilometers of a point,
+        read from the spatial index
+
+        Args:
+            cls (type or str): class or class name of the objects
+            latitude (float): latitude of the point in degrees
+            longitude (float): longitude of the point in degrees
+            radius (float): search radius in kilometers
+
+        Returns:
+            list: objects sorted by distance, nearest first
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        grid = self.__grid_of(cls)
+        return [obj for _, obj in grid.near(latitude, longitude, radius)]
+
+    @__synchronized
+    def within(self, cls, south, west, north, east):
+        """
+        Returns the objects of cls inside a bounding box, read from the
+        spatial index
+
+        Args:
+            cls (type or str): class or class name of the objects
+            south (float): minimum latitude
+            west (float): minimum longitude, greater than east for a box
+            crossing the antimeridian
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Returns:
+            list: objects inside the box
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        return self.__grid_of(cls).within(south, west, north, east)
+
+    @__synchronized
+    def aggregate(self, cls, func, attribute=None, by=None, **conditions):
+        """
+        Aggregates an attribute over the objects of cls matching the
+        conditions, optionally by value of another attribute, e.g. the
+        average price per city:
+
+            storage.aggregate(Place, "mean", "price_by_night", by="city_id")
+
+        The column store of cls computes it vectorized when it holds the
+        attributes; otherwise the matching objects are iterated by
+        StorageEngine.aggregate(). Values that are not numbers are ignored.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            func (str): "count", "sum", "mean", "min" or "max"
+            attribute (str): aggregated attribute, None to count objects
+            by (str): grouping attribute, None for a single result
+            **conditions: conditions the objects must satisfy, as for
+            query()
 
         Returns:
-            dict: __objects
+            the result, or a dictionary of the results by value of by in
+            ascending order; the mean, min and max of no number are None
+
+        Raises:
+            ValueError: if func is unknown, attribute is None for another
+            function than "count", or a value of by cannot be a dictionary
+            key
         """
-        return self.__objects
+        if func not in columnar.FUNCTIONS:
+            raise ValueError("unknown aggregate function: {}".format(func))
+        if attribute is None and func != "count":
+            raise ValueError("{} needs an attribute".format(func))
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        store = self.__class_columns(class_name)
+        if store is not None and store.can_aggregate(attribute, by):
+            mask = store.mask(query.parse(conditions))
+            if mask is not None:
+                return store.aggregate(func, attribute, by, mask)
+        return super().aggregate(class_name, func, attribute, by,
+                                 **conditions)
 
+    @__synchronized
     def new(self, obj):
         """
         Sets in __objects the obj with key <obj class name>.id
 
+        Calling it again on an object already stored marks it as changed.
+
         Args:
             obj (BaseModel): object to be set in __objects
 
@@ -50,32 +554,1359 @@ class FileStorage:
         """
         if obj:
             key = "{}.{}".format(obj.__class__.__name__, obj.id)
-            self.__objects[key] = obj
+            keys = self.__unloaded.get(obj.__class__.__name__)
+            if keys:
+                keys.discard(key)
+            self.__put(key, obj)
+            self.__pending.add(key)
+
+    @__synchronized
+    def delete(self, obj=None):
+        """
+        Deletes obj from __objects if it is inside
+
+        Args:
+            obj (BaseModel): object to be deleted
+
+        Returns:
+            None
+        """
+        if obj:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            if self.__remove(key) is not None:
+                self.__pending.add(key)
+
+    def mark_dirty(self, obj, name=None):
+        """
+        Marks obj as changed if it is the object stored under its key
+
+        Called by BaseModel on every attribute assignment. Changes made in
+        place to a mutable attribute (e.g. list.append) are not seen; call
+        new(obj) again after such a change.
+
+        An object that is not stored, such as one being initialized, is
+        recognized by the per-class index before __mutex is held or its key
+        is formatted.
+
+        Args:
+            obj (BaseModel): object whose attribute was assigned
+            name (str): name of the assigned attribute, None if unknown
+
+        Returns:
+            None
+        """
+        class_name = obj.__class__.__name__
+        objects = self.__by_class.get(class_name)
+        if objects is None:
+            return
+        obj_id = getattr(obj, "id", None)
+        if type(obj_id) is not str:
+            obj_id = str(obj_id)
+        if objects.get(obj_id) is not obj:
+            return
+        key = class_name + "." + obj_id
+        if self.__synchronize:
+            with self.__mutex:
+                # Unless removed by another thread since it was found
+                if self.__objects.get(key) is obj:
+                    self.__pending.add(key)
+                    self.__reindex(class_name, obj, name)
+            return
+        self.__pending.add(key)
+        if (class_name in self.__indexes or class_name in self.__grids or
+                class_name in self.__column_stores):
+            self.__reindex(class_name, obj, name)
 
     def save(self):
         """
-        Serializes __objects to the JSON file (path: __file_path)
+        Serializes __objects to the snapshot (JSON file by default)
+
+        In journal mode only the objects changed since the last save are
+        appended to the log file. In sharded mode only the files of the
+        classes with changed objects are written.
+
+        In group commit mode, and inside batch(), the write is deferred and
+        grouped with the next saves.
+
+        Returns:
+            None
+        """
+        with self.__commit_lock:
+            if self.__batches or self.__commit_delay or self.__commit_size:
+                self.__deferred = True
+                if self.__batches:
+                    return
+                if (self.__commit_size and
+                        len(self.__pending) >= self.__commit_size):
+                    self.flush()
+                elif self.__commit_delay and self.__commit_timer is None:
+                    self.__commit_timer = threading.Timer(
+                        self.__commit_delay, self.flush)
+                    self.__commit_timer.daemon = True
+                    self.__commit_timer.start()
+                return
+            self.__write()
+
+    def flush(self):
+        """
+        Writes the saves deferred by group commit or batch() at once
+
+        Returns:
+            None
+        """
+        with self.__commit_lock:
+            if self.__commit_timer is not None:
+                self.__commit_timer.cancel()
+                self.__commit_timer = None
+            if self.__deferred:
+                self.__write()
+                self.__deferred = False
+
+    @contextmanager
+    def batch(self):
+        """
+        Defers every save made in a with block to a single write at its end
+
+        Batches can be nested, the outermost one writes. The saves made
+        before an exception raised in the block are written too.
+
+        Yields:
+            FileStorage: the storage
+        """
+        with self.__commit_lock:
+            self.__batches += 1
+        try:
+            yield self
+        finally:
+            with self.__commit_lock:
+                self.__batches -= 1
+                if not self.__batches:
+                    self.flush()
+
+    def reload(self, *, class_names=None, workers=None):
+        """
+        Deserializes the snapshot to __objects, then replays the log file
+
+        A JSON snapshot is parsed one object at a time, each object being
+        built as soon as it is read, so the text of the file is never held
+        in memory; the dictionary of every object is kept in __serialized
+        for the next save, as when the whole file is decoded at once. In
+        lazy mode the objects are not built, and a mapped snapshot is
+        mapped without being read.
+
+        The saves deferred by group commit are written first, and a
+        running compaction is waited for.
+
+        Args:
+            class_names (iterable): in sharded mode, names of the classes to
+            load, all of them by default; the others are left as they are
+            workers (int): number of processes reading the snapshot files,
+            the workers of the storage by default
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if class_names is given outside of sharded mode
+        """
+        if class_names is not None and not self.__sharded:
+            raise ValueError("only a sharded snapshot loads single classes")
+        with self.__commit_lock:
+            self.flush()
+            # A compaction swaps the snapshot and removes the log it folded
+            # while running; holding __lock keeps another one from starting
+            with self.__lock:
+                self.__wait_compaction()
+                with self.__file_lock(exclusive=False):
+                    self.__reload(class_names, workers)
+
+    def refresh(self):
+        """
+        Reloads the objects if another process wrote the files since they
+        were read, keeping the changes not saved yet, in shared mode
+
+        Only the generation and the modification times of the files are
+        read when nothing changed.
+
+        Returns:
+            bool: True if the objects were reloaded
+        """
+        if not self.__shared or self.__files_signature() == self.__signature:
+            return False
+        with self.__commit_lock, self.__file_lock(exclusive=False):
+            with self.__mutex:
+                return self.__merge()
+
+    def compact(self, wait=False):
+        """
+        Folds the log into a new JSON snapshot in a background thread
+
+        Only the rotation of the log happens in the calling thread; saves
+        made while the snapshot is written go to a fresh log.
+
+        Args:
+            wait (bool): block until the compaction is done
+
+        Returns:
+            None
+        """
+        with self.__lock, self.__file_lock(exclusive=True):
+            if self.__compactor is None or not self.__compactor.is_alive():
+                compacting = self.__compacting_path()
+                if not os.path.exists(compacting):
+                    if not os.path.exists(self.__journal_path()):
+                        return
+                    os.replace(self.__journal_path(), compacting)
+                    self.__journal_records = 0
+                self.__compactor = threading.Thread(
+                    target=self.__fold_journal, name="FileStorage-compactor")
+                self.__compactor.start()
+        if wait:
+            self.__wait_compaction()
+
+    def __write(self):
+        """
+        Writes the changes to the log file or the snapshot
+
+        Returns:
+            None
+        """
+        if self.__journal:
+            self.__append_journal()
+            return
+        self.__wait_compaction()
+        with self.__file_lock(exclusive=True) as lock:
+            with self.__mutex:
+                self.__merge()
+                files = self.__snapshot_files()
+            self.__write_files(files)
+            for path in (self.__journal_path(), self.__compacting_path()):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.__next_generation(lock)
+
+    def __snapshot_files(self):
+        """
+        Serializes the changes and returns the snapshot files to write
+
+        Returns:
+            list: (path, objects by key) pairs, objects being None for a
+            file to remove
+        """
+        changed = {self.__shard_name(key) for key in self.__pending}
+        self.__serialize_pending()
+        serialized = self.__serialized
+        if serialized.keys() != self.__objects.keys():
+            # Objects set or deleted directly in the dictionary from all()
+            for key in serialized.keys() - self.__objects.keys():
+                if key in self.__unloaded.get(key.partition(".")[0], ()):
+                    continue
+                del serialized[key]
+                self.__unindex(key)
+                changed.add(self.__shard_name(key))
+            for key in self.__objects.keys() - serialized.keys():
+                serialized[key] = self.__objects[key].to_dict()
+                self.__index(key, self.__objects[key])
+                changed.add(self.__shard_name(key))
+        if self.__sharded:
+            by_class = {}
+            for shard_name in changed:
+                by_class.setdefault(shard_name.partition(".")[0],
+                                    []).append(shard_name)
+            files = []
+            for class_name, shard_names in by_class.items():
+                files.extend(self.__shard_files(class_name, shard_names))
+            return files
+        mapped = [keys for keys in self.__unloaded.values()
+                  if isinstance(keys, MappedKeys)]
+        if mapped or self.__synchronize:
+            # A copy, written while other threads change __serialized; the
+            # objects not built are decoded from the mapped snapshot,
+            # without keeping them in __serialized
+            serialized = dict(serialized)
+            for keys in mapped:
+                serialized.update(self.__read_unloaded(keys))
+        return [(self.__snapshot_path(), serialized)]
+
+    def __write_files(self, files):
+        """
+        Writes snapshot files, removing those without objects
+
+        Args:
+            files (list): (path, objects by key) pairs, objects being None
+            for a file to remove
+
+        Returns:
+            None
+        """
+        if self.__sharded and files:
+            os.makedirs(self.__shard_directory(), exist_ok=True)
+        for path, objects in files:
+            if objects is not None:
+                self.__dump(objects, path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    @__synchronized
+    def __reload(self, class_names, workers=None):
+        """
+        Reads the snapshot, then replays the log file
+
+        Args:
+            class_names (iterable): in sharded mode, names of the classes to
+            load, None for all of them
+            workers (int): number of processes reading the snapshot files,
+            None for the workers of the storage
+
+        Returns:
+            None
+        """
+        shards = {}
+        if self.__sharded:
+            if (not os.path.isdir(self.__shard_directory()) and
+                    os.path.exists(self.__snapshot_path())):
+                self.__migrate()
+            if class_names is not None:
+                class_names = set(class_names)
+            for shard_name in self.__shard_names():
+                class_name = shard_name.partition(".")[0]
+                if class_names is None or class_name in class_names:
+                    shards.setdefault(class_name, []).append(shard_name)
+            self.__read_shards(shards, workers or self.__workers)
+        else:
+            self.__read_snapshot(self.__snapshot_path())
+        self.__replay_journal(self.__compacting_path(), class_names)
+        self.__journal_records = self.__replay_journal(self.__journal_path(),
+                                                       class_names)
+        self.__pending.clear()
+        for class_name, shard_names in shards.items():
+            layout = self.__class_shards(class_name)
+            if not set(shard_names).issubset(layout):
+                # Files of another layout: the class is written again in
+                # the current one and the old files are removed
+                self.__save_shards(class_name, layout)
+                for shard_name in set(shard_names).difference(layout):
+                    os.remove(self.__shard_path(shard_name))
+        if self.__shared:
+            self.__signature = self.__files_signature()
+
+    def __build(self, value):
+        """
+        Builds an object from its serialized form, looking its class up in
+        the model registry
+
+        Args:
+            value (dict): dictionary returned by to_dict()
+
+        Returns:
+            BaseModel: the object
+        """
+        return classes[value["__class__"]](**value)
+
+    def __load(self, key, value):
+        """
+        Stores an object read from the JSON file or the log, replacing the
+        object stored under key; in lazy mode only value is kept
+
+        Args:
+            key (str): <class name>.id of the object
+            value (dict): serialized form of the object
+
+        Returns:
+            None
+        """
+        self.__serialized[key] = value
+        if self.__lazy:
+            self.__remove(key)
+            class_name, _, obj_id = key.partition(".")
+            self.__unloaded.setdefault(class_name, set()).add(key)
+            store = self.__column_stores.get(class_name)
+            if store is not None:
+                store.add_values(obj_id, value)
+        else:
+            self.__put(key, self.__build(value))
+
+    def __map_snapshot(self, mapped):
+        """
+        Replaces the objects stored under the keys of mapped snapshots by
+        the objects of the snapshots, none of them being read
+
+        Args:
+            mapped (dict): MappedKeys of the snapshots by class name
 
         Returns:
             None
         """
-        objects_dict = {key: obj.to_dict() for key,
-                        obj in self.__objects.items()}
-        with open(self.__file_path, 'w') as file:
-            json.dump(objects_dict, file)
+        for key in self.__serialized.keys() | self.__objects.keys():
+            keys = mapped.get(key.partition(".")[0])
+            if keys is not None and key in keys:
+                self.__serialized.pop(key, None)
+                self.__remove(key)
+        for class_name, keys in mapped.items():
+            for key in self.__unloaded.get(class_name, ()):
+                keys.add(key)
+            self.__unloaded[class_name] = keys
+            # Rebuilt from the snapshot when next used
+            self.__column_stores.pop(class_name, None)
+
+    def __read_unloaded(self, keys):
+        """
+        Yields the serialized form of the objects of a class not built yet
 
-    def reload(self):
+        Args:
+            keys (set or MappedKeys): keys of the objects, from __unloaded
+
+        Yields:
+            tuple: key and dictionary of every object
+        """
+        if isinstance(keys, MappedKeys):
+            for key, value in keys.items():
+                yield key, self.__serialized.get(key, value)
+        else:
+            for key in keys:
+                yield key, self.__serialized[key]
+
+    def __read_snapshot(self, path):
         """
-        Deserializes the JSON file to __objects
+        Loads the objects of a snapshot file, mapping it in lazy mode if
+        the serializer can
+
+        Args:
+            path (str): path of the snapshot
 
         Returns:
             None
         """
         try:
-            with open(self.__file_path, 'r') as file:
-                objects_dict = json.load(file)
-                for key, value in objects_dict.items():
-                    class_name = value["__class__"]
-                    self.__objects[key] = eval(class_name + "(**value)")
+            if self.__lazy and isinstance(self.__serializer,
+                                          MappedSerializer):
+                snapshot = self.__serializer.open(path)
+                self.__map_snapshot({
+                    class_name: MappedKeys([snapshot], class_name)
+                    for class_name in snapshot.classes()})
+            else:
+                for key, value in self.__serializer.load(path):
+                    self.__load(key, value)
         except FileNotFoundError:
             pass
+
+    def __read_shards(self, shards, workers):
+        """
+        Loads the objects of the snapshot files of some classes
+
+        In lazy mode, mapped files are mapped. Otherwise, with more than
+        one worker, the files are parsed by forked processes, and the
+        objects are built in the calling process.
+
+        The workers inherit what they run from the fork and only send back
+        the records read, as plain values: pickling anything defined in
+        models would wait for the import of models, which reloads the
+        storage. Without fork, the files are read by the calling process.
+
+        Args:
+            shards (dict): names of the snapshot files by class name
+            workers (int): number of processes reading the files
+
+        Returns:
+            None
+        """
+        if self.__lazy and isinstance(self.__serializer, MappedSerializer):
+            for class_name, shard_names in shards.items():
+                self.__map_shards(class_name, shard_names)
+            return
+        paths = [self.__shard_path(shard_name)
+                 for shard_names in shards.values()
+                 for shard_name in shard_names]
+        if (workers <= 1 or len(paths) <= 1 or
+                "fork" not in multiprocessing.get_all_start_methods()):
+            for path in paths:
+                self.__read_snapshot(path)
+            return
+        context = multiprocessing.get_context("fork")
+        readers = []
+        try:
+            for n in range(min(workers, len(paths))):
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_read_files, daemon=True,
+                    args=(self.__serializer_name, paths[n::workers], sender))
+                process.start()
+                sender.close()
+                readers.append((process, receiver, paths[n::workers]))
+            for process, receiver, worker_paths in readers:
+                for _ in worker_paths:
+                    records, error = receiver.recv()
+                    if error is not None:
+                        raise error
+                    for key, value in records:
+                        self.__load(key, value)
+        finally:
+            for process, receiver, _ in readers:
+                receiver.close()
+                process.join()
+
+    def __map_shards(self, class_name, shard_names):
+        """
+        Maps the snapshot files of a class
+
+        Args:
+            class_name (str): name of the class
+            shard_names (list): names of the files of the class
+
+        Returns:
+            None
+        """
+        layout = self.__class_shards(class_name)
+        partition = None
+        if len(layout) > 1 and set(shard_names).issubset(layout):
+            # Every id is searched in the file of its partition only
+            count = self.__partitions[class_name]
+            partition = partial(self.__partition, count=count)
+            shard_names = layout
+        snapshots = []
+        for shard_name in shard_names:
+            try:
+                snapshots.append(self.__serializer.open(
+                    self.__shard_path(shard_name)))
+            except FileNotFoundError:
+                snapshots.append(None)
+        self.__map_snapshot({class_name: MappedKeys(snapshots, class_name,
+                                                    partition)})
+
+    def __save_shards(self, class_name, shard_names):
+        """
+        Writes some snapshot files of a class in sharded mode, removing
+        those left without objects
+
+        Args:
+            class_name (str): name of the class
+            shard_names (list): names of the files to write
+
+        Returns:
+            None
+        """
+        self.__write_files(self.__shard_files(class_name, shard_names))
+
+    def __shard_files(self, class_name, shard_names):
+        """
+        Returns some snapshot files of a class in sharded mode
+
+        Args:
+            class_name (str): name of the class
+            shard_names (list): names of the files
+
+        Returns:
+            list: (path, objects by key) pairs, objects being None for a
+            file left without objects
+        """
+        unloaded = self.__unloaded.get(class_name, ())
+        objects = self.__by_class.get(class_name, {})
+        count = self.__partitions.get(class_name)
+        if count is None:
+            snapshots = {class_name: {
+                "{}.{}".format(class_name, obj_id):
+                self.__serialized["{}.{}".format(class_name, obj_id)]
+                for obj_id in objects}}
+            snapshots[class_name].update(self.__read_unloaded(unloaded))
+        else:
+            # Every id is hashed, but only the objects of the files written
+            # are read
+            snapshots = {shard_name: {} for shard_name in shard_names}
+            layout = self.__class_shards(class_name)
+            written = {layout.index(shard_name): snapshots[shard_name]
+                       for shard_name in shard_names}
+            for obj_id in objects:
+                shard = written.get(self.__partition(obj_id, count))
+                if shard is not None:
+                    key = "{}.{}".format(class_name, obj_id)
+                    shard[key] = self.__serialized[key]
+            for key in unloaded:
+                shard = written.get(self.__partition(key.partition(".")[2],
+                                                     count))
+                if shard is not None:
+                    value = self.__serialized.get(key)
+                    shard[key] = (value if value is not None
+                                  else unloaded.value(key))
+        return [(self.__shard_path(shard_name), snapshots[shard_name] or None)
+                for shard_name in shard_names]
+
+    def __unload(self, key):
+        """
+        Forgets an object deleted in the log, built or not
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            None
+        """
+        self.__remove(key)
+        self.__serialized.pop(key, None)
+        class_name, _, obj_id = key.partition(".")
+        keys = self.__unloaded.get(class_name)
+        if keys is not None:
+            keys.discard(key)
+        store = self.__column_stores.get(class_name)
+        if store is not None:
+            store.remove(obj_id)
+
+    def __hydrate_class(self, class_name):
+        """
+        Builds all the objects of a class not built yet in lazy mode
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            None
+        """
+        keys = self.__unloaded.pop(class_name, ())
+        for key, value in self.__read_unloaded(keys):
+            self.__serialized[key] = value
+            self.__put(key, self.__build(value))
+
+    def __reindex(self, class_name, obj, name):
+        """
+        Updates the indexes, the spatial index and the column store of the
+        class of a stored object after an assignment
+
+        Args:
+            class_name (str): name of the class of obj
+            obj (BaseModel): object whose attribute was assigned
+            name (str): name of the assigned attribute, None if unknown
+
+        Returns:
+            None
+        """
+        indexes = self.__indexes.get(class_name)
+        if indexes:
+            if name is None:
+                for index in indexes.values():
+                    index.add(obj)
+            elif name in indexes:
+                indexes[name].add(obj)
+        if name is None or name in self.__coordinates.get(class_name, ()):
+            grid = self.__grids.get(class_name)
+            if grid is not None:
+                grid.add(obj)
+        if name is None or name in self.__columns.get(class_name, ()):
+            store = self.__column_stores.get(class_name)
+            if store is not None:
+                store.add(obj)
+
+    def __put(self, key, obj):
+        """
+        Sets obj in __objects and in the per-class index
+
+        Args:
+            key (str): <class name>.id of obj
+            obj (BaseModel): object to store
+
+        Returns:
+            None
+        """
+        self.__objects[key] = obj
+        self.__index(key, obj)
+
+    def __remove(self, key):
+        """
+        Removes the object stored under key from __objects and the index
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            BaseModel: the removed object, None if there was none
+        """
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            self.__unindex(key)
+        return obj
+
+    def __index(self, key, obj):
+        """
+        Adds obj to the per-class index and to the attribute and spatial
+        indexes and the column store already built for its class; the
+        others are built from the per-class index when first used
+
+        Args:
+            key (str): <class name>.id of obj
+            obj (BaseModel): object to index
+
+        Returns:
+            None
+        """
+        class_name, _, obj_id = key.partition(".")
+        self.__by_class.setdefault(class_name, {})[obj_id] = obj
+        indexes = self.__indexes.get(class_name)
+        if indexes:
+            for index in indexes.values():
+                index.add(obj)
+        grid = self.__grids.get(class_name)
+        if grid is not None:
+            grid.add(obj)
+        store = self.__column_stores.get(class_name)
+        if store is not None:
+            store.add(obj)
+
+    def __unindex(self, key):
+        """
+        Removes the object stored under key from the per-class index
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            None
+        """
+        class_name, _, obj_id = key.partition(".")
+        objects = self.__by_class.get(class_name)
+        if objects is not None:
+            objects.pop(obj_id, None)
+            if not objects:
+                del self.__by_class[class_name]
+        for index in self.__indexes.get(class_name, {}).values():
+            index.remove(obj_id)
+        grid = self.__grids.get(class_name)
+        if grid is not None:
+            grid.remove(obj_id)
+        store = self.__column_stores.get(class_name)
+        if store is not None:
+            store.remove(obj_id)
+
+    def __class_indexes(self, class_name):
+        """
+        Returns the attribute indexes of a class, building the foreign key
+        indexes and the indexes created with create_index() from the
+        objects already stored the first time
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            dict: indexes by attribute name
+        """
+        indexes = self.__indexes.get(class_name)
+        if indexes is None:
+            attributes = dict.fromkeys(self.__foreign_keys.get(class_name, {}))
+            attributes.update(self.__index_kinds.get(class_name, {}))
+            indexes = {attribute: self.__build_index(class_name, attribute)
+                       for attribute in attributes}
+            self.__indexes[class_name] = indexes
+        return indexes
+
+    def __grid_of(self, cls):
+        """
+        Returns the spatial index of cls for nearby() and within()
+
+        Args:
+            cls (type or str): class or class name
+
+        Returns:
+            GridIndex: the spatial index
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        self.__hydrate_class(class_name)
+        grid = self.__class_grid(class_name)
+        if grid is None:
+            raise ValueError("{} has no coordinates".format(class_name))
+        return grid
+
+    def __class_grid(self, class_name):
+        """
+        Returns the spatial index of a class, building it from the objects
+        already stored the first time
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            GridIndex: the spatial index, None if the class has no
+            coordinates
+        """
+        grid = self.__grids.get(class_name)
+        if grid is None:
+            if class_name not in self.__coordinates:
+                return None
+            grid = GridIndex(*self.__coordinates[class_name])
+            for obj in self.__by_class.get(class_name, {}).values():
+                grid.add(obj)
+            self.__grids[class_name] = grid
+        return grid
+
+    def __class_columns(self, class_name):
+        """
+        Returns the column store of a class, building it the first time from
+        the objects already stored and, in lazy mode, from the dictionaries
+        of the objects not built yet
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            ColumnStore: the column store, None if the class has no columns
+            or NumPy is not installed
+        """
+        store = self.__column_stores.get(class_name)
+        if store is None:
+            if columnar.numpy is None or class_name not in self.__columns:
+                return None
+            cls = classes[class_name]
+            defaults = {attribute: getattr(cls, attribute)
+                        for attribute in self.__columns[class_name]}
+            store = columnar.ColumnStore(defaults)
+            objects = self.__by_class.get(class_name, {})
+            store.extend(list(objects), {
+                attribute: [getattr(obj, attribute, columnar.MISSING)
+                            for obj in objects.values()]
+                for attribute in defaults})
+            keys, values = [], []
+            for key, value in self.__read_unloaded(
+                    self.__unloaded.get(class_name, ())):
+                keys.append(key)
+                values.append(value)
+            store.extend([key.partition(".")[2] for key in keys], {
+                attribute: [value.get(attribute, default)
+                            for value in values]
+                for attribute, default in defaults.items()})
+            self.__column_stores[class_name] = store
+        return store
+
+    def __build_index(self, class_name, attribute):
+        """
+        Builds an index of the objects of a class by attribute
+
+        Args:
+            class_name (str): name of the class
+            attribute (str): name of the attribute to index
+
+        Returns:
+            HashIndex or SortedIndex: the index, a HashIndex unless another
+            kind was given to create_index()
+        """
+        kind = self.__index_kinds.get(class_name, {}).get(attribute, "hash")
+        index = INDEX_KINDS[kind](attribute)
+        for obj in self.__by_class.get(class_name, {}).values():
+            index.add(obj)
+        return index
+
+    def __dump(self, objects, path):
+        """
+        Writes a snapshot file to <path>.tmp, then renames it over path
+        with the durability of the storage
+
+        Args:
+            objects (dict): serialized objects by key
+            path (str): path of the snapshot
+
+        Returns:
+            None
+        """
+        tmp_path = path + ".tmp"
+        try:
+            self.__serializer.dump(objects, tmp_path)
+            replace_file(tmp_path, path, self.__durability)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __snapshot_path(self):
+        """
+        Returns the path of the snapshot written by the serializer
+
+        Returns:
+            str: __file_path with the extension of the serializer
+        """
+        return (os.path.splitext(self.__file_path)[0] +
+                self.__serializer.extension)
+
+    def __shard_directory(self):
+        """
+        Returns the directory of the snapshot files in sharded mode
+
+        Returns:
+            str: __file_path without its extension
+        """
+        return os.path.splitext(self.__file_path)[0]
+
+    def __shard_path(self, shard_name):
+        """
+        Returns the path of a snapshot file in sharded mode
+
+        Args:
+            shard_name (str): name of the file, from __shard_name()
+
+        Returns:
+            str: <shard directory>/<shard name> with the extension of the
+            serializer
+        """
+        return os.path.join(self.__shard_directory(),
+                            shard_name + self.__serializer.extension)
+
+    def __shard_name(self, key):
+        """
+        Returns the name of the snapshot file holding an object in sharded
+        mode
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            str: the class name, or <class name>.<partition>-of-<number of
+            partitions> for a partitioned class
+        """
+        class_name, _, obj_id = key.partition(".")
+        count = self.__partitions.get(class_name)
+        if count is None:
+            return class_name
+        return "{}.{}-of-{}".format(class_name,
+                                    self.__partition(obj_id, count), count)
+
+    def __class_shards(self, class_name):
+        """
+        Returns the names of the snapshot files of a class in sharded mode
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            list: names of the files, one per partition
+        """
+        count = self.__partitions.get(class_name)
+        if count is None:
+            return [class_name]
+        return ["{}.{}-of-{}".format(class_name, partition, count)
+                for partition in range(count)]
+
+    @staticmethod
+    def __partition(obj_id, count):
+        """
+        Returns the partition of an id, the same in every process
+
+        Args:
+            obj_id (str): id of an object
+            count (int): number of partitions
+
+        Returns:
+            int: partition, from 0 to count - 1
+        """
+        return zlib.crc32(obj_id.encode()) % count
+
+    def __shard_names(self):
+        """
+        Returns the names of the snapshot files in sharded mode
+
+        Returns:
+            list: names of the files without extension, sorted
+        """
+        try:
+            names = os.listdir(self.__shard_directory())
+        except FileNotFoundError:
+            return []
+        extension = self.__serializer.extension
+        return sorted(name[:-len(extension)] for name in names
+                      if name.endswith(extension))
+
+    def __migrate(self):
+        """
+        Splits the single-file snapshot into one file per class
+
+        The files are written to a temporary directory renamed to the shard
+        directory, so an interrupted migration leaves the single file in
+        use; the single file is removed last.
+
+        Returns:
+            None
+        """
+        groups = {}
+        for key, value in self.__serializer.load(self.__snapshot_path()):
+            groups.setdefault(self.__shard_name(key), {})[key] = value
+        directory = self.__shard_directory()
+        tmp_directory = directory + ".tmp"
+        os.makedirs(tmp_directory, exist_ok=True)
+        for shard_name, objects in groups.items():
+            path = os.path.join(tmp_directory,
+                                shard_name + self.__serializer.extension)
+            self.__serializer.dump(objects, path)
+            if self.__durability != "atomic":
+                sync_file(path)
+        if self.__durability == "full":
+            sync_directory(tmp_directory)
+        os.rename(tmp_directory, directory)
+        if self.__durability == "full":
+            sync_directory(os.path.dirname(directory))
+        os.remove(self.__snapshot_path())
+
+    def __journal_path(self):
+        """
+        Returns the path of the log file
+
+        Returns:
+            str: <file path>.log
+        """
+        return self.__file_path + ".log"
+
+    def __compacting_path(self):
+        """
+        Returns the path of the log being folded by a compaction
+
+        Returns:
+            str: <file path>.log.compacting
+        """
+        return self.__journal_path() + ".compacting"
+
+    def __lock_path(self):
+        """
+        Returns the path of the lock file of shared mode
+
+        Returns:
+            str: <file path>.lock
+        """
+        return self.__file_path + ".lock"
+
+    def __file_lock(self, exclusive):
+        """
+        Returns a context manager holding the lock file in shared mode
+
+        Args:
+            exclusive (bool): lock to write the files instead of reading
+            them
+
+        Returns:
+            context manager: yields the file descriptor of the lock file,
+            None outside of shared mode
+        """
+        if not self.__shared:
+            return nullcontext()
+        return locking.locked(self.__lock_path(), exclusive)
+
+    def __files_signature(self):
+        """
+        Returns what tells whether the files were written: the generation
+        of the lock file, and the modification time, size and inode of the
+        snapshot (or the directory of the files in sharded mode) and logs
+
+        Returns:
+            tuple: generation, then (time, size, inode) or None by file
+        """
+        signature = [locking.read_generation(self.__lock_path())]
+        snapshot = (self.__shard_directory() if self.__sharded
+                    else self.__snapshot_path())
+        for path in (snapshot, self.__journal_path(),
+                     self.__compacting_path()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size,
+                                  stat.st_ino))
+        return tuple(signature)
+
+    def __next_generation(self, lock):
+        """
+        Increases the generation after a write in shared mode, and records
+        the signature of the files written
+
+        Args:
+            lock (int): file descriptor of the lock file held exclusively,
+            None outside of shared mode
+
+        Returns:
+            None
+        """
+        if self.__shared:
+            locking.next_generation(lock)
+            self.__signature = self.__files_signature()
+
+    def __merge(self):
+        """
+        Reloads the objects if another process wrote the files since they
+        were read, then applies the changes not saved yet on top of them
+
+        The objects already built keep their identity: they are updated in
+        place with the values read, as the application may hold them.
+
+        Must be called holding the lock file and __mutex.
+
+        Returns:
+            bool: True if the objects were reloaded
+        """
+        if not self.__shared or self.__files_signature() == self.__signature:
+            return False
+        changes = {key: self.__objects.get(key) for key in self.__pending}
+        previous = dict(self.__objects)
+        for state in (self.__objects, self.__serialized, self.__unloaded,
+                      self.__by_class, self.__indexes, self.__grids,
+                      self.__column_stores):
+            state.clear()
+        self.__reload(None)
+        for key, obj in changes.items():
+            self.__unload(key)
+            if obj is not None:
+                self.__put(key, obj)
+        self.__pending.update(changes)
+        # The objects the application holds stay the stored ones, with the
+        # values read, so their next assignments are saved
+        for key, obj in previous.items():
+            if key in changes:
+                continue
+            class_name, _, obj_id = key.partition(".")
+            current = self.get(class_name, obj_id)
+            if current is not None and type(current) is type(obj):
+                copy_attributes(current, obj)
+                self.__remove(key)
+                self.__put(key, obj)
+        return True
+
+    def __wait_compaction(self):
+        """
+        Waits for a running compaction to finish
+
+        Returns:
+            None
+        """
+        compactor = self.__compactor
+        if compactor is not None:
+            compactor.join()
+
+    def __fold_journal(self):
+        """
+        Applies the rotated log to the snapshot and swaps it in
+
+        Works on the raw dictionaries read from disk, so it never touches
+        the objects that other threads are using. In sharded mode only the
+        files holding objects of the log are rewritten. In shared mode the
+        files are locked during the whole compaction, and a log already
+        folded by another process is left alone.
+
+        Returns:
+            None
+        """
+        with self.__file_lock(exclusive=True):
+            if not os.path.exists(self.__compacting_path()):
+                return
+            records = self.__read_journal(self.__compacting_path())
+            if self.__sharded:
+                changes = {}
+                for key, value in records:
+                    changes.setdefault(self.__shard_name(key), []).append(
+                        (key, value))
+                os.makedirs(self.__shard_directory(), exist_ok=True)
+                for shard_name, shard_changes in changes.items():
+                    self.__fold_records(self.__shard_path(shard_name),
+                                        shard_changes)
+            else:
+                self.__fold_records(self.__snapshot_path(), records)
+            os.remove(self.__compacting_path())
+
+    def __fold_records(self, path, records):
+        """
+        Applies log records to a snapshot file
+
+        Args:
+            path (str): path of the snapshot
+            records (iterable): (key, value) records, value being None for
+            a deletion
+
+        Returns:
+            None
+        """
+        try:
+            objects_dict = dict(self.__serializer.load(path))
+        except FileNotFoundError:
+            objects_dict = {}
+        for key, value in records:
+            if value is None:
+                objects_dict.pop(key, None)
+            else:
+                objects_dict[key] = value
+        if self.__sharded and not objects_dict:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        self.__dump(objects_dict, path)
+
+    def __serialize_pending(self):
+        """
+        Serializes the changed objects and updates the cache with them
+
+        Returns:
+            list: (key, dict) pairs of the changed objects, the dict is None
+            for a deleted object
+        """
+        changes = []
+        for key in self.__pending:
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__serialized.pop(key, None)
+                changes.append((key, None))
+            else:
+                value = obj.to_dict()
+                self.__serialized[key] = value
+                changes.append((key, value))
+        self.__pending.clear()
+        return changes
+
+    def __append_journal(self):
+        """
+        Appends one record per changed object to the log file
+
+        A record is a JSON line {"key": <key>, "value": <dict>}; the value
+        is null when the object was deleted. Unless the durability level is
+        "atomic", the log is flushed to the disk before returning.
+
+        Returns:
+            None
+        """
+        with self.__lock, self.__file_lock(exclusive=True) as lock:
+            with self.__mutex:
+                self.__merge()
+                if not self.__pending:
+                    return
+                changes = self.__serialize_pending()
+            lines = [json.dumps({"key": key, "value": value}) + "\n"
+                     for key, value in changes]
+            if self.__shared or not self.__journal_checked:
+                # Another process may have crashed while appending
+                self.__repair_journal(self.__journal_path())
+                self.__journal_checked = True
+            created = not os.path.exists(self.__journal_path())
+            with open(self.__journal_path(), 'a') as file:
+                file.write("".join(lines))
+                if self.__durability != "atomic":
+                    file.flush()
+                    os.fsync(file.fileno())
+            if created and self.__durability == "full":
+                sync_directory(os.path.dirname(self.__journal_path()))
+            self.__next_generation(lock)
+            self.__journal_records += len(lines)
+            records = self.__journal_records
+        if self.__compact_threshold and records >= self.__compact_threshold:
+            self.compact()
+
+    @staticmethod
+    def __repair_journal(path):
+        """
+        Ends the log with a complete record, so that the next append does
+        not continue the truncated line a crash in the middle of an append
+        left: the truncated line is removed, a complete record missing its
+        newline gets one
+
+        Args:
+            path (str): path of the log file
+
+        Returns:
+            None
+        """
+        try:
+            file = open(path, 'rb+')
+        except FileNotFoundError:
+            return
+        with file:
+            end = file.seek(0, os.SEEK_END)
+            start = end
+            tail = b""
+            while start > 0:
+                size = min(start, 1 << 16)
+                start -= size
+                file.seek(start)
+                tail = file.read(size) + tail
+                newline = tail.rfind(b"\n")
+                if newline >= 0:
+                    start += newline + 1
+                    tail = tail[newline + 1:]
+                    break
+            if not tail:
+                return
+            try:
+                json.loads(tail)
+            except ValueError:
+                file.truncate(start)
+            else:
+                file.seek(end)
+                file.write(b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def __read_journal(self, path):
+        """
+        Yields the (key, value) records of a log file in order
+
+        A truncated last line, left by a crash in the middle of an append,
+        is ignored; the next append removes it.
+
+        Args:
+            path (str): path of the log file
+
+        Yields:
+            tuple: key and dict of the object, None for a deletion
+        """
+        try:
+            with open(path, 'r') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    yield record["key"], record["value"]
+        except FileNotFoundError:
+            pass
+
+    def __replay_journal(self, path, class_names=None):
+        """
+        Applies the records of a log file to __objects in order
+
+        Args:
+            path (str): path of the log file
+            class_names (set): names of the classes whose records are
+            applied, all of them by default
+
+        Returns:
+            int: number of records read
+        """
+        count = 0
+        for key, value in self.__read_journal(path):
+            count += 1
+            if (class_names is not None and
+                    key.partition(".")[0] not in class_names):
+                continue
+            if value is None:
+                self.__unload(key)
+            else:
+                self.__load(key, value)
+        return count
+
+
+def _read_files(serializer_name, paths, connection):
+    """
+    Sends the objects of snapshot files, in a worker process of
+    FileStorage.reload()
+
+    For each file, a (records, error) pair is sent: records is a list of
+    (key, value) pairs, empty if the file does not exist, and error is the
+    exception raised while reading the file, if any.
+
+    Args:
+        serializer_name (str): name of the serializer of the files, a key
+        of serializers.SERIALIZERS
+        paths (list): paths of the files
+        connection (Connection): end of the pipe to the calling process
+
+    Returns:
+        None
+    """
+    serializer = SERIALIZERS[serializer_name]()
+    for path in paths:
+        try:
+            connection.send((list(serializer.load(path)), None))
+        except FileNotFoundError:
+            connection.send(([], None))
+        except Exception as error:
+            connection.send((None, error))
+            break
+    connection.close()
@@ -0,0 +1,363 @@
+#!/usr/bin/python3
+
+"""This module defines the in-memory indexes kept by FileStorage
+
+Every index kind implements add(obj), remove(obj_id), get(value) and, for
+the query planner, estimate(operator, value) and lookup(operator, value)
+where operator is one of "eq", "lt", "le", "gt", "ge" and "in". estimate()
+returns None for the operators the index cannot answer.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class HashIndex:
+    """
+    Index of the objects of one class by the value of one attribute
+
+    A list attribute (e.g. Place.amenity_ids) indexes the object under every
+    element of the list. Unhashable values are not indexed.
+
+    Attributes:
+        attribute (str): name of the indexed attribute
+        __objects (dict): {id: obj} dictionaries by attribute value
+        __values (dict): values each object is indexed under, by id
+
+    Methods:
+        add(self, obj): indexes obj under its current attribute value
+        remove(self, obj_id): removes the object with id obj_id
+        get(self, value): returns the objects having value
+        estimate(self, operator, value): returns the number of objects
+        lookup() would return
+        lookup(self, operator, value): returns the objects matching
+    """
+
+    def __init__(self, attribute):
+        """
+        Initializes a HashIndex instance
+
+        Args:
+            attribute (str): name of the indexed attribute
+
+        Returns:
+            None
+        """
+        self.attribute = attribute
+        self.__objects = {}
+        self.__values = {}
+
+    def add(self, obj):
+        """
+        Indexes obj under its current attribute value, replacing the value
+        it was indexed under before
+
+        Args:
+            obj (BaseModel): object to index
+
+        Returns:
+            None
+        """
+        self.remove(obj.id)
+        value = getattr(obj, self.attribute, None)
+        values = value if isinstance(value, list) else (value,)
+        indexed = []
+        for value in values:
+            if value in indexed:
+                continue
+            try:
+                self.__objects.setdefault(value, {})[obj.id] = obj
+            except TypeError:
+                continue
+            indexed.append(value)
+        self.__values[obj.id] = indexed
+
+    def remove(self, obj_id):
+        """
+        Removes the object with id obj_id from the index
+
+        Args:
+            obj_id (str): id of the object
+
+        Returns:
+            None
+        """
+        for value in self.__values.pop(obj_id, ()):
+            objects = self.__objects[value]
+            del objects[obj_id]
+            if not objects:
+                del self.__objects[value]
+
+    def get(self, value):
+        """
+        Returns the objects indexed under value
+
+        Args:
+            value: attribute value to look up
+
+        Returns:
+            dict: objects by id, must not be modified
+        """
+        try:
+            return self.__objects.get(value, {})
+        except TypeError:
+            return {}
+
+    def estimate(self, operator, value):
+        """
+        Returns the number of objects lookup() would return
+
+        Args:
+            operator (str): "eq" or "in", other operators are not supported
+            value: operand of the operator
+
+        Returns:
+            int: number of objects, None if operator is not supported
+        """
+        if operator == "eq":
+            return len(self.get(value))
+        if operator == "in":
+            return sum(len(self.get(item)) for item in value)
+        return None
+
+    def lookup(self, operator, value):
+        """
+        Returns the objects matching an "eq" or "in" condition
+
+        Args:
+            operator (str): "eq" or "in"
+            value: operand of the operator
+
+        Returns:
+            dict: objects by id
+        """
+        if operator == "eq":
+            return self.get(value)
+        objects = {}
+        for item in value:
+            objects.update(self.get(item))
+        return objects
+
+
+class SortedIndex:
+    """
+    Index of the objects of one class sorted by the value of one attribute
+
+    Answers equality, "in" and range conditions with bisect. A list
+    attribute indexes the object under every element of the list. None and
+    missing values are not indexed. While an object holds a value that
+    cannot be compared with the values already indexed, estimate() returns
+    None so that the queries test every object instead.
+
+    Attributes:
+        attribute (str): name of the indexed attribute
+        __keys (list): indexed values in ascending order
+        __ids (list): id of the object indexed under each value of __keys
+        __objects (dict): indexed objects by id
+        __values (dict): values each object is indexed under, by id
+        __rejected (set): ids of the objects holding a value that could not
+        be indexed
+
+    Methods:
+        add(self, obj): indexes obj under its current attribute value
+        remove(self, obj_id): removes the object with id obj_id
+        get(self, value): returns the objects having value
+        range(self, low, high, low_inclusive, high_inclusive): returns the
+        objects with a value between low and high
+        estimate(self, operator, value): returns the number of objects
+        lookup() would return
+        lookup(self, operator, value): returns the objects matching
+    """
+
+    def __init__(self, attribute):
+        """
+        Initializes a SortedIndex instance
+
+        Args:
+            attribute (str): name of the indexed attribute
+
+        Returns:
+            None
+        """
+        self.attribute = attribute
+        self.__keys = []
+        self.__ids = []
+        self.__objects = {}
+        self.__values = {}
+        self.__rejected = set()
+
+    def add(self, obj):
+        """
+        Indexes obj under its current attribute value, replacing the value
+        it was indexed under before
+
+        Args:
+            obj (BaseModel): object to index
+
+        Returns:
+            None
+        """
+        self.remove(obj.id)
+        value = getattr(obj, self.attribute, None)
+        values = value if isinstance(value, list) else (value,)
+        indexed = []
+        for value in values:
+            if value is None or value in indexed:
+                continue
+            try:
+                position = bisect_right(self.__keys, value)
+            except TypeError:
+                self.__rejected.add(obj.id)
+                continue
+            self.__keys.insert(position, value)
+            self.__ids.insert(position, obj.id)
+            indexed.append(value)
+        self.__objects[obj.id] = obj
+        self.__values[obj.id] = indexed
+
+    def remove(self, obj_id):
+        """
+        Removes the object with id obj_id from the index
+
+        Args:
+            obj_id (str): id of the object
+
+        Returns:
+            None
+        """
+        for value in self.__values.pop(obj_id, ()):
+            start = bisect_left(self.__keys, value)
+            position = self.__ids.index(obj_id, start)
+            del self.__keys[position]
+            del self.__ids[position]
+        self.__objects.pop(obj_id, None)
+        self.__rejected.discard(obj_id)
+
+    def get(self, value):
+        """
+        Returns the objects indexed under value
+
+        Args:
+            value: attribute value to look up
+
+        Returns:
+            dict: objects by id
+        """
+        return self.range(value, value, True, True)
+
+    def range(self, low=None, high=None, low_inclusive=True,
+              high_inclusive=True):
+        """
+        Returns the objects indexed under a value between low and high
+
+        Args:
+            low: lower bound, None for no lower bound
+            high: upper bound, None for no upper bound
+            low_inclusive (bool): include the objects equal to low
+            high_inclusive (bool): include the objects equal to high
+
+        Returns:
+            dict: objects by id
+        """
+        start, end = self.__bounds(low, high, low_inclusive, high_inclusive)
+        objects = self.__objects
+        return {obj_id: objects[obj_id] for obj_id in self.__ids[start:end]}
+
+    def estimate(self, operator, value):
+        """
+        Returns the number of objects lookup() would return, counted with
+        bisect without building the result
+
+        Args:
+            operator (str): "eq", "lt", "le", "gt", "ge" or "in"
+            value: operand of the operator
+
+        Returns:
+            int: number of objects, None if an object could not be indexed
+            or the operand is None, lookup() missing objects then
+        """
+        if self.__rejected:
+            return None
+        if operator == "in":
+            if None in value:
+                return None
+            return sum(self.estimate("eq", item) for item in value)
+        if value is None:
+            return None
+        start, end = self.__bounds(*self.__range_of(operator, value))
+        return max(end - start, 0)
+
+    def lookup(self, operator, value):
+        """
+        Returns the objects matching a condition
+
+        Args:
+            operator (str): "eq", "lt", "le", "gt", "ge" or "in"
+            value: operand of the operator
+
+        Returns:
+            dict: objects by id
+        """
+        if operator == "in":
+            objects = {}
+            for item in value:
+                objects.update(self.get(item))
+            return objects
+        return self.range(*self.__range_of(operator, value))
+
+    @staticmethod
+    def __range_of(operator, value):
+        """
+        Returns the range() arguments equivalent to a condition
+
+        Args:
+            operator (str): "eq", "lt", "le", "gt" or "ge"
+            value: operand of the operator
+
+        Returns:
+            tuple: low, high, low_inclusive, high_inclusive
+        """
+        return {
+            "eq": (value, value, True, True),
+            "lt": (None, value, True, False),
+            "le": (None, value, True, True),
+            "gt": (value, None, False, True),
+            "ge": (value, None, True, True),
+        }[operator]
+
+    def __bounds(self, low, high, low_inclusive, high_inclusive):
+        """
+        Returns the positions in __keys of a range of values
+
+        Args:
+            low: lower bound, None for no lower bound
+            high: upper bound, None for no upper bound
+            low_inclusive (bool): include the values equal to low
+            high_inclusive (bool): include the values equal to high
+
+        Returns:
+            tuple: start and end positions, end excluded
+        """
+        keys = self.__keys
+        try:
+            if low is None:
+                start = 0
+            elif low_inclusive:
+                start = bisect_left(keys, low)
+            else:
+                start = bisect_right(keys, low)
+            if high is None:
+                end = len(keys)
+            elif high_inclusive:
+                end = bisect_right(keys, high)
+            else:
+                end = bisect_left(keys, high)
+        except TypeError:
+            return 0, 0
+        return start, end
+
+
+# Index kinds accepted by FileStorage.create_index()
+INDEX_KINDS = {
+    "hash": HashIndex,
+    "sorted": SortedIndex,
+}
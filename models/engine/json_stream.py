@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+
+"""This module reads the top-level JSON object of a file one item at a time"""
+
+import json
+import re
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# A key without escape sequences, with the colon that follows it
+SIMPLE_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+# Characters a number may continue with in the next chunk
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+DECODER = json.JSONDecoder()
+
+
+def iter_object(file, chunk_size=1 << 16):
+    """
+    Yields the key/value pairs of the JSON object stored in file, reading
+    the file by chunks so only one value is held in memory at a time
+
+    As with json.load(), the keys of the objects that are values are
+    shared: a key is stored once however many values hold it, while the
+    decoder alone would store it again for every value.
+
+    Args:
+        file (file): text file holding a JSON object
+        chunk_size (int): number of characters read at a time
+
+    Yields:
+        tuple: key and decoded value of every item, in file order
+
+    Raises:
+        json.JSONDecodeError: if the file does not hold a JSON object
+    """
+    reader = _Reader(file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    keys = {}
+    while True:
+        key = reader.key()
+        value = reader.decode()
+        if type(value) is dict:
+            value = {keys.setdefault(name, name): item
+                     for name, item in value.items()}
+        yield key, value
+        if reader.separator() == "}":
+            return
+
+
+class _Reader:
+    """
+    Buffer over a text file decoding one JSON value at a time
+
+    Attributes:
+        file (file): file being read
+        chunk_size (int): number of characters read at a time
+        buffer (str): characters read and not consumed yet
+        position (int): position of the next character in buffer
+        eof (bool): True once the whole file was read
+    """
+
+    def __init__(self, file, chunk_size):
+        """
+        Initializes a _Reader instance
+
+        Args:
+            file (file): file to read
+            chunk_size (int): number of characters read at a time
+
+        Returns:
+            None
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Reads the next chunk, dropping the consumed characters
+
+        The read size doubles with the buffer so a value bigger than a
+        chunk is not decoded again for every chunk.
+
+        Returns:
+            bool: False if the end of the file was already reached
+        """
+        if self.eof:
+            return False
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer)))
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character
+
+        Returns:
+            str: next character, empty at the end of the file
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer,
+                                             self.position).end()
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, character):
+        """
+        Consumes the next character, which must be character
+
+        Args:
+            character (str): expected character
+
+        Returns:
+            None
+
+        Raises:
+            json.JSONDecodeError: if the next character is another one
+        """
+        if self.peek() != character:
+            raise self.error("Expecting '{}'".format(character))
+        self.position += 1
+
+    def key(self):
+        """
+        Decodes the next key of an object and consumes the colon after it
+
+        Returns:
+            str: the key
+
+        Raises:
+            json.JSONDecodeError: if no key is next
+        """
+        match = SIMPLE_KEY.match(self.buffer, self.position)
+        if match is not None and match.end() < len(self.buffer):
+            self.position = match.end()
+            return match.group(1)
+        key = self.decode()
+        if not isinstance(key, str):
+            raise self.error("Expecting property name")
+        self.expect(":")
+        return key
+
+    def separator(self):
+        """
+        Consumes the comma or closing brace after an item of an object
+
+        Returns:
+            str: "," or "}"
+
+        Raises:
+            json.JSONDecodeError: if neither is next
+        """
+        match = SEPARATOR.match(self.buffer, self.position)
+        if match is not None:
+            self.position = match.end()
+            return match.group(1)
+        separator = self.peek()
+        if separator not in (",", "}"):
+            raise self.error("Expecting ',' delimiter")
+        self.position += 1
+        return separator
+
+    def decode(self):
+        """
+        Decodes the next JSON value, reading more of the file while the
+        value is incomplete
+
+        A number whose characters reach the end of the buffer (e.g. 1.5
+        cut after "1.") may continue in the next chunk, so it is only
+        accepted once more of the file was read.
+
+        Returns:
+            the decoded value
+
+        Raises:
+            json.JSONDecodeError: if the value is not valid JSON
+        """
+        try:
+            value, end = DECODER.raw_decode(self.buffer, self.position)
+            if self.complete(value, end):
+                self.position = end
+                return value
+        except json.JSONDecodeError:
+            pass  # leading whitespace or value cut by the end of the buffer
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if self.complete(value, end):
+                self.position = end
+                return value
+            self.fill()
+
+    def complete(self, value, end):
+        """
+        Tells if a value decoded from the buffer cannot continue in the
+        next chunk
+
+        Args:
+            value: decoded value
+            end (int): position in buffer after the value
+
+        Returns:
+            bool: True at end of file, or if the characters after the
+            value are in the buffer
+        """
+        if self.eof:
+            return True
+        if isinstance(value, (int, float)):
+            end = NUMBER_TAIL.match(self.buffer, end).end()
+        return end < len(self.buffer)
+
+    def error(self, message):
+        """
+        Returns a decoding error at the current position
+
+        Args:
+            message (str): error message
+
+        Returns:
+            json.JSONDecodeError: the error
+        """
+        return json.JSONDecodeError(message, self.buffer, self.position)
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+"""This module defines the lock file shared by the processes of FileStorage
+
+Processes sharing a snapshot take an advisory lock on <file path>.lock with
+fcntl.flock(): shared to read the files, exclusive to write them. The lock
+file also holds the generation of the files, a counter increased by every
+write, so a process tells whether another one wrote since it read the files
+by comparing a number.
+
+fcntl is only available on Unix: elsewhere fcntl is None and FileStorage
+cannot share its files.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def locked(path, exclusive):
+    """
+    Holds an advisory lock on a lock file, created if needed
+
+    The file is opened for every lock, as two locks taken through the same
+    open file would not exclude each other.
+
+    Args:
+        path (str): path of the lock file
+        exclusive (bool): take an exclusive lock instead of a shared one
+
+    Yields:
+        int: file descriptor of the lock file
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield fd
+    finally:
+        # Closing the file releases the lock
+        os.close(fd)
+
+
+def read_generation(path):
+    """
+    Returns the generation written in a lock file
+
+    Args:
+        path (str): path of the lock file
+
+    Returns:
+        int: the generation, 0 if the file does not exist
+    """
+    try:
+        with open(path, 'rb') as file:
+            return int(file.read() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def next_generation(fd):
+    """
+    Increases the generation of a lock file held exclusively
+
+    Args:
+        fd (int): file descriptor yielded by locked()
+
+    Returns:
+        int: the new generation
+    """
+    generation = int(os.pread(fd, 32, 0) or 0) + 1
+    os.pwrite(fd, b"%d\n" % generation, 0)
+    return generation
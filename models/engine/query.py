@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+"""This module defines the conditions accepted by FileStorage.query()
+
+A condition is a keyword argument <attribute>__<operator>=<value>, the
+operator being one of eq (the default), lt, le, gt, ge and in:
+
+    storage.query(Place, price_by_night__lt=100, max_guest__ge=4)
+
+When the attribute of an object holds a list, the condition matches if it
+holds for one of the elements of the list.
+"""
+
+import operator
+
+OPERATORS = {
+    "eq": operator.eq,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda value, values: value in values,
+}
+
+
+def parse(conditions):
+    """
+    Returns the (attribute, operator, value) predicates of the conditions
+
+    Args:
+        conditions (dict): values by <attribute>__<operator>
+
+    Returns:
+        list: (attribute, operator, value) tuples
+
+    Raises:
+        ValueError: if an operator is unknown
+    """
+    predicates = []
+    for name, value in conditions.items():
+        attribute, _, op = name.rpartition("__")
+        if not attribute or op not in OPERATORS:
+            attribute, op = name, "eq"
+        if op == "in":
+            value = list(value)
+        predicates.append((attribute, op, value))
+    return predicates
+
+
+def matches(obj, predicates):
+    """
+    Tells if obj satisfies all the predicates
+
+    An object missing the attribute, or whose value cannot be compared
+    with the operand, does not satisfy the predicate.
+
+    Args:
+        obj (BaseModel): object to test
+        predicates (list): (attribute, operator, value) tuples
+
+    Returns:
+        bool: True if all the predicates hold
+    """
+    missing = object()
+    for attribute, op, operand in predicates:
+        value = getattr(obj, attribute, missing)
+        if value is missing:
+            return False
+        values = value if isinstance(value, list) else (value,)
+        test = OPERATORS[op]
+        try:
+            if not any(test(item, operand) for item in values):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def plan(indexes, predicates, objects):
+    """
+    Returns the objects to test against the predicates, read from the
+    index expected to return the fewest objects, or all the objects when
+    no index can answer any predicate
+
+    Args:
+        indexes (dict): indexes of the class by attribute name
+        predicates (list): (attribute, operator, value) tuples
+        objects (dict): all the objects of the class by id
+
+    Returns:
+        iterable: candidate objects
+    """
+    best, best_size = None, len(objects)
+    for attribute, op, value in predicates:
+        index = indexes.get(attribute)
+        if index is None:
+            continue
+        size = index.estimate(op, value)
+        if size is not None and size <= best_size:
+            best, best_size = (index, op, value), size
+    if best is None:
+        return objects.values()
+    index, op, value = best
+    return index.lookup(op, value).values()
@@ -0,0 +1,389 @@
+#!/usr/bin/python3
+
+"""This module defines the snapshot formats FileStorage can write
+
+Every serializer implements dump(objects, path), writing the serialized
+objects by key to path, and load(path), yielding the (key, value) pairs of
+a snapshot in file order. The values are the dictionaries returned by
+to_dict(), except that the binary format reads the timestamps back as
+datetime objects, which BaseModel accepts as they are.
+
+The mapped format is also indexed by key, so that FileStorage can map it
+with mmap in lazy mode and decode the objects one at a time.
+
+The formats can be converted into each other:
+
+    python3 -m models.engine.serializers file.json file.bin
+"""
+
+import json
+import os
+import pickle
+import sys
+from itertools import islice
+from datetime import datetime, timedelta
+from models.engine.json_stream import iter_object
+from models.engine.snapshot import MappedSnapshot, write_snapshot
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+# Attributes stored as integers by the binary format
+TIMESTAMPS = ("created_at", "updated_at")
+# Objects encoded at once by the JSON format
+CHUNK_SIZE = 1000
+# Types the binary format writes as they are
+PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def format_timestamp(value):
+    """
+    Returns the ISO 8601 text of a datetime, for json.dump()
+
+    Args:
+        value: object json cannot serialize
+
+    Returns:
+        str: ISO 8601 timestamp
+
+    Raises:
+        TypeError: if value is not a datetime
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError("{} is not JSON serializable".format(
+        type(value).__name__))
+
+
+def plain_value(value):
+    """
+    Returns an attribute value as the JSON format reads it back, for the
+    binary format whose loader refuses any class: a datetime becomes its
+    ISO 8601 text, a tuple a list
+
+    Args:
+        value: attribute value
+
+    Returns:
+        the value made of plain types only
+
+    Raises:
+        TypeError: if the JSON format cannot write value either
+    """
+    if type(value) is list and all(type(item) in PLAIN_TYPES
+                                   for item in value):
+        return value
+    return json.loads(json.dumps(value, default=format_timestamp))
+
+
+class JSONSerializer:
+    """
+    Snapshot as one JSON object of the serialized objects by key, the
+    format of file.json
+
+    Attributes:
+        extension (str): extension of the snapshot file
+
+    Methods:
+        dump(self, objects, path): writes the objects to path
+        load(self, path): yields the objects stored in path
+    """
+    extension = ".json"
+
+    def dump(self, objects, path):
+        """
+        Writes the serialized objects to path
+
+        Args:
+            objects (dict): serialized objects by key
+            path (str): path of the snapshot
+
+        Returns:
+            None
+        """
+        # One write of the whole document is faster than json.dump(),
+        # which writes every chunk of the encoder on its own. The objects
+        # are encoded CHUNK_SIZE at a time, as the encoder holds the GIL:
+        # a save made in another thread lets the other threads run between
+        # two chunks
+        items = iter(objects.items())
+        chunks = []
+        while True:
+            chunk = dict(islice(items, CHUNK_SIZE))
+            if not chunk:
+                break
+            chunks.append(json.dumps(chunk, default=format_timestamp)[1:-1])
+        with open(path, 'w') as file:
+            file.write("{" + ", ".join(chunks) + "}")
+
+    def load(self, path):
+        """
+        Yields the serialized objects stored in path, parsing the file one
+        object at a time
+
+        Args:
+            path (str): path of the snapshot
+
+        Yields:
+            tuple: key and dictionary of every object, in file order
+
+        Raises:
+            FileNotFoundError: if path does not exist
+        """
+        with open(path, 'r') as file:
+            yield from iter_object(file)
+
+
+class BinarySerializer:
+    """
+    Snapshot as a pickle (protocol 5) of the objects grouped by class and
+    attribute names
+
+    Each group stores its class name and attribute names once, then one
+    tuple of values per object; created_at and updated_at are stored as
+    microseconds since 1970-01-01. The file starts with MAGIC. It is read
+    with an unpickler that refuses any class or function, so only plain
+    values can be loaded: the other values are written as the JSON format
+    writes them, e.g. a datetime as text.
+
+    Attributes:
+        extension (str): extension of the snapshot file
+        MAGIC (bytes): first bytes of the file
+
+    Methods:
+        dump(self, objects, path): writes the objects to path
+        load(self, path): yields the objects stored in path
+    """
+    extension = ".bin"
+    MAGIC = b"HBNB\x01"
+
+    def dump(self, objects, path):
+        """
+        Writes the serialized objects to path
+
+        Args:
+            objects (dict): serialized objects by key
+            path (str): path of the snapshot
+
+        Returns:
+            None
+
+        Raises:
+            TypeError: if a value cannot be written, as in the JSON format
+        """
+        groups = {}
+        for value in objects.values():
+            fields = tuple(value)
+            rows = groups.get(fields)
+            if rows is None:
+                rows = groups[fields] = []
+            rows.append(list(value.values()))
+        sections = []
+        for fields, rows in groups.items():
+            for position, name in enumerate(fields):
+                if name in TIMESTAMPS:
+                    for row in rows:
+                        row[position] = self.__encode(row[position])
+                    continue
+                for row in rows:
+                    if type(row[position]) not in PLAIN_TYPES:
+                        row[position] = plain_value(row[position])
+            sections.append((fields, [tuple(row) for row in rows]))
+        with open(path, 'wb') as file:
+            file.write(self.MAGIC)
+            pickle.dump(sections, file, protocol=5)
+
+    def load(self, path):
+        """
+        Yields the serialized objects stored in path
+
+        Args:
+            path (str): path of the snapshot
+
+        Yields:
+            tuple: key and dictionary of every object
+
+        Raises:
+            FileNotFoundError: if path does not exist
+            ValueError: if path is not a binary snapshot
+        """
+        with open(path, 'rb') as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError("{} is not a binary snapshot".format(path))
+            sections = _Unpickler(file).load()
+        for fields, rows in sections:
+            timestamps = [(position, name) for position, name
+                          in enumerate(fields) if name in TIMESTAMPS]
+            for row in rows:
+                value = dict(zip(fields, row))
+                # An object never updated has equal timestamps, decoded once
+                microseconds, timestamp = None, None
+                for position, name in timestamps:
+                    if row[position] != microseconds:
+                        microseconds = row[position]
+                        timestamp = EPOCH + timedelta(
+                            microseconds=microseconds)
+                    value[name] = timestamp
+                yield "{}.{}".format(value["__class__"], value["id"]), value
+
+    @staticmethod
+    def __encode(timestamp):
+        """
+        Returns a timestamp as microseconds since 1970-01-01
+
+        Args:
+            timestamp (str or datetime): ISO 8601 text or datetime
+
+        Returns:
+            int: microseconds
+        """
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.fromisoformat(timestamp)
+        return (timestamp - EPOCH) // MICROSECOND
+
+
+class MappedSerializer:
+    """
+    Snapshot indexed by key, to be read through mmap (see
+    models/engine/snapshot.py)
+
+    Every object is stored as its own JSON record, and the records of each
+    class are indexed by id. In lazy mode, FileStorage maps the file
+    instead of reading it: startup only reads the header, and an object is
+    decoded when it is built, so processes reading the same snapshot share
+    its pages in the page cache instead of holding private copies.
+
+    The file is written next to path and renamed over it, so that the
+    processes mapping the previous snapshot keep reading it unchanged.
+
+    Attributes:
+        extension (str): extension of the snapshot file
+
+    Methods:
+        dump(self, objects, path): writes the objects to path
+        load(self, path): yields the objects stored in path
+        open(self, path): maps the snapshot stored in path
+    """
+    extension = ".snap"
+
+    def dump(self, objects, path):
+        """
+        Writes the serialized objects to path
+
+        Args:
+            objects (dict): serialized objects by key
+            path (str): path of the snapshot
+
+        Returns:
+            None
+        """
+        tmp_path = path + ".tmp"
+        write_snapshot(((key, json.dumps(value, default=format_timestamp)
+                         .encode()) for key, value in objects.items()),
+                       tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Yields the serialized objects stored in path
+
+        Args:
+            path (str): path of the snapshot
+
+        Yields:
+            tuple: key and dictionary of every object, class by class
+
+        Raises:
+            FileNotFoundError: if path does not exist
+            ValueError: if path is not a mapped snapshot
+        """
+        snapshot = MappedSnapshot(path)
+        try:
+            yield from snapshot.items()
+        finally:
+            snapshot.close()
+
+    def open(self, path):
+        """
+        Maps the snapshot stored in path
+
+        Args:
+            path (str): path of the snapshot
+
+        Returns:
+            MappedSnapshot: the snapshot
+
+        Raises:
+            FileNotFoundError: if path does not exist
+            ValueError: if path is not a mapped snapshot
+        """
+        return MappedSnapshot(path)
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler loading plain values only"""
+
+    def find_class(self, module, name):
+        """
+        Refuses to load any class or function
+
+        Args:
+            module (str): module name
+            name (str): global name
+
+        Raises:
+            pickle.UnpicklingError: always
+        """
+        raise pickle.UnpicklingError(
+            "global '{}.{}' is forbidden".format(module, name))
+
+
+# Snapshot formats accepted by FileStorage, by name
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "binary": BinarySerializer,
+    "mapped": MappedSerializer,
+}
+
+
+def serializer_for(path):
+    """
+    Returns the serializer of a snapshot file, chosen by its extension
+
+    Args:
+        path (str): path of the snapshot
+
+    Returns:
+        JSONSerializer, BinarySerializer or MappedSerializer: the
+        serializer
+
+    Raises:
+        ValueError: if the extension is not one of a serializer
+    """
+    for serializer in SERIALIZERS.values():
+        if path.endswith(serializer.extension):
+            return serializer()
+    raise ValueError("unknown snapshot format: {}".format(path))
+
+
+def convert(source, destination):
+    """
+    Converts a snapshot into the format of another, both formats being
+    chosen by file extension
+
+    Args:
+        source (str): path of the snapshot to read
+        destination (str): path of the snapshot to write
+
+    Returns:
+        int: number of objects converted
+    """
+    objects = dict(serializer_for(source).load(source))
+    serializer_for(destination).dump(objects, destination)
+    return len(objects)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python3 -m models.engine.serializers "
+                 "<source> <destination>")
+    print("{} objects converted".format(convert(sys.argv[1], sys.argv[2])))
@@ -0,0 +1,373 @@
+#!/usr/bin/python3
+
+"""This module defines the mapped snapshot, read through mmap
+
+A mapped snapshot is laid out so that an object can be found and decoded
+without reading the rest of the file:
+
+    MAGIC, then the offset of the header
+    the id, then the to_dict() JSON record, of every object
+    for every class, a table of (id offset, record offset) pairs sorted by
+    id, followed by the offset where the last record ends
+    the header: JSON object of [number of objects, table offset] by class
+    name
+
+The offsets are unsigned 64-bit little-endian integers. Opening a snapshot
+only reads its header; an object is found by a binary search in the table
+of its class and only its record is decoded. The pages read stay in the
+page cache, shared by every process mapping the same file.
+"""
+
+import json
+import mmap
+import struct
+from collections.abc import MutableSet
+
+MAGIC = b"HBNBMAP\x01"
+OFFSET = struct.Struct("<Q")
+ENTRY = struct.Struct("<QQ")
+
+
+def write_snapshot(records, path):
+    """
+    Writes a mapped snapshot
+
+    Args:
+        records (iterable): (key, record) pairs, record being the JSON of
+        the object encoded in UTF-8
+        path (str): path of the snapshot
+
+    Returns:
+        None
+    """
+    sections = {}
+    for key, record in records:
+        class_name, _, obj_id = key.partition(".")
+        sections.setdefault(class_name, []).append((obj_id.encode(), record))
+    with open(path, 'wb') as file:
+        file.write(MAGIC + OFFSET.pack(0))
+        position = len(MAGIC) + OFFSET.size
+        tables = {}
+        for class_name, entries in sections.items():
+            entries.sort(key=lambda entry: entry[0])
+            table = []
+            for obj_id, record in entries:
+                table.append(position)
+                table.append(position + len(obj_id))
+                file.write(obj_id)
+                file.write(record)
+                position += len(obj_id) + len(record)
+            table.append(position)
+            tables[class_name] = table
+        header = {}
+        for class_name, table in tables.items():
+            header[class_name] = [len(table) // 2, position]
+            file.write(struct.pack("<{}Q".format(len(table)), *table))
+            position += OFFSET.size * len(table)
+        file.write(json.dumps(header).encode())
+        file.seek(len(MAGIC))
+        file.write(OFFSET.pack(position))
+
+
+class MappedSnapshot:
+    """
+    Read-only view of a mapped snapshot
+
+    Methods:
+        classes(self): returns the class names of the snapshot
+        count(self, class_name): returns the number of objects of a class
+        find(self, class_name, obj_id): returns the position of an object
+        ids(self, class_name): yields the ids of a class
+        value(self, class_name, position): decodes the object at a position
+        items(self): yields the key and serialized form of every object
+        close(self): unmaps the file
+    """
+
+    def __init__(self, path):
+        """
+        Maps a snapshot and reads its header
+
+        Args:
+            path (str): path of the snapshot
+
+        Returns:
+            None
+
+        Raises:
+            FileNotFoundError: if path does not exist
+            ValueError: if path is not a mapped snapshot
+        """
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a mapped snapshot".format(path))
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (header,) = OFFSET.unpack_from(self.__map, len(MAGIC))
+        self.__sections = json.loads(self.__map[header:])
+
+    def classes(self):
+        """
+        Returns the class names of the snapshot
+
+        Returns:
+            list: class names
+        """
+        return list(self.__sections)
+
+    def count(self, class_name):
+        """
+        Returns the number of objects of a class
+
+        Args:
+            class_name (str): name of the class
+
+        Returns:
+            int: number of objects
+        """
+        return self.__sections.get(class_name, (0,))[0]
+
+    def find(self, class_name, obj_id):
+        """
+        Returns the position of an object in the table of its class
+
+        Args:
+            class_name (str): name of the class
+            obj_id (str): id of the object
+
+        Returns:
+            int: position, -1 if the object is not in the snapshot
+        """
+        if class_name not in self.__sections:
+            return -1
+        count, table = self.__sections[class_name]
+        target = obj_id.encode()
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            start, end = ENTRY.unpack_from(self.__map,
+                                           table + ENTRY.size * middle)
+            current = self.__map[start:end]
+            if current < target:
+                low = middle + 1
+            elif current > target:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def ids(self, class_name):
+        """
+        Yields the ids of the objects of a class, sorted
+
+        Args:
+            class_name (str): name of the class
+
+        Yields:
+            str: id of every object
+        """
+        if class_name not in self.__sections:
+            return
+        count, table = self.__sections[class_name]
+        for offset in range(table, table + ENTRY.size * count, ENTRY.size):
+            start, end = ENTRY.unpack_from(self.__map, offset)
+            yield self.__map[start:end].decode()
+
+    def value(self, class_name, position):
+        """
+        Decodes the serialized form of the object at a position
+
+        Args:
+            class_name (str): name of the class
+            position (int): position returned by find()
+
+        Returns:
+            dict: dictionary returned by to_dict()
+        """
+        offset = self.__sections[class_name][1] + ENTRY.size * position
+        start = ENTRY.unpack_from(self.__map, offset)[1]
+        (end,) = OFFSET.unpack_from(self.__map, offset + ENTRY.size)
+        return json.loads(self.__map[start:end])
+
+    def items(self):
+        """
+        Yields the key and serialized form of every object, class by class
+
+        Yields:
+            tuple: <class name>.id and dictionary of every object
+        """
+        for class_name in self.__sections:
+            for position, obj_id in enumerate(self.ids(class_name)):
+                yield ("{}.{}".format(class_name, obj_id),
+                       self.value(class_name, position))
+
+    def close(self):
+        """
+        Unmaps the file
+
+        Returns:
+            None
+        """
+        self.__map.close()
+
+
+class MappedKeys(MutableSet):
+    """
+    Set of the <class name>.id keys of the objects of a class, backed by
+    mapped snapshots
+
+    The keys of the snapshots are searched in the files; the keys added and
+    removed since are kept in two small sets on top of them, so the keys of
+    the snapshots are never copied into memory. A class split into
+    partitions has one snapshot per partition, and the partition of an id
+    tells which snapshot to search.
+
+    Methods:
+        add(self, key): adds a key
+        discard(self, key): removes a key if present
+        value(self, key): decodes the object of a key of the snapshots
+        items(self): yields every key with its object read from the
+        snapshots
+    """
+
+    def __init__(self, snapshots, class_name, partition=None):
+        """
+        Initializes the set with the keys of a class of the snapshots
+
+        Args:
+            snapshots (list): MappedSnapshot objects, None for a partition
+            without file
+            class_name (str): name of the class
+            partition (callable): returns the index in snapshots of the
+            snapshot holding an id, None to search all of them
+
+        Returns:
+            None
+        """
+        self.__snapshots = [snapshot for snapshot in snapshots
+                            if snapshot is not None]
+        self.__routes = snapshots
+        self.__partition = partition
+        self.__class_name = class_name
+        self.__prefix = class_name + "."
+        self.__added = set()
+        self.__removed = set()
+
+    def __contains__(self, key):
+        """Returns True if key is in the set"""
+        if key in self.__added:
+            return True
+        if key in self.__removed or not isinstance(key, str):
+            return False
+        return self.__find(key)[0] is not None
+
+    def __iter__(self):
+        """Yields the keys of the snapshots, then the keys added"""
+        for key, _, _ in self.__keys():
+            yield key
+        yield from self.__added
+
+    def __len__(self):
+        """Returns the number of keys"""
+        return (sum(snapshot.count(self.__class_name)
+                    for snapshot in self.__snapshots) -
+                len(self.__removed) + len(self.__added))
+
+    def add(self, key):
+        """
+        Adds a key
+
+        Args:
+            key (str): <class name>.id of an object
+
+        Returns:
+            None
+        """
+        if key in self.__removed:
+            self.__removed.discard(key)
+        elif self.__find(key)[0] is None:
+            self.__added.add(key)
+
+    def discard(self, key):
+        """
+        Removes a key if it is in the set
+
+        Args:
+            key (str): <class name>.id of an object
+
+        Returns:
+            None
+        """
+        if key in self.__added:
+            self.__added.discard(key)
+        elif key not in self.__removed and self.__find(key)[0] is not None:
+            self.__removed.add(key)
+
+    def value(self, key):
+        """
+        Decodes the serialized form of an object of the snapshots, even if
+        its key was removed from the set
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            dict: dictionary returned by to_dict()
+
+        Raises:
+            KeyError: if the object is not in the snapshots
+        """
+        snapshot, position = self.__find(key)
+        if snapshot is None:
+            raise KeyError(key)
+        return snapshot.value(self.__class_name, position)
+
+    def items(self):
+        """
+        Yields every key with the serialized form of its object read from
+        the snapshots, in file order, then the keys added with None
+
+        Yields:
+            tuple: key and dictionary returned by to_dict(), or None
+        """
+        for key, snapshot, position in self.__keys():
+            yield key, snapshot.value(self.__class_name, position)
+        for key in self.__added:
+            yield key, None
+
+    def __keys(self):
+        """
+        Yields the keys of the snapshots still in the set
+
+        Yields:
+            tuple: key, snapshot and position of every object
+        """
+        for snapshot in self.__snapshots:
+            for position, obj_id in enumerate(
+                    snapshot.ids(self.__class_name)):
+                key = self.__prefix + obj_id
+                if key not in self.__removed:
+                    yield key, snapshot, position
+
+    def __find(self, key):
+        """
+        Returns the snapshot holding the object of a key, and its position
+
+        Args:
+            key (str): <class name>.id of the object
+
+        Returns:
+            tuple: snapshot and position, (None, -1) if the object is not
+            in the snapshots
+        """
+        if not key.startswith(self.__prefix):
+            return None, -1
+        obj_id = key[len(self.__prefix):]
+        if self.__partition is None:
+            snapshots = self.__snapshots
+        else:
+            snapshots = (self.__routes[self.__partition(obj_id)],)
+        for snapshot in snapshots:
+            if snapshot is not None:
+                position = snapshot.find(self.__class_name, obj_id)
+                if position >= 0:
+                    return snapshot, position
+        return None, -1
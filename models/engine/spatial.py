@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+
+"""This module defines the spatial index kept by FileStorage and the
+geometry functions also used by DBStorage"""
+
+from math import asin, cos, floor, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points (haversine)
+
+    Args:
+        lat1 (float): latitude of the first point in degrees
+        lon1 (float): longitude of the first point in degrees
+        lat2 (float): latitude of the second point in degrees
+        lon2 (float): longitude of the second point in degrees
+
+    Returns:
+        float: distance in kilometers
+    """
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    h = (sin((lat2 - lat1) / 2) ** 2 +
+         cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(h)))
+
+
+def bounding_box(latitude, longitude, radius):
+    """
+    Returns a bounding box holding every point within radius kilometers of
+    a point
+
+    Args:
+        latitude (float): latitude of the point in degrees
+        longitude (float): longitude of the point in degrees
+        radius (float): distance in kilometers
+
+    Returns:
+        tuple: south, west, north and east limits in degrees, west being
+        greater than east for a box crossing the antimeridian
+    """
+    lat_delta = radius / KM_PER_DEGREE
+    south, north = latitude - lat_delta, latitude + lat_delta
+    if south <= -90 or north >= 90 or radius >= EARTH_RADIUS_KM:
+        return south, -180, north, 180
+    lon_delta = lat_delta / max(
+        cos(radians(max(abs(south), abs(north)))), 1e-12)
+    if lon_delta >= 180:
+        return south, -180, north, 180
+    return (south, (longitude - lon_delta + 180) % 360 - 180,
+            north, (longitude + lon_delta + 180) % 360 - 180)
+
+
+def inside(latitude, longitude, south, west, north, east):
+    """
+    Tells if a point is inside a bounding box
+
+    Args:
+        latitude (float): latitude of the point
+        longitude (float): longitude of the point
+        south (float): minimum latitude
+        west (float): minimum longitude, greater than east for a box
+        crossing the antimeridian
+        north (float): maximum latitude
+        east (float): maximum longitude
+
+    Returns:
+        bool: True if the point is inside the box
+    """
+    return south <= latitude <= north and (
+        west <= longitude <= east if west <= east
+        else longitude >= west or longitude <= east)
+
+
+class GridIndex:
+    """
+    Index of the objects of one class by position on a latitude/longitude
+    grid
+
+    The objects are grouped by grid cell, so a query only tests the objects
+    of the cells overlapping the searched area. Objects whose coordinates
+    are not numbers are not indexed.
+
+    Attributes:
+        latitude (str): name of the latitude attribute
+        longitude (str): name of the longitude attribute
+        cell_size (float): size of a cell in degrees
+        __cells (dict): {id: (obj, latitude, longitude)} by (row, column)
+        __positions (dict): cell of each object by id
+
+    Methods:
+        add(self, obj): indexes obj at its current coordinates
+        remove(self, obj_id): removes the object with id obj_id
+        within(self, south, west, north, east): returns the objects inside a
+        bounding box
+        near(self, latitude, longitude, radius): returns the objects within
+        radius kilometers of a point, nearest first
+    """
+
+    def __init__(self, latitude="latitude", longitude="longitude",
+                 cell_size=0.1):
+        """
+        Initializes a GridIndex instance
+
+        Args:
+            latitude (str): name of the latitude attribute
+            longitude (str): name of the longitude attribute
+            cell_size (float): size of a cell in degrees
+
+        Returns:
+            None
+        """
+        self.latitude = latitude
+        self.longitude = longitude
+        self.cell_size = cell_size
+        self.__columns = int(round(360 / cell_size))
+        self.__cells = {}
+        self.__positions = {}
+
+    def add(self, obj):
+        """
+        Indexes obj at its current coordinates, replacing the position it
+        was indexed at before
+
+        Args:
+            obj (BaseModel): object to index
+
+        Returns:
+            None
+        """
+        self.remove(obj.id)
+        try:
+            lat = float(getattr(obj, self.latitude))
+            lon = float(getattr(obj, self.longitude))
+        except (AttributeError, TypeError, ValueError):
+            return
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return
+        cell = (self.__row(lat), self.__column(lon))
+        self.__cells.setdefault(cell, {})[obj.id] = (obj, lat, lon)
+        self.__positions[obj.id] = cell
+
+    def remove(self, obj_id):
+        """
+        Removes the object with id obj_id from the index
+
+        Args:
+            obj_id (str): id of the object
+
+        Returns:
+            None
+        """
+        cell = self.__positions.pop(obj_id, None)
+        if cell is not None:
+            objects = self.__cells[cell]
+            del objects[obj_id]
+            if not objects:
+                del self.__cells[cell]
+
+    def within(self, south, west, north, east):
+        """
+        Returns the objects inside a bounding box
+
+        A box crossing the antimeridian has west greater than east.
+
+        Args:
+            south (float): minimum latitude
+            west (float): minimum longitude
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Returns:
+            list: objects inside the box
+        """
+        objects = []
+        for obj, lat, lon in self.__candidates(south, west, north, east):
+            if inside(lat, lon, south, west, north, east):
+                objects.append(obj)
+        return objects
+
+    def near(self, latitude, longitude, radius):
+        """
+        Returns the objects within radius kilometers of a point
+
+        Args:
+            latitude (float): latitude of the point
+            longitude (float): longitude of the point
+            radius (float): search radius in kilometers
+
+        Returns:
+            list: (distance, obj) pairs sorted by distance
+        """
+        south, west, north, east = bounding_box(latitude, longitude, radius)
+        found = []
+        for obj, lat, lon in self.__candidates(south, west, north, east):
+            km = distance(latitude, longitude, lat, lon)
+            if km <= radius:
+                found.append((km, obj))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def __row(self, latitude):
+        """
+        Returns the grid row of a latitude
+
+        Args:
+            latitude (float): latitude in degrees
+
+        Returns:
+            int: row number
+        """
+        return int(floor((latitude + 90) / self.cell_size))
+
+    def __column(self, longitude):
+        """
+        Returns the grid column of a longitude
+
+        Args:
+            longitude (float): longitude in degrees
+
+        Returns:
+            int: column number, the columns wrap around the antimeridian
+        """
+        return int(floor((longitude + 180) / self.cell_size)) % self.__columns
+
+    def __candidates(self, south, west, north, east):
+        """
+        Yields the entries of the cells overlapping a bounding box
+
+        When the box covers more cells than are occupied, the occupied
+        cells are filtered instead of enumerating the box.
+
+        Args:
+            south (float): minimum latitude
+            west (float): minimum longitude
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Yields:
+            tuple: obj, latitude, longitude
+        """
+        first_row = self.__row(max(south, -90))
+        last_row = self.__row(min(north, 90))
+        first_column = self.__column(west)
+        columns = (self.__column(east) - first_column) % self.__columns + 1
+        if west <= east and east - west >= 360 - self.cell_size:
+            columns = self.__columns
+        if (last_row - first_row + 1) * columns > len(self.__cells):
+            for (row, column), objects in self.__cells.items():
+                if (first_row <= row <= last_row and
+                        (column - first_column) % self.__columns < columns):
+                    yield from objects.values()
+            return
+        for row in range(first_row, last_row + 1):
+            for offset in range(columns):
+                column = (first_column + offset) % self.__columns
+                objects = self.__cells.get((row, column))
+                if objects is not None:
+                    yield from objects.values()
@@ -0,0 +1,352 @@
+#!/usr/bin/python3
+
+"""This module defines the interface of the storage engines
+
+An engine implements the abstract methods of StorageEngine: all, get, new,
+delete, save, reload, count and query. The other methods used by the
+models and the console have default implementations built on them, which
+an engine overrides when it can answer faster, e.g. from an index.
+
+The conformance tests of tests/test_models/test_engine/test_storage.py and
+the workload of benchmarks/engines.py only go through this interface, so a
+new engine is checked and compared with the others by adding it there.
+"""
+
+from abc import ABC, abstractmethod
+from models.engine import columnar
+from models.engine.spatial import bounding_box, distance, inside
+
+# Class name referenced by each foreign key attribute, by class name
+FOREIGN_KEYS = {
+    "City": {"state_id": "State"},
+    "Place": {"city_id": "City", "user_id": "User",
+              "amenity_ids": "Amenity"},
+    "Review": {"place_id": "Place", "user_id": "User"},
+}
+
+# Latitude and longitude attribute names, by class name
+COORDINATES = {"Place": ("latitude", "longitude")}
+
+
+class StorageEngine(ABC):
+    """
+    Interface of the storage of hbnb models
+
+    The objects are identified by their key, <class name>.id. The changes
+    made by new(), delete() and the attribute assignments are kept in
+    memory until save().
+
+    Methods:
+        all(self, cls=None): returns the objects, or only those of cls
+        get(self, cls, obj_id): returns the cls object with id obj_id
+        new(self, obj): stores obj
+        delete(self, obj=None): deletes obj
+        save(self): writes the changes
+        reload(self): reads the saved objects again
+        count(self, cls=None): returns the number of objects, or only of cls
+        query(self, cls, **conditions): returns the objects of cls matching
+        the conditions
+        mark_dirty(self, obj, name=None): marks a stored obj as changed
+        refresh(self): reads the objects changed by another process
+        children(self, cls, obj_id, child_cls): returns the child_cls objects
+        referencing the cls object with id obj_id
+        nearby(self, cls, latitude, longitude, radius): returns the objects
+        of cls within radius kilometers of a point
+        within(self, cls, south, west, north, east): returns the objects of
+        cls inside a bounding box
+        aggregate(self, cls, func, attribute=None, by=None, **conditions):
+        aggregates an attribute over the objects of cls
+        close(self): releases the resources of the engine
+
+    Properties:
+        thread_safe (bool): True if several threads can use the storage
+    """
+
+    @property
+    def thread_safe(self):
+        """
+        Tells if several threads can read and change the objects at the
+        same time
+
+        Returns:
+            bool: False unless the engine says otherwise
+        """
+        return False
+
+    @abstractmethod
+    def all(self, cls=None):
+        """
+        Returns a dictionary of the objects, or only of those of cls
+
+        The dictionary is only read: objects are removed with delete().
+
+        Args:
+            cls (type or str): class or class name to filter on
+
+        Returns:
+            dict: objects by <class name>.id
+        """
+
+    @abstractmethod
+    def get(self, cls, obj_id):
+        """
+        Returns the cls object with id obj_id
+
+        Args:
+            cls (type or str): class or class name of the object
+            obj_id (str): id of the object
+
+        Returns:
+            BaseModel: the object, None if there is none
+        """
+
+    @abstractmethod
+    def new(self, obj):
+        """
+        Stores obj, or marks it as changed if it is already stored
+
+        Args:
+            obj (BaseModel): object to store
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def delete(self, obj=None):
+        """
+        Deletes obj if it is stored
+
+        Args:
+            obj (BaseModel): object to delete
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def save(self):
+        """
+        Writes the changes made since the last save
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def reload(self):
+        """
+        Reads the saved objects again, replacing the objects changed since
+        the last save by their saved values
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def count(self, cls=None):
+        """
+        Returns the number of objects stored, or only of the class cls
+
+        Args:
+            cls (type or str): class or class name to count
+
+        Returns:
+            int: number of objects
+        """
+
+    @abstractmethod
+    def query(self, cls, **conditions):
+        """
+        Returns the objects of cls matching all the conditions
+
+        The conditions are keyword arguments <attribute>__<operator>=<value>
+        (see models/engine/query.py).
+
+        Args:
+            cls (type or str): class or class name of the objects
+            **conditions: conditions the objects must satisfy
+
+        Returns:
+            list: matching objects
+        """
+
+    def mark_dirty(self, obj, name=None):
+        """
+        Marks obj as changed, called by BaseModel on every attribute
+        assignment; does nothing by default
+
+        Args:
+            obj (BaseModel): object whose attribute was assigned
+            name (str): name of the assigned attribute, None if unknown
+
+        Returns:
+            None
+        """
+
+    def refresh(self):
+        """
+        Reads the objects changed by another process, called by the console
+        before every command; does nothing by default
+
+        Returns:
+            bool: True if objects were read again
+        """
+        return False
+
+    def children(self, cls, obj_id, child_cls):
+        """
+        Returns the child_cls objects whose foreign key references the cls
+        object with id obj_id, found with query()
+
+        Args:
+            cls (type or str): class or class name of the referenced object
+            obj_id (str): id of the referenced object
+            child_cls (type or str): class or class name of the children
+
+        Returns:
+            list: child_cls objects
+
+        Raises:
+            ValueError: if child_cls has no foreign key to cls
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        child_name = (child_cls if isinstance(child_cls, str)
+                      else child_cls.__name__)
+        for attribute, referenced in FOREIGN_KEYS.get(child_name,
+                                                      {}).items():
+            if referenced == class_name:
+                return self.query(child_name, **{attribute: obj_id})
+        raise ValueError("{} has no foreign key to {}".format(
+            child_name, class_name))
+
+    def nearby(self, cls, latitude, longitude, radius):
+        """
+        Returns the objects of cls within radius kilometers of a point,
+        read with within() from the bounding box of the circle by default
+
+        Args:
+            cls (type or str): class or class name of the objects
+            latitude (float): latitude of the point in degrees
+            longitude (float): longitude of the point in degrees
+            radius (float): search radius in kilometers
+
+        Returns:
+            list: objects sorted by distance, nearest first
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        box = bounding_box(latitude, longitude, radius)
+        objects = self.within(class_name, *box)
+        lat, lon = COORDINATES[class_name]
+        found = []
+        for obj in objects:
+            km = distance(latitude, longitude, getattr(obj, lat),
+                          getattr(obj, lon))
+            if km <= radius:
+                found.append((km, obj))
+        found.sort(key=lambda pair: pair[0])
+        return [obj for _, obj in found]
+
+    def within(self, cls, south, west, north, east):
+        """
+        Returns the objects of cls inside a bounding box, testing every
+        object by default; objects whose coordinates are not numbers are
+        never inside
+
+        Args:
+            cls (type or str): class or class name of the objects
+            south (float): minimum latitude
+            west (float): minimum longitude, greater than east for a box
+            crossing the antimeridian
+            north (float): maximum latitude
+            east (float): maximum longitude
+
+        Returns:
+            list: objects inside the box
+
+        Raises:
+            ValueError: if cls has no coordinates
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        if class_name not in COORDINATES:
+            raise ValueError("{} has no coordinates".format(class_name))
+        lat, lon = COORDINATES[class_name]
+        located = []
+        for obj in self.all(class_name).values():
+            latitude = getattr(obj, lat, None)
+            longitude = getattr(obj, lon, None)
+            if (columnar.is_number(latitude) and
+                    columnar.is_number(longitude) and
+                    inside(latitude, longitude, south, west, north, east)):
+                located.append(obj)
+        return located
+
+    def aggregate(self, cls, func, attribute=None, by=None, **conditions):
+        """
+        Aggregates an attribute over the objects of cls matching the
+        conditions, optionally by value of another attribute, e.g. the
+        average price per city:
+
+            storage.aggregate(Place, "mean", "price_by_night", by="city_id")
+
+        By default the matching objects are read with query(). Values that
+        are not numbers are ignored. An object whose by attribute holds a
+        list, e.g. Place.amenity_ids, counts in the group of every element
+        of the list, as query() matches it on every element.
+
+        Args:
+            cls (type or str): class or class name of the objects
+            func (str): "count", "sum", "mean", "min" or "max"
+            attribute (str): aggregated attribute, None to count objects
+            by (str): grouping attribute, None for a single result
+            **conditions: conditions the objects must satisfy, as for
+            query()
+
+        Returns:
+            the result, or a dictionary of the results by value of by in
+            ascending order; the mean, min and max of no number are None
+
+        Raises:
+            ValueError: if func is unknown, attribute is None for another
+            function than "count", or a value of by cannot be a dictionary
+            key
+        """
+        if func not in columnar.FUNCTIONS:
+            raise ValueError("unknown aggregate function: {}".format(func))
+        if attribute is None and func != "count":
+            raise ValueError("{} needs an attribute".format(func))
+        objects = self.query(cls, **conditions)
+        if attribute is None:
+            values = [0] * len(objects)
+        else:
+            values = [getattr(obj, attribute, None) for obj in objects]
+        if by is None:
+            return columnar.aggregate(func, values)
+        missing = object()
+        groups = {}
+        for obj, value in zip(objects, values):
+            key = getattr(obj, by, missing)
+            if key is missing:
+                continue
+            keys = key if isinstance(key, list) else (key,)
+            try:
+                for key in dict.fromkeys(keys):
+                    groups.setdefault(key, []).append(value)
+            except TypeError:
+                raise ValueError("cannot group by {}: {!r}".format(
+                    by, key)) from None
+        return columnar.sort_groups(
+            (key, columnar.aggregate(func, group))
+            for key, group in groups.items())
+
+    def close(self):
+        """
+        Releases the resources of the engine, such as connections; does
+        nothing by default
+
+        Returns:
+            None
+        """
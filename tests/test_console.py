@@ -9,6 +9,8 @@ Unittest classes:
     TestHBNBCommandDestroy
     TestHBNBCommandAll
     TestHBNBCommandUpdate
+    TestHBNBCommandNearby
+    TestHBNBCommandAggregate
 """
 import os
 import sys
@@ -16,6 +18,7 @@ import unittest
 from models import storage
 from models.engine.file_storage import FileStorage
 from console import HBNBCommand
+from models.place import Place
 from io import StringIO
 from unittest.mock import patch
 
@@ -649,5 +652,140 @@ class TestHBNBCommandUpdate(unittest.TestCase):
         self.assertEqual("attr_value", test_dict["attr_name"])
 
 
-if __name__ == '__main__':
+class TestHBNBCommandNearby(unittest.TestCase):
+    """
+    Unittests for testing the 'nearby' command of the HBNB command
+    interpreter.
+    """
+
+    def setUp(self):
+        self.paris = Place()
+        self.paris.latitude = 48.8566
+        self.paris.longitude = 2.3522
+        self.versailles = Place()
+        self.versailles.latitude = 48.8049
+        self.versailles.longitude = 2.1204
+
+    def tearDown(self):
+        storage.delete(self.paris)
+        storage.delete(self.versailles)
+
+    def test_nearby_missing_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearby"))
+            self.assertEqual("** class name missing **",
+                             output.getvalue().strip())
+
+    def test_nearby_invalid_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearby MyModel 1 2 3"))
+            self.assertEqual("** class doesn't exist **",
+                             output.getvalue().strip())
+
+    def test_nearby_missing_coordinates(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearby Place 48.8"))
+            self.assertEqual("** coordinates missing **",
+                             output.getvalue().strip())
+
+    def test_nearby_invalid_coordinates(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearby Place a b c"))
+            self.assertEqual("** invalid coordinates **",
+                             output.getvalue().strip())
+
+    def test_nearby_class_without_coordinates(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearby User 1 2 3"))
+            self.assertEqual("** class has no coordinates **",
+                             output.getvalue().strip())
+
+    def test_nearby_space_notation(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "nearby Place 48.8566 2.3522 5"))
+            self.assertIn(self.paris.id, output.getvalue())
+            self.assertNotIn(self.versailles.id, output.getvalue())
+
+    def test_nearby_dot_notation(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "Place.nearby(48.8566, 2.3522, 20)"))
+            text = output.getvalue()
+            self.assertLess(text.index(self.paris.id),
+                            text.index(self.versailles.id))
+
+
+class TestHBNBCommandAggregate(unittest.TestCase):
+    """
+    Unittests for testing the 'aggregate' command of the HBNB command
+    interpreter.
+    """
+
+    def setUp(self):
+        self.places = []
+        for city, price in (("agg-a", 50), ("agg-a", 80), ("agg-b", 90)):
+            place = Place()
+            place.city_id = city
+            place.price_by_night = price
+            self.places.append(place)
+
+    def tearDown(self):
+        for place in self.places:
+            storage.delete(place)
+
+    def run_command(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+            return output.getvalue().strip()
+
+    def test_aggregate_missing_class(self):
+        self.assertEqual("** class name missing **",
+                         self.run_command("aggregate"))
+
+    def test_aggregate_invalid_class(self):
+        self.assertEqual("** class doesn't exist **",
+                         self.run_command("aggregate MyModel count"))
+
+    def test_aggregate_missing_function(self):
+        self.assertEqual("** function missing **",
+                         self.run_command("aggregate Place"))
+
+    def test_aggregate_unknown_function(self):
+        self.assertEqual("** unknown function **",
+                         self.run_command("aggregate Place median"))
+
+    def test_aggregate_missing_attribute(self):
+        self.assertEqual("** attribute name missing **",
+                         self.run_command("aggregate Place sum"))
+
+    def test_aggregate_invalid_value(self):
+        self.assertEqual("** invalid value **", self.run_command(
+            "aggregate Place sum price_by_night price_by_night__lt=a"))
+
+    def test_aggregate_space_notation(self):
+        self.assertEqual("2", self.run_command(
+            "aggregate Place count city_id=agg-a"))
+        self.assertEqual("80", self.run_command(
+            "aggregate Place max price_by_night city_id=agg-a"))
+        self.assertEqual("170", self.run_command(
+            "aggregate Place sum price_by_night city_id__in=agg-a|agg-b "
+            "price_by_night__gt=50"))
+
+    def test_aggregate_by_list(self):
+        self.places[0].amenity_ids = ["agg-wifi", "agg-pool"]
+        self.places[1].amenity_ids = ["agg-wifi"]
+        self.assertEqual('{"agg-pool": 1, "agg-wifi": 2}', self.run_command(
+            "aggregate Place count by=amenity_ids city_id=agg-a"))
+        self.places[2].amenity_ids = [["agg-wifi"]]
+        self.assertEqual("** invalid grouping attribute **", self.run_command(
+            "aggregate Place count by=amenity_ids city_id=agg-b"))
+
+    def test_aggregate_dot_notation(self):
+        self.assertEqual('{"agg-a": 65.0, "agg-b": 90.0}', self.run_command(
+            "Place.aggregate(avg, price_by_night, by=city_id, "
+            "city_id__in=agg-a|agg-b)"))
+
+
+if __name__ == "__main__":
     unittest.main()
@@ -7,7 +7,9 @@ import models
 import unittest
 from datetime import datetime
 from time import sleep
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
+from models.base_model import copy_attributes, format_datetime
+from models.base_model import parse_datetime
 
 
 class TestBaseModelInstantiation(unittest.TestCase):
@@ -98,5 +100,68 @@ class TestBaseModelSave(unittest.TestCase):
         self.assertLess(first_updated_at, bm.updated_at)
 
 
+class TestBaseModelRegistry(unittest.TestCase):
+    """Tests for the registry of the model classes."""
+
+    def test_models_registered(self):
+        for name in ("BaseModel", "User", "State", "City", "Amenity",
+                     "Place", "Review"):
+            self.assertIn(name, classes)
+            self.assertEqual(name, classes[name].__name__)
+
+    def test_kwargs_instance_from_registry(self):
+        bm = BaseModel()
+        copy = classes[bm.to_dict()["__class__"]](**bm.to_dict())
+        self.assertEqual(BaseModel, type(copy))
+        self.assertEqual(bm.to_dict(), copy.to_dict())
+
+    def test_kwargs_instance_not_stored(self):
+        bm = BaseModel()
+        copy = BaseModel(**bm.to_dict())
+        self.assertIs(bm, models.storage.all()["BaseModel." + bm.id])
+        self.assertIsNot(copy, bm)
+
+
+class TestBaseModelDatetime(unittest.TestCase):
+    """Tests for the parsing and formatting of the timestamps."""
+
+    def test_round_trip(self):
+        dt = datetime(2023, 8, 13, 15, 59, 20, 123456)
+        self.assertEqual(dt, parse_datetime(format_datetime(dt)))
+
+    def test_without_microseconds(self):
+        dt = datetime(2023, 8, 13, 15, 59, 20)
+        self.assertEqual("2023-08-13T15:59:20", format_datetime(dt))
+        self.assertEqual(dt, parse_datetime(format_datetime(dt)))
+
+    def test_datetime_returned_as_is(self):
+        dt = datetime.now()
+        self.assertIs(dt, parse_datetime(dt))
+
+    def test_invalid_timestamp(self):
+        with self.assertRaises(ValueError):
+            parse_datetime("yesterday")
+
+    def test_kwargs_timestamps(self):
+        bm = BaseModel()
+        copy = BaseModel(**bm.to_dict())
+        self.assertEqual(bm.created_at, copy.created_at)
+        self.assertEqual(bm.updated_at, copy.updated_at)
+        self.assertIs(copy.created_at, copy.updated_at)
+
+
+class TestCopyAttributes(unittest.TestCase):
+    """Tests for the copy_attributes function."""
+
+    def test_copy_in_place(self):
+        target = BaseModel()
+        target.name = "old"
+        source = BaseModel(id=target.id, created_at=target.created_at,
+                           updated_at=target.updated_at, color="blue")
+        copy_attributes(source, target)
+        self.assertEqual(source.to_dict(), target.to_dict())
+        self.assertFalse(hasattr(target, "name"))
+
+
 if __name__ == "__main__":
     unittest.main()
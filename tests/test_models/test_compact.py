@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+"""
+Contains the tests of the compact models
+"""
+
+import models
+import unittest
+from models import compact
+from models.base_model import BaseModel, classes, copy_attributes
+from models.compact import compact_model, use_compact_models
+from models.place import Place
+from models.user import User
+
+
+class CompactTestCase(unittest.TestCase):
+    """Restores the model registry after every test"""
+
+    def setUp(self):
+        """Saves the registry"""
+        self.registered = dict(classes)
+
+    def tearDown(self):
+        """Restores the registry"""
+        classes.clear()
+        classes.update(self.registered)
+
+
+class TestCompactModelClass(CompactTestCase):
+    """Tests for the definition of the compact models"""
+
+    def test_module_docstring(self):
+        self.assertIsNotNone(compact.__doc__)
+
+    def test_use_compact_models_registers(self):
+        use_compact_models()
+        for name in ("User", "State", "City", "Amenity", "Place", "Review"):
+            self.assertIs(compact.compact_classes[name], classes[name])
+            self.assertEqual(name, classes[name].__name__)
+
+    def test_defined_once(self):
+        self.assertIs(compact_model(Place), compact_model(Place))
+
+    def test_subclass_of_model(self):
+        CompactPlace = compact_model(Place)
+        place = CompactPlace()
+        self.assertIsInstance(place, Place)
+        self.assertIsInstance(place, BaseModel)
+
+    def test_declared_attributes_in_slots(self):
+        CompactUser = compact_model(User)
+        for name in ("id", "created_at", "updated_at", "email", "password",
+                     "first_name", "last_name"):
+            self.assertIn(name, CompactUser.__slots__)
+
+
+class TestCompactModelInstance(CompactTestCase):
+    """Tests for the instances of the compact models"""
+
+    def setUp(self):
+        """Creates a compact Place"""
+        super().setUp()
+        self.CompactPlace = compact_model(Place)
+        self.place = self.CompactPlace()
+
+    def test_stored(self):
+        key = "Place." + self.place.id
+        self.assertIs(self.place, models.storage.all()[key])
+
+    def test_no_instance_dict(self):
+        self.place.name = "Home"
+        self.place.max_guest = 4
+        self.assertIsNone(self.place._CompactModel__overflow())
+
+    def test_defaults(self):
+        self.assertEqual("", self.place.name)
+        self.assertEqual(0, self.place.max_guest)
+        self.assertIs(Place.amenity_ids, self.place.amenity_ids)
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            self.place.nope
+
+    def test_extra_attribute(self):
+        self.place.color = "blue"
+        self.assertEqual("blue", self.place.color)
+        self.assertEqual({"color": "blue"},
+                         self.place._CompactModel__overflow())
+
+    def test_to_dict_same_as_model(self):
+        self.place.name = "Home"
+        self.place.color = "blue"
+        regular = Place(**self.place.to_dict())
+        self.assertEqual(regular.to_dict(), self.place.to_dict())
+        self.assertEqual(list(regular.to_dict()),
+                         list(self.place.to_dict()))
+
+    def test_str_same_as_model(self):
+        self.place.name = "Home"
+        self.place.color = "blue"
+        regular = Place(**self.place.to_dict())
+        self.assertEqual(str(regular), str(self.place))
+
+    def test_assignment_order_same_as_model(self):
+        regular = Place()
+        for obj in (regular, self.place):
+            obj.max_guest = 4
+            obj.color = "blue"
+            obj.name = "Home"
+        for name in ("id", "created_at", "updated_at"):
+            setattr(self.place, name, getattr(regular, name))
+        self.assertEqual(list(regular.to_dict()), list(self.place.to_dict()))
+        self.assertEqual(regular.to_dict(), self.place.to_dict())
+        self.assertEqual(str(regular), str(self.place))
+        copy = self.CompactPlace(**regular.to_dict())
+        self.assertEqual(str(regular), str(copy))
+
+    def test_copy_attributes(self):
+        self.place.name = "Home"
+        self.place.color = "blue"
+        source = self.CompactPlace(id=self.place.id, max_guest=4, size=3,
+                                   created_at=self.place.created_at,
+                                   updated_at=self.place.updated_at)
+        copy_attributes(source, self.place)
+        self.assertEqual(source.to_dict(), self.place.to_dict())
+        self.assertEqual("", self.place.name)
+        self.assertFalse(hasattr(self.place, "color"))
+
+    def test_kwargs(self):
+        self.place.name = "Home"
+        self.place.color = "blue"
+        copy = self.CompactPlace(**self.place.to_dict())
+        self.assertEqual(self.place.to_dict(), copy.to_dict())
+        self.assertIsInstance(copy.created_at, type(self.place.created_at))
+        self.assertIs(copy.created_at, copy.updated_at)
+        self.assertIsNot(copy, models.storage.all()["Place." + copy.id])
+
+    def test_setattr_marks_dirty(self):
+        models.storage.save()
+        self.place.name = "Lodge"
+        models.storage.save()
+        models.storage.reload()
+        key = "Place." + self.place.id
+        self.assertEqual("Lodge", models.storage.all()[key].name)
+
+    def test_reload_builds_compact(self):
+        use_compact_models()
+        models.storage.save()
+        models.storage.reload()
+        obj = models.storage.all()["Place." + self.place.id]
+        self.assertIs(self.CompactPlace, type(obj))
+
+
+if __name__ == "__main__":
+    unittest.main()
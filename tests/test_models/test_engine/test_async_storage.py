@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/async_storage.py."""
+
+import json
+import os
+import threading
+import unittest
+from unittest import mock
+from models.engine.async_storage import AsyncFileStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+from tests.test_models.test_engine.test_file_storage import StorageTestCase
+
+
+class TestAsyncFileStorage(StorageTestCase, unittest.IsolatedAsyncioTestCase):
+    """Test the AsyncFileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(thread_safe=True)
+        self.storage._FileStorage__file_path = "test_async.json"
+        self.async_storage = AsyncFileStorage(self.storage)
+        self.addCleanup(self.async_storage.close)
+        for n in range(5):
+            self.storage.new(Place(id=str(n), name="place {}".format(n),
+                                   max_guest=n,
+                                   created_at="2023-08-13T15:53:37",
+                                   updated_at="2023-08-13T15:53:37"))
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_async.json"):
+            os.remove("test_async.json")
+
+    def test_not_thread_safe(self):
+        with self.assertRaises(ValueError):
+            AsyncFileStorage(FileStorage())
+
+    async def test_save_in_writing_thread(self):
+        threads = []
+        save = self.storage.save
+
+        def record():
+            threads.append(threading.current_thread())
+            save()
+
+        with mock.patch.object(self.storage, "save", side_effect=record):
+            await self.async_storage.save()
+        self.assertNotEqual(threading.current_thread(), threads[0])
+        self.assertTrue(threads[0].name.startswith("FileStorage"))
+        with open("test_async.json") as f:
+            self.assertEqual(5, len(json.load(f)))
+
+    async def test_lookups(self):
+        self.assertEqual("place 3", (await self.async_storage.get(
+            Place, "3")).name)
+        self.assertIsNone(await self.async_storage.get(Place, "9"))
+        self.assertEqual(5, await self.async_storage.count(Place))
+        self.assertEqual(5, len(await self.async_storage.all(Place)))
+        places = await self.async_storage.query(Place, max_guest__ge=3)
+        self.assertEqual({"3", "4"}, {place.id for place in places})
+        self.assertEqual(10, await self.async_storage.aggregate(
+            Place, "sum", "max_guest"))
+
+    async def test_iter_query(self):
+        places = [place async for place in self.async_storage.iter_query(
+            Place, batch_size=2, max_guest__ge=1)]
+        self.assertEqual({"1", "2", "3", "4"},
+                         {place.id for place in places})
+
+    async def test_new_delete_reload(self):
+        user = User(id="u", created_at="2023-08-13T15:53:37",
+                    updated_at="2023-08-13T15:53:37")
+        self.async_storage.new(user)
+        self.async_storage.delete(await self.async_storage.get(Place, "0"))
+        await self.async_storage.save()
+        self.clear()
+        await self.async_storage.reload()
+        self.assertIsNotNone(await self.async_storage.get(User, "u"))
+        self.assertEqual(4, await self.async_storage.count(Place))
+
+    async def test_async_with_flushes(self):
+        storage = FileStorage(thread_safe=True, commit_size=100)
+        storage._FileStorage__file_path = "test_async.json"
+        async with AsyncFileStorage(storage) as async_storage:
+            await async_storage.save()
+            self.assertFalse(os.path.exists("test_async.json"))
+        self.assertTrue(os.path.exists("test_async.json"))
+
+    async def test_given_executor_not_closed(self):
+        executor = mock.Mock()
+        AsyncFileStorage(self.storage, executor).close()
+        executor.shutdown.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
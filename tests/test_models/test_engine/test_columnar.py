@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/columnar.py."""
+
+import unittest
+from models.engine import columnar
+from models.engine.columnar import ColumnStore, aggregate
+from models.engine.query import parse
+from models.place import Place
+
+
+class TestAggregate(unittest.TestCase):
+    """Test the aggregate function."""
+
+    def test_functions(self):
+        values = [3, 1.5, 4]
+        self.assertEqual(3, aggregate("count", values))
+        self.assertEqual(8.5, aggregate("sum", values))
+        self.assertAlmostEqual(8.5 / 3, aggregate("mean", values))
+        self.assertEqual(1.5, aggregate("min", values))
+        self.assertEqual(4, aggregate("max", values))
+
+    def test_not_numbers_ignored(self):
+        self.assertEqual(2, aggregate("count", [1, "2", None, 3]))
+        self.assertEqual(4, aggregate("sum", [1, "2", None, 3]))
+
+    def test_no_numbers(self):
+        self.assertEqual(0, aggregate("count", []))
+        self.assertEqual(0, aggregate("sum", []))
+        for func in ("mean", "min", "max"):
+            self.assertIsNone(aggregate(func, ["a"]))
+
+
+@unittest.skipIf(columnar.numpy is None, "numpy is not installed")
+class TestColumnStore(unittest.TestCase):
+    """Test the ColumnStore class."""
+
+    def setUp(self):
+        self.store = ColumnStore({"city_id": "", "price_by_night": 0,
+                                  "latitude": 0.0})
+        self.places = []
+        for city, price in (("a", 50), ("b", 80), ("a", 120), ("b", 90),
+                            ("c", 60)):
+            self.places.append(self.add(city, price))
+
+    def add(self, city, price):
+        place = Place()
+        place.city_id = city
+        place.price_by_night = price
+        self.store.add(place)
+        return place
+
+    def select(self, **conditions):
+        mask = self.store.mask(parse(conditions))
+        return None if mask is None else sorted(self.store.ids(mask))
+
+    def ids(self, places):
+        return sorted(place.id for place in places)
+
+    def test_mask(self):
+        self.assertEqual(self.ids(self.places[1::2] + self.places[4:]),
+                         self.select(price_by_night__gt=55,
+                                     price_by_night__lt=100))
+        self.assertEqual(self.ids(self.places[::2][:2]),
+                         self.select(city_id="a"))
+        self.assertEqual(self.ids(self.places[2::2]),
+                         self.select(city_id__in=["a", "c", "z"],
+                                     price_by_night__ge=60))
+
+    def test_mask_no_match(self):
+        self.assertEqual([], self.select(city_id="z"))
+        self.assertEqual([], self.select(price_by_night="50"))
+
+    def test_mask_unanswered(self):
+        self.assertIsNone(self.select(name="x"))
+        self.assertIsNone(self.select(city_id__lt="b"))
+        self.places[0].price_by_night = "free"
+        self.store.add(self.places[0])
+        self.assertIsNone(self.select(price_by_night__lt=100))
+        self.assertEqual(self.ids(self.places[::2][:2]),
+                         self.select(city_id="a"))
+
+    def test_remove(self):
+        self.store.remove(self.places[0].id)
+        self.store.remove(self.places[0].id)
+        self.assertEqual(4, len(self.store))
+        self.assertEqual(self.ids(self.places[2:3]), self.select(city_id="a"))
+        self.assertEqual(self.ids(self.places[4:]),
+                         self.select(price_by_night=60))
+
+    def test_update(self):
+        self.places[0].price_by_night = 500
+        self.store.add(self.places[0])
+        self.assertEqual(5, len(self.store))
+        self.assertEqual(self.ids(self.places[:1]),
+                         self.select(price_by_night__gt=200))
+
+    def test_add_values_defaults(self):
+        self.store.add_values("new", {"city_id": "c"})
+        self.assertEqual(["new"], self.select(price_by_night=0))
+
+    def test_extend(self):
+        self.store.extend(["x", "y", "z"], {
+            "city_id": ["d", "d", "a"],
+            "price_by_night": [10, "free", 30],
+            "latitude": [1, 2.5, columnar.MISSING]})
+        self.assertEqual(8, len(self.store))
+        self.assertEqual(["x", "y"], self.select(city_id="d"))
+        self.assertEqual(["y"], self.select(latitude__gt=2))
+        self.assertIsNone(self.select(price_by_night=10))
+        mask = self.store.mask(parse({"city_id": "d"}))
+        self.assertEqual(10, self.store.aggregate("sum", "price_by_night",
+                                                  None, mask))
+
+    def test_grows(self):
+        for n in range(100):
+            self.add("d", n)
+        self.assertEqual(105, len(self.store))
+        self.assertEqual(100, len(self.select(city_id="d")))
+
+    def test_aggregate(self):
+        mask = self.store.mask([])
+        self.assertEqual(400, self.store.aggregate("sum", "price_by_night",
+                                                   None, mask))
+        self.assertEqual(5, self.store.aggregate("count", None, None, mask))
+        self.assertEqual(80.0, self.store.aggregate("mean", "price_by_night",
+                                                    None, mask))
+        self.assertIsNone(self.store.aggregate(
+            "max", "price_by_night", None, self.store.mask(
+                parse({"city_id": "z"}))))
+
+    def test_aggregate_by(self):
+        mask = self.store.mask([])
+        self.assertEqual({"a": 85.0, "b": 85.0, "c": 60.0},
+                         self.store.aggregate("mean", "price_by_night",
+                                              "city_id", mask))
+        self.assertEqual({"a": 50, "b": 80, "c": 60},
+                         self.store.aggregate("min", "price_by_night",
+                                              "city_id", mask))
+        self.assertEqual({"a": 120, "b": 90, "c": 60},
+                         self.store.aggregate("max", "price_by_night",
+                                              "city_id", mask))
+        self.assertEqual({50: 1, 60: 1, 80: 1, 90: 1, 120: 1},
+                         self.store.aggregate("count", None,
+                                              "price_by_night", mask))
+
+    def test_can_aggregate(self):
+        self.assertTrue(self.store.can_aggregate("price_by_night", "city_id"))
+        self.assertTrue(self.store.can_aggregate(None))
+        self.assertFalse(self.store.can_aggregate("city_id"))
+        self.assertFalse(self.store.can_aggregate("name"))
+        self.assertFalse(self.store.can_aggregate(None, "name"))
+        self.add("d", 3.5)
+        self.assertFalse(self.store.can_aggregate("price_by_night"))
+        self.assertTrue(self.store.can_aggregate(None, "city_id"))
+
+
+if __name__ == "__main__":
+    unittest.main()
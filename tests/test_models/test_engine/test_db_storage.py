@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/db_storage.py."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from models.engine.db_storage import DBStorage
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+class TestDBStorage(unittest.TestCase):
+    """Test the DBStorage class."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.db")
+        self.storage = self.open()
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open(self):
+        storage = DBStorage(self.path)
+        storage.reload()
+        self.addCleanup(storage.close)
+        return storage
+
+    def place(self, obj_id, **attributes):
+        place = Place(id=obj_id, created_at="2023-08-13T15:53:37",
+                      updated_at="2023-08-13T15:53:37", **attributes)
+        self.storage.new(place)
+        return place
+
+    def rows(self, sql, *params):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def test_invalid_durability(self):
+        with self.assertRaises(ValueError):
+            DBStorage(self.path, durability="never")
+
+    def test_tables_and_indexes(self):
+        self.assertEqual([("wal",)], self.rows("PRAGMA journal_mode"))
+        tables = {row[0] for row in self.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertLessEqual({"User", "State", "City", "Amenity", "Place",
+                              "Review", "Place.amenity_ids"}, tables)
+        indexes = {row[0] for row in self.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertLessEqual({"City(state_id)", "Place(city_id)",
+                              "Place(user_id)", "Place(latitude)",
+                              "Review(place_id)", "Review(user_id)",
+                              "Place.amenity_ids(value)"}, indexes)
+        columns = [row[1] for row in self.rows('PRAGMA table_info("User")')]
+        self.assertEqual(["id", "data", "email", "password", "first_name",
+                          "last_name"], columns)
+
+    def test_save_and_reopen(self):
+        place = self.place("1", name="Loft", max_guest=4,
+                           amenity_ids=["a", "b"])
+        self.assertEqual([], self.rows('SELECT id FROM "Place"'))
+        self.storage.save()
+        self.assertEqual([("1", "Loft", 4)], self.rows(
+            'SELECT id, name, max_guest FROM "Place"'))
+        self.assertEqual([("a",), ("b",)], self.rows(
+            'SELECT value FROM "Place.amenity_ids" ORDER BY value'))
+        other = self.open()
+        loaded = other.get(Place, "1")
+        self.assertIsNot(place, loaded)
+        self.assertEqual(place.to_dict(), loaded.to_dict())
+        self.assertIs(loaded, other.get("Place", "1"))
+        self.assertEqual({"Place.1": loaded}, other.all(Place))
+
+    def test_save_writes_changed_rows_only(self):
+        for n in range(3):
+            self.place(str(n), name="place {}".format(n))
+        self.storage.save()
+        connection = self.storage._DBStorage__connection
+        before = connection.total_changes
+        self.storage.get(Place, "1").name = "changed"
+        self.storage.save()
+        # One row replaced and the (empty) amenity_ids of the object
+        self.assertEqual(1, connection.total_changes - before)
+        self.assertEqual([("changed",)], self.rows(
+            'SELECT name FROM "Place" WHERE id = ?', "1"))
+
+    def test_delete(self):
+        self.place("1")
+        self.place("2", amenity_ids=["a"])
+        self.storage.save()
+        self.storage.delete(self.storage.get(Place, "2"))
+        self.assertIsNone(self.storage.get(Place, "2"))
+        self.assertEqual(1, self.storage.count(Place))
+        self.assertEqual(["1"], [obj.id for obj in self.storage.query(Place)])
+        self.storage.save()
+        self.assertEqual([("1",)], self.rows('SELECT id FROM "Place"'))
+        self.assertEqual([], self.rows('SELECT id FROM "Place.amenity_ids"'))
+
+    def test_changes_not_saved_are_seen(self):
+        self.place("1", max_guest=2)
+        self.storage.save()
+        self.storage.get(Place, "1").max_guest = 6
+        self.place("2", max_guest=8)
+        state = State()
+        self.assertEqual(2, self.storage.count(Place))
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual({"1", "2"}, {obj.id for obj in self.storage.query(
+            Place, max_guest__ge=6)})
+        self.assertIn("State." + state.id, self.storage.all())
+        self.storage.reload()
+        self.assertEqual(1, self.storage.count())
+        self.assertEqual(2, self.storage.get(Place, "1").max_guest)
+
+    def test_query_matches_python_semantics(self):
+        self.place("1", name="Loft", price_by_night=80)
+        self.place("2", name="80", price_by_night="cheap")
+        self.place("3", price_by_night=[50, 200], amenity_ids="a")
+        self.place("4", price_by_night=2 ** 70, amenity_ids=["a", "b"])
+        self.place("5", price_by_night=None, extra=1)
+        self.storage.save()
+        storage = self.open()
+
+        def ids(**conditions):
+            return sorted(obj.id for obj in storage.query(Place,
+                                                          **conditions))
+
+        self.assertEqual(["1", "3"], ids(price_by_night__lt=100))
+        self.assertEqual(["1"], ids(price_by_night=80.0))
+        self.assertEqual(["2"], ids(price_by_night__ge="a"))
+        self.assertEqual(["3", "4"], ids(price_by_night__gt=150))
+        self.assertEqual(["2"], ids(name__in=["80", "Attic"]))
+        self.assertEqual(["3", "4"], ids(amenity_ids="a"))
+        self.assertEqual(["4"], ids(amenity_ids__in=["b", "c"]))
+        self.assertEqual(["5"], ids(extra__ge=1))
+        self.assertEqual(["5"], ids(price_by_night=None))
+        self.assertEqual(["1", "2"], ids(id__in=["1", "2"]))
+        self.assertEqual([], ids(name__in=[]))
+        self.assertEqual(5, len(storage.query(Place, created_at__lt=(
+            storage.get(Place, "1").updated_at.replace(year=2024)))))
+        self.assertEqual([], storage.query("Unknown", name="x"))
+
+    def test_query_uses_index(self):
+        connection = self.storage._DBStorage__connection
+        statements = []
+        connection.set_trace_callback(statements.append)
+        self.storage.query(Place, city_id="c", max_guest__ge=2)
+        connection.set_trace_callback(None)
+        # The traced statement has its parameters expanded
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN " + statements[-1]).fetchall()
+        self.assertIn("Place(city_id)", " ".join(row[-1] for row in plan))
+
+    def test_children(self):
+        state = State(id="s", created_at="2023-08-13T15:53:37",
+                      updated_at="2023-08-13T15:53:37")
+        self.storage.new(state)
+        city = City(id="c", state_id="s", created_at="2023-08-13T15:53:37",
+                    updated_at="2023-08-13T15:53:37")
+        self.storage.new(city)
+        self.place("1", city_id="c", amenity_ids=["a"])
+        self.place("2", city_id="d", amenity_ids=["a"])
+        self.storage.save()
+        self.assertEqual([city], self.storage.children(State, "s", City))
+        self.assertEqual(["1"], [obj.id for obj in self.storage.children(
+            City, "c", Place)])
+        self.assertEqual(2, len(self.storage.children("Amenity", "a",
+                                                      "Place")))
+        with self.assertRaises(ValueError):
+            self.storage.children(User, "u", City)
+
+    def test_nearby_and_within(self):
+        self.place("sf", latitude=37.7749, longitude=-122.4194)
+        self.place("oakland", latitude=37.8044, longitude=-122.2712)
+        self.place("fiji", latitude=-17.7, longitude=179.9)
+        self.place("samoa", latitude=-13.8, longitude=-171.8)
+        self.place("unknown", latitude="north", longitude=None)
+        self.storage.save()
+        self.place("la", latitude=34.0522, longitude=-118.2437)
+        self.assertEqual(["sf", "oakland"], [obj.id for obj in
+                         self.storage.nearby(Place, 37.77, -122.42, 20)])
+        self.assertEqual(["la"], [obj.id for obj in
+                         self.storage.nearby(Place, 34, -118.2, 20)])
+        self.assertEqual({"fiji", "samoa"}, {obj.id for obj in
+                         self.storage.within(Place, -20, 170, -10, -170)})
+        with self.assertRaises(ValueError):
+            self.storage.nearby(User, 0, 0, 10)
+
+    def test_aggregate(self):
+        self.place("1", city_id="a", price_by_night=100, max_guest=2)
+        self.place("2", city_id="a", price_by_night=50, max_guest=4)
+        self.place("3", city_id="b", price_by_night=80, max_guest=4)
+        self.storage.save()
+        self.assertEqual(230, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+        self.assertEqual({"a": 1, "b": 1}, self.storage.aggregate(
+            Place, "count", by="city_id", max_guest__ge=4))
+        self.assertEqual({"a": 75, "b": 80}, self.storage.aggregate(
+            Place, "mean", "price_by_night", by="city_id"))
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "median", "price_by_night")
+
+    def test_create_index(self):
+        self.storage.create_index(Place, "price_by_night", kind="sorted")
+        self.assertEqual(1, len(self.rows(
+            "SELECT name FROM sqlite_master WHERE name = ?",
+            "Place(price_by_night)")))
+        self.storage.create_index(Place, "amenity_ids")
+        with self.assertRaises(ValueError):
+            self.storage.create_index(Place, "extra")
+        with self.assertRaises(ValueError):
+            self.storage.create_index(Place, "name", kind="bitmap")
+
+    def test_new_column_added(self):
+        self.storage.close()
+        connection = sqlite3.connect(self.path)
+        connection.execute('DROP TABLE "State"')
+        connection.execute('CREATE TABLE "State" '
+                           '(id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        connection.close()
+        storage = self.open()
+        self.assertEqual([], storage.query(State, name="x"))
+        columns = [row[1] for row in self.rows('PRAGMA table_info("State")')]
+        self.assertEqual(["id", "data", "name"], columns)
+
+    def test_refresh(self):
+        self.place("1", name="Loft")
+        self.storage.save()
+        self.assertFalse(self.storage.refresh())
+        place = self.storage.get(Place, "1")
+        other = self.open()
+        changed = other.get(Place, "1")
+        changed.name = "Attic"
+        # models.storage is self.storage, which mark_dirty() tells
+        other.new(changed)
+        other.save()
+        self.assertTrue(self.storage.refresh())
+        self.assertFalse(self.storage.refresh())
+        # The held reference is the object read again
+        self.assertIs(place, self.storage.get(Place, "1"))
+        self.assertEqual("Attic", place.name)
+
+    def test_refresh_deleted(self):
+        self.place("1", name="Loft")
+        self.place("2", name="Attic")
+        self.storage.save()
+        self.storage.refresh()
+        place = self.storage.get(Place, "1")
+        other = self.open()
+        other.delete(other.get(Place, "2"))
+        other.save()
+        self.assertTrue(self.storage.refresh())
+        self.assertIs(place, self.storage.get(Place, "1"))
+        self.assertIsNone(self.storage.get(Place, "2"))
+        self.assertEqual(1, self.storage.count(Place))
+
+    def test_base_model_save(self):
+        user = User()
+        user.email = "a@b.c"
+        user.save()
+        self.assertEqual([(user.id, "a@b.c")], self.rows(
+            'SELECT id, email FROM "User"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/durability.py."""
+
+import os
+import unittest
+from unittest import mock
+from models.engine import durability
+
+
+class TestReplaceFile(unittest.TestCase):
+    """Test the replace_file function."""
+
+    def setUp(self):
+        with open("test_durable.txt", "w") as f:
+            f.write("old")
+        with open("test_durable.txt.tmp", "w") as f:
+            f.write("new")
+
+    def tearDown(self):
+        for path in ("test_durable.txt", "test_durable.txt.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def replace(self, level):
+        with mock.patch.object(durability.os, "fsync",
+                               wraps=os.fsync) as fsync:
+            durability.replace_file("test_durable.txt.tmp",
+                                    "test_durable.txt", level)
+        with open("test_durable.txt") as f:
+            self.assertEqual("new", f.read())
+        self.assertFalse(os.path.exists("test_durable.txt.tmp"))
+        return fsync.call_count
+
+    def test_atomic(self):
+        self.assertEqual(0, self.replace("atomic"))
+
+    def test_fsync(self):
+        self.assertEqual(1, self.replace("fsync"))
+
+    def test_full(self):
+        self.assertEqual(2, self.replace("full"))
+
+
+class TestSync(unittest.TestCase):
+    """Test the sync_file and sync_directory functions."""
+
+    def test_sync_file(self):
+        with open("test_durable.txt", "w") as f:
+            f.write("data")
+        try:
+            durability.sync_file("test_durable.txt")
+        finally:
+            os.remove("test_durable.txt")
+
+    def test_sync_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            durability.sync_file("test_durable.txt")
+
+    def test_sync_directory(self):
+        durability.sync_directory("")
+        durability.sync_directory("does_not_exist")
+
+
+if __name__ == "__main__":
+    unittest.main()
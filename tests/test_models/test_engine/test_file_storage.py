@@ -4,11 +4,21 @@
 
 import os
 import json
+import multiprocessing
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import models
 import unittest
 from datetime import datetime
+from unittest import mock
+from models.engine import columnar
 from models.base_model import BaseModel
 from models.engine.file_storage import FileStorage
+from models.engine.storage import StorageEngine
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -46,9 +56,8 @@ class TestFileStorageMethods(unittest.TestCase):
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
-        with self.assertRaises(TypeError):
-            models.storage.all(None)
+    def test_all_with_none(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
 
     @classmethod
     def set_up_class(cls):
@@ -168,5 +177,1526 @@ class TestFileStorageMethods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class StorageTestCase(unittest.TestCase):
+    """Base class for tests starting from an empty FileStorage."""
+
+    storage_state = (
+        "_FileStorage__objects", "_FileStorage__pending",
+        "_FileStorage__serialized", "_FileStorage__unloaded",
+        "_FileStorage__by_class", "_FileStorage__index_kinds",
+        "_FileStorage__indexes", "_FileStorage__grids",
+        "_FileStorage__column_stores")
+
+    def setUp(self):
+        self.backup_state = {}
+        for name in self.storage_state:
+            self.backup_state[name] = getattr(FileStorage, name)
+            setattr(FileStorage, name, type(self.backup_state[name])())
+
+    def tearDown(self):
+        for name, value in self.backup_state.items():
+            setattr(FileStorage, name, value)
+
+    def clear(self):
+        for name in self.storage_state:
+            getattr(FileStorage, name).clear()
+
+
+class JournalTestCase(StorageTestCase):
+    """Base class for tests using a FileStorage in journal mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(journal=True)
+        self.storage._FileStorage__file_path = "test_journal.json"
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_journal.json", "test_journal.json.log",
+                     "test_journal.json.log.compacting"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def read_log(self):
+        with open("test_journal.json.log", "r") as f:
+            return [json.loads(line) for line in f]
+
+
+class TestFileStorageJournal(JournalTestCase):
+    """Test the journal mode of the FileStorage class."""
+
+    def test_save_appends_changed_objects_only(self):
+        user = User()
+        self.storage.save()
+        state = State()
+        self.storage.save()
+        records = self.read_log()
+        self.assertEqual(2, len(records))
+        self.assertEqual("User." + user.id, records[0]["key"])
+        self.assertEqual("State." + state.id, records[1]["key"])
+        self.assertFalse(os.path.exists("test_journal.json"))
+
+    def test_save_without_changes_writes_nothing(self):
+        User()
+        self.storage.save()
+        self.storage.save()
+        self.assertEqual(1, len(self.read_log()))
+
+    def test_delete_appends_tombstone(self):
+        user = User()
+        self.storage.save()
+        self.storage.delete(user)
+        self.storage.save()
+        records = self.read_log()
+        self.assertEqual("User." + user.id, records[-1]["key"])
+        self.assertIsNone(records[-1]["value"])
+
+    def test_reload_replays_log(self):
+        user = User()
+        place = Place()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.storage.new(user)
+        self.storage.delete(place)
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertEqual("Betty", objs["User." + user.id].first_name)
+        self.assertNotIn("Place." + place.id, objs)
+
+    def test_reload_ignores_truncated_record(self):
+        user = User()
+        self.storage.save()
+        with open("test_journal.json.log", "a") as f:
+            f.write('{"key": "User.1234", "val')
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(["User." + user.id], list(self.storage.all()))
+
+    def test_save_after_truncated_record(self):
+        user = User()
+        self.storage.save()
+        with open("test_journal.json.log", "a") as f:
+            f.write('{"key": "User.1234", "val')
+        storage = FileStorage(journal=True)
+        storage._FileStorage__file_path = "test_journal.json"
+        other = User()
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual({"User." + user.id, "User." + other.id},
+                         set(storage.all()))
+        self.assertEqual(2, len(self.read_log()))
+
+    def test_save_after_record_missing_newline(self):
+        user = User()
+        self.storage.save()
+        with open("test_journal.json.log", "rb+") as f:
+            f.truncate(f.seek(0, os.SEEK_END) - 1)
+        storage = FileStorage(journal=True)
+        storage._FileStorage__file_path = "test_journal.json"
+        other = User()
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual({"User." + user.id, "User." + other.id},
+                         set(storage.all()))
+
+    def test_full_save_folds_log_into_file(self):
+        user = User()
+        self.storage.save()
+        snapshot = FileStorage()
+        snapshot._FileStorage__file_path = "test_journal.json"
+        snapshot.save()
+        self.assertFalse(os.path.exists("test_journal.json.log"))
+        self.clear()
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+
+
+class TestFileStorageCompaction(JournalTestCase):
+    """Test the compaction of the FileStorage log."""
+
+    def read_snapshot(self):
+        with open("test_journal.json", "r") as f:
+            return json.load(f)
+
+    def test_compact_folds_log_into_file(self):
+        user = User()
+        place = Place()
+        self.storage.save()
+        self.storage.delete(place)
+        self.storage.save()
+        self.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("test_journal.json.log"))
+        self.assertFalse(os.path.exists("test_journal.json.log.compacting"))
+        self.assertEqual(["User." + user.id], list(self.read_snapshot()))
+
+    def test_compact_without_log_does_nothing(self):
+        self.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("test_journal.json"))
+
+    def test_saves_after_rotation_go_to_new_log(self):
+        user = User()
+        self.storage.save()
+        self.storage.compact(wait=True)
+        state = State()
+        self.storage.save()
+        self.assertEqual("State." + state.id, self.read_log()[0]["key"])
+        self.clear()
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+        self.assertIn("State." + state.id, self.storage.all())
+
+    def test_reload_replays_interrupted_compaction(self):
+        user = User()
+        self.storage.save()
+        os.rename("test_journal.json.log", "test_journal.json.log.compacting")
+        self.clear()
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+
+    def test_reload_during_compaction(self):
+        user = User()
+        self.storage.save()
+        self.storage.compact(wait=True)
+        user.first_name = "Betty"
+        self.storage.save()
+        read_snapshot = self.storage._FileStorage__read_snapshot
+
+        def slow_read_snapshot(path):
+            # The compaction swaps the snapshot in the meantime
+            read_snapshot(path)
+            time.sleep(0.2)
+
+        with mock.patch.object(self.storage,
+                               "_FileStorage__read_snapshot",
+                               slow_read_snapshot):
+            self.storage.compact()
+            self.storage.reload()
+        self.assertEqual("Betty",
+                         self.storage.get(User, user.id).first_name)
+
+    def test_threshold_triggers_compaction(self):
+        storage = FileStorage(journal=True, compact_threshold=2)
+        storage._FileStorage__file_path = "test_journal.json"
+        User()
+        storage.save()
+        self.assertFalse(os.path.exists("test_journal.json"))
+        User()
+        storage.save()
+        storage._FileStorage__compactor.join()
+        self.assertEqual(2, len(self.read_snapshot()))
+
+
+class TestFileStorageDirtyTracking(StorageTestCase):
+    """Test that save() only serializes the changed objects."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.storage._FileStorage__file_path = "test_dirty.json"
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_dirty.json"):
+            os.remove("test_dirty.json")
+
+    def count_to_dict_calls(self):
+        calls = []
+        original = BaseModel.to_dict
+
+        def to_dict(obj):
+            calls.append(obj)
+            return original(obj)
+        BaseModel.to_dict = to_dict
+        self.addCleanup(setattr, BaseModel, "to_dict", original)
+        return calls
+
+    def test_attribute_assignment_marks_object(self):
+        user = User()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.assertIn("User." + user.id,
+                      FileStorage._FileStorage__pending)
+
+    def test_unstored_object_is_not_marked(self):
+        user = User(**User().to_dict())
+        FileStorage._FileStorage__pending.clear()
+        user.first_name = "Betty"
+        self.assertEqual(set(), FileStorage._FileStorage__pending)
+
+    def test_attribute_assignment_updates_index(self):
+        user = User()
+        self.storage.create_index(User, "first_name")
+        user.first_name = "Betty"
+        self.assertEqual([user],
+                         self.storage.query(User, first_name="Betty"))
+
+    def test_save_serializes_changed_objects_only(self):
+        users = [User() for _ in range(5)]
+        self.storage.save()
+        calls = self.count_to_dict_calls()
+        users[2].first_name = "Betty"
+        self.storage.save()
+        self.assertEqual([users[2]], calls)
+        with open("test_dirty.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(5, len(saved))
+        self.assertEqual("Betty", saved["User." + users[2].id]["first_name"])
+
+    def test_save_sees_objects_changed_through_all(self):
+        user = User()
+        self.storage.save()
+        del self.storage.all()["User." + user.id]
+        state = State(**State().to_dict())
+        self.storage.all()["State." + state.id] = state
+        self.storage.save()
+        with open("test_dirty.json", "r") as f:
+            self.assertEqual(["State." + state.id], list(json.load(f)))
+
+
+class TestFileStorageClassIndex(StorageTestCase):
+    """Test the per-class index of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.storage._FileStorage__file_path = "test_index.json"
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_index.json"):
+            os.remove("test_index.json")
+
+    def test_all_with_class(self):
+        user = User()
+        State()
+        self.assertEqual({"User." + user.id: user}, self.storage.all(User))
+        self.assertEqual({"User." + user.id: user}, self.storage.all("User"))
+
+    def test_all_with_class_is_exact(self):
+        Place()
+        self.assertEqual({}, self.storage.all("Pla"))
+        self.assertEqual({}, self.storage.all(BaseModel))
+
+    def test_all_with_unknown_class(self):
+        self.assertEqual({}, self.storage.all("MyModel"))
+
+    def test_count(self):
+        User()
+        User()
+        State()
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual(2, self.storage.count(User))
+        self.assertEqual(1, self.storage.count("State"))
+        self.assertEqual(0, self.storage.count("MyModel"))
+
+    def test_delete_updates_index(self):
+        user = User()
+        self.storage.delete(user)
+        self.assertEqual({}, self.storage.all(User))
+        self.assertEqual(0, self.storage.count(User))
+
+    def test_reload_fills_index(self):
+        user = User()
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(["User." + user.id], list(self.storage.all(User)))
+
+
+class TestFileStorageForeignKeys(StorageTestCase):
+    """Test the foreign key indexes of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.storage._FileStorage__file_path = "test_fk.json"
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_fk.json"):
+            os.remove("test_fk.json")
+
+    def test_children(self):
+        state = State()
+        city = City()
+        city.state_id = state.id
+        City().state_id = "another state"
+        self.assertEqual([city], self.storage.children(State, state.id, City))
+        self.assertEqual([city],
+                         self.storage.children("State", state.id, "City"))
+
+    def test_children_follow_updates(self):
+        place = Place()
+        review = Review()
+        review.place_id = place.id
+        review.place_id = "another place"
+        self.assertEqual([], self.storage.children(Place, place.id, Review))
+
+    def test_children_after_delete(self):
+        user = User()
+        review = Review()
+        review.user_id = user.id
+        self.storage.delete(review)
+        self.assertEqual([], self.storage.children(User, user.id, Review))
+
+    def test_children_of_list_attribute(self):
+        amenity = Amenity()
+        place = Place()
+        place.amenity_ids = [amenity.id, "another amenity"]
+        self.assertEqual([place],
+                         self.storage.children(Amenity, amenity.id, Place))
+
+    def test_children_after_reload(self):
+        place = Place()
+        place.city_id = "some city"
+        place.user_id = "some user"
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(["Place." + place.id],
+                         ["Place." + obj.id for obj in
+                          self.storage.children(User, "some user", Place)])
+
+    def test_children_without_foreign_key(self):
+        with self.assertRaises(ValueError):
+            self.storage.children(Review, "1234", Place)
+
+
+class TestFileStorageQuery(StorageTestCase):
+    """Test the query method of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.places = []
+        for price, guests in ((50, 2), (80, 4), (120, 4), (90, 6)):
+            place = Place()
+            place.price_by_night = price
+            place.max_guest = guests
+            self.places.append(place)
+
+    def ids(self, objects):
+        return sorted(obj.id for obj in objects)
+
+    def test_query_without_index(self):
+        result = self.storage.query(Place, price_by_night__lt=100,
+                                    max_guest__ge=4)
+        self.assertEqual(self.ids(self.places[1::2]), self.ids(result))
+
+    def test_query_with_indexes(self):
+        self.storage.create_index(Place, "price_by_night", "sorted")
+        self.storage.create_index("Place", "max_guest")
+        result = self.storage.query(Place, price_by_night__lt=100,
+                                    max_guest__ge=4)
+        self.assertEqual(self.ids(self.places[1::2]), self.ids(result))
+        result = self.storage.query(Place, max_guest__in=[2, 6])
+        self.assertEqual(self.ids(self.places[::3]), self.ids(result))
+
+    def test_query_with_none_and_incomparable_values(self):
+        self.places[0].price_by_night = None
+        self.places[2].price_by_night = "free"
+        conditions = ({"price_by_night__ge": 50}, {"price_by_night": None},
+                      {"price_by_night": "free"})
+        scans = [self.ids(self.storage.query(Place, **condition))
+                 for condition in conditions]
+        self.storage.create_index(Place, "price_by_night", "sorted")
+        for condition, scan in zip(conditions, scans):
+            self.assertEqual(scan, self.ids(self.storage.query(Place,
+                                                               **condition)))
+        self.assertEqual(self.ids(self.places[1::2]), scans[0])
+        self.places[2].price_by_night = 60
+        self.assertEqual(self.ids(self.places[1:]), self.ids(
+            self.storage.query(Place, price_by_night__ge=50)))
+
+    def test_index_follows_updates(self):
+        self.storage.create_index(Place, "price_by_night", "sorted")
+        self.places[0].price_by_night = 500
+        self.storage.delete(self.places[1])
+        new_place = Place()
+        new_place.price_by_night = 10
+        result = self.storage.query(Place, price_by_night__lt=100)
+        self.assertEqual(self.ids([self.places[3], new_place]),
+                         self.ids(result))
+
+    def test_index_created_before_objects(self):
+        self.clear()
+        self.storage.create_index(Place, "price_by_night", "sorted")
+        place = Place()
+        place.price_by_night = 10
+        self.assertEqual([place],
+                         self.storage.query(Place, price_by_night__le=10))
+
+    def test_query_unknown_class(self):
+        self.assertEqual([], self.storage.query("MyModel", name="a"))
+
+    def test_create_index_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            self.storage.create_index(Place, "name", "btree")
+
+
+class TestFileStorageSpatial(StorageTestCase):
+    """Test the spatial index of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.places = {}
+        for name, lat, lon in (("paris", 48.8566, 2.3522),
+                               ("versailles", 48.8049, 2.1204),
+                               ("lyon", 45.7640, 4.8357)):
+            place = Place()
+            place.latitude = lat
+            place.longitude = lon
+            self.places[name] = place
+
+    def test_nearby(self):
+        self.assertEqual([self.places["paris"], self.places["versailles"]],
+                         self.storage.nearby(Place, 48.85, 2.35, 50))
+        self.assertEqual(3, len(self.storage.nearby("Place", 48.85, 2.35,
+                                                    500)))
+
+    def test_within(self):
+        self.assertEqual([self.places["lyon"]],
+                         self.storage.within(Place, 45, 4, 46, 5))
+
+    def test_index_follows_updates(self):
+        self.places["lyon"].latitude = 48.86
+        self.places["lyon"].longitude = 2.35
+        self.storage.delete(self.places["paris"])
+        self.assertEqual([self.places["lyon"]],
+                         self.storage.nearby(Place, 48.86, 2.35, 1))
+
+    def test_class_without_coordinates(self):
+        with self.assertRaises(ValueError):
+            self.storage.nearby(User, 0, 0, 10)
+
+
+class TestFileStorageLazy(StorageTestCase):
+    """Test the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(lazy=True)
+        self.storage._FileStorage__file_path = "test_lazy.json"
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.state = State()
+        self.place = Place()
+        self.place.city_id = "some city"
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_lazy.json", "test_lazy.json.log"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_reload_builds_nothing(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual(1, self.storage.count(User))
+
+    def test_get_builds_one_object(self):
+        user = self.storage.get(User, self.user.id)
+        self.assertEqual("Betty", user.first_name)
+        self.assertIs(user, self.storage.get("User", self.user.id))
+        self.assertEqual(["User." + self.user.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertEqual(3, self.storage.count())
+
+    def test_get_missing_object(self):
+        self.assertIsNone(self.storage.get(User, "1234"))
+
+    def test_all_with_class_builds_class(self):
+        self.assertEqual(["State." + self.state.id],
+                         list(self.storage.all(State)))
+        self.assertEqual(["State." + self.state.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_all_builds_everything(self):
+        self.assertEqual(3, len(self.storage.all()))
+
+    def test_lookups_build_class(self):
+        self.assertEqual(1, len(self.storage.children("City", "some city",
+                                                      Place)))
+        self.assertEqual(1, len(self.storage.query(User, first_name="Betty")))
+
+    def test_save_keeps_unbuilt_objects(self):
+        self.storage.get(User, self.user.id).last_name = "Bar"
+        self.storage.save()
+        with open("test_lazy.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(3, len(saved))
+        self.assertEqual("Bar", saved["User." + self.user.id]["last_name"])
+
+    def test_log_replay(self):
+        storage = FileStorage(journal=True, lazy=True)
+        storage._FileStorage__file_path = "test_lazy.json"
+        storage.delete(storage.get(State, self.state.id))
+        storage.get(User, self.user.id).last_name = "Bar"
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual(2, storage.count())
+        self.assertIsNone(storage.get(State, self.state.id))
+        self.assertEqual("Bar", storage.get(User, self.user.id).last_name)
+
+
+class TestFileStorageAggregate(StorageTestCase):
+    """Test the aggregate method of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage()
+        self.places = []
+        for city, price in (("a", 50), ("b", 80), ("a", 120), ("b", 90)):
+            place = Place()
+            place.city_id = city
+            place.price_by_night = price
+            self.places.append(place)
+
+    def test_aggregate(self):
+        self.assertEqual(4, self.storage.aggregate(Place, "count"))
+        self.assertEqual(340, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+        self.assertEqual(85, self.storage.aggregate("Place", "mean",
+                                                    "price_by_night"))
+
+    def test_aggregate_with_conditions(self):
+        self.assertEqual(120, self.storage.aggregate(
+            Place, "max", "price_by_night", city_id="a"))
+        self.assertIsNone(self.storage.aggregate(
+            Place, "min", "price_by_night", price_by_night__gt=500))
+
+    def test_aggregate_by(self):
+        self.assertEqual({"a": 85, "b": 85}, self.storage.aggregate(
+            Place, "mean", "price_by_night", by="city_id"))
+        self.assertEqual({"b": 2}, self.storage.aggregate(
+            Place, "count", by="city_id", price_by_night__ge=80,
+            price_by_night__lt=100))
+
+    def test_aggregate_follows_updates(self):
+        self.storage.aggregate(Place, "count")
+        self.places[0].price_by_night = 10
+        self.storage.delete(self.places[1])
+        self.assertEqual({"a": 130, "b": 90}, self.storage.aggregate(
+            Place, "sum", "price_by_night", by="city_id"))
+
+    def test_aggregate_class_without_columns(self):
+        user = User()
+        user.first_name = "Betty"
+        self.assertEqual(1, self.storage.aggregate(User, "count",
+                                                   first_name="Betty"))
+
+    def test_not_numbers_ignored(self):
+        self.places[0].price_by_night = "free"
+        self.assertEqual(290, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+
+    def test_values_of_another_number_type(self):
+        self.places[1].price_by_night = 3.5
+        for func in ("count", "sum", "max"):
+            for by in (None, "city_id"):
+                self.assertEqual(
+                    StorageEngine.aggregate(self.storage, Place, func,
+                                            "price_by_night", by),
+                    self.storage.aggregate(Place, func, "price_by_night",
+                                           by))
+        self.assertEqual({"a": 170, "b": 93.5}, self.storage.aggregate(
+            Place, "sum", "price_by_night", by="city_id"))
+
+    def test_query_on_columns(self):
+        result = self.storage.query(Place, city_id="a",
+                                    price_by_night__lt=100)
+        self.assertEqual([self.places[0]], result)
+
+    def test_unknown_function(self):
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "median", "price_by_night")
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "sum")
+
+
+class TestFileStorageAggregateWithoutNumpy(TestFileStorageAggregate):
+    """Test the aggregate method of the FileStorage class without NumPy."""
+
+    def setUp(self):
+        patcher = mock.patch.object(columnar, "numpy", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+@unittest.skipIf(columnar.numpy is None, "numpy is not installed")
+class TestFileStorageLazyColumns(StorageTestCase):
+    """Test the column store of the FileStorage class in lazy mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(lazy=True)
+        self.storage._FileStorage__file_path = "test_lazy.json"
+        self.places = []
+        for price in (50, 80, 120):
+            place = Place()
+            place.price_by_night = price
+            self.places.append(place)
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_lazy.json"):
+            os.remove("test_lazy.json")
+
+    def test_aggregate_builds_nothing(self):
+        self.assertEqual(250, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+
+    def test_query_builds_matches(self):
+        result = self.storage.query(Place, price_by_night__gt=100)
+        self.assertEqual([self.places[2].id], [obj.id for obj in result])
+        self.assertEqual(["Place." + self.places[2].id],
+                         list(FileStorage._FileStorage__objects))
+
+
+class TestFileStorageBinary(StorageTestCase):
+    """Test the binary snapshot format of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(serializer="binary")
+        self.storage._FileStorage__file_path = "test_binary.json"
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_binary.json", "test_binary.bin",
+                     "test_binary.json.log", "test_binary.bin.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_unknown_serializer(self):
+        with self.assertRaises(ValueError):
+            FileStorage(serializer="xml")
+
+    def test_save_writes_bin_file(self):
+        User()
+        self.storage.save()
+        self.assertTrue(os.path.exists("test_binary.bin"))
+        self.assertFalse(os.path.exists("test_binary.json"))
+
+    def test_reload(self):
+        user = User()
+        user.first_name = "Betty"
+        place = Place()
+        place.max_guest = 4
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        reloaded = self.storage.all()["User." + user.id]
+        self.assertEqual("Betty", reloaded.first_name)
+        self.assertEqual(user.created_at, reloaded.created_at)
+        self.assertIsInstance(reloaded.updated_at, datetime)
+        self.assertEqual(4, self.storage.all()["Place." + place.id].max_guest)
+
+    def test_reload_datetime_attribute(self):
+        user = User()
+        user.last_login = datetime(2023, 8, 14, 9, 30)
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        self.assertEqual("2023-08-14T09:30:00",
+                         self.storage.get(User, user.id).last_login)
+
+    def test_save_after_reload(self):
+        user = User()
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        self.storage.all()["User." + user.id].first_name = "Betty"
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+        self.assertEqual("Betty",
+                         self.storage.all()["User." + user.id].first_name)
+
+    def test_compaction(self):
+        storage = FileStorage(journal=True, serializer="binary")
+        storage._FileStorage__file_path = "test_binary.json"
+        user = User()
+        storage.save()
+        storage.compact(wait=True)
+        self.assertFalse(os.path.exists("test_binary.json.log"))
+        self.clear()
+        storage.reload()
+        self.assertIn("User." + user.id, storage.all())
+
+
+class TestFileStorageMapped(StorageTestCase):
+    """Test the lazy mode of the FileStorage class on a mapped snapshot."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(lazy=True, serializer="mapped")
+        self.storage._FileStorage__file_path = "test_mapped.json"
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.state = State()
+        self.places = []
+        for price in (50, 80):
+            place = Place()
+            place.price_by_night = price
+            self.places.append(place)
+        self.storage.save()
+        self.clear()
+        self.storage.reload()
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_mapped.snap", "test_mapped.json.log",
+                     "test_mapped.json.log.compacting"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_reload_reads_nothing(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual({}, FileStorage._FileStorage__serialized)
+        self.assertEqual(4, self.storage.count())
+        self.assertEqual(2, self.storage.count(Place))
+
+    def test_get_decodes_one_object(self):
+        user = self.storage.get(User, self.user.id)
+        self.assertEqual("Betty", user.first_name)
+        self.assertEqual(self.user.created_at, user.created_at)
+        self.assertIs(user, self.storage.get("User", self.user.id))
+        self.assertEqual(["User." + self.user.id],
+                         list(FileStorage._FileStorage__serialized))
+        self.assertIsNone(self.storage.get(User, "1234"))
+        self.assertEqual(4, self.storage.count())
+
+    def test_all(self):
+        self.assertEqual(2, len(self.storage.all(Place)))
+        self.assertEqual(4, len(self.storage.all()))
+
+    def test_query(self):
+        result = self.storage.query(Place, price_by_night__gt=60)
+        self.assertEqual([self.places[1].id], [obj.id for obj in result])
+
+    def test_save_keeps_unbuilt_objects(self):
+        self.storage.get(User, self.user.id).last_name = "Bar"
+        self.storage.delete(self.storage.get(State, self.state.id))
+        self.storage.save()
+        self.assertEqual(["User." + self.user.id],
+                         list(FileStorage._FileStorage__serialized))
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual("Bar", self.storage.get(User, self.user.id).last_name)
+        self.assertIsNone(self.storage.get(State, self.state.id))
+
+    def test_log_replay(self):
+        storage = FileStorage(journal=True, lazy=True, serializer="mapped")
+        storage._FileStorage__file_path = "test_mapped.json"
+        storage.delete(storage.get(State, self.state.id))
+        storage.get(User, self.user.id).last_name = "Bar"
+        city = City()
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual(4, storage.count())
+        self.assertIsNone(storage.get(State, self.state.id))
+        self.assertEqual("Bar", storage.get(User, self.user.id).last_name)
+        self.assertIsNotNone(storage.get(City, city.id))
+        storage.compact(wait=True)
+        self.clear()
+        storage.reload()
+        self.assertEqual(4, storage.count())
+
+    def test_reload_replaces_built_objects(self):
+        user = self.storage.get(User, self.user.id)
+        user.first_name = "Bo"
+        self.storage.reload()
+        self.assertEqual(4, self.storage.count())
+        self.assertEqual("Betty",
+                         self.storage.get(User, self.user.id).first_name)
+
+
+class TestFileStorageSharded(StorageTestCase):
+    """Test the sharded mode of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(sharded=True)
+        self.storage._FileStorage__file_path = "test_shards.json"
+        self.user = User()
+        self.state = State()
+        self.place = Place()
+        self.storage.save()
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_shards.json", "test_shards.json.log",
+                     "test_shards.json.log.compacting"):
+            if os.path.exists(path):
+                os.remove(path)
+        for path in ("test_shards", "test_shards.tmp"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def read_shard(self, class_name):
+        with open(os.path.join("test_shards", class_name + ".json")) as f:
+            return json.load(f)
+
+    def test_save_writes_one_file_per_class(self):
+        self.assertEqual(["Place.json", "State.json", "User.json"],
+                         sorted(os.listdir("test_shards")))
+        self.assertEqual(["User." + self.user.id],
+                         list(self.read_shard("User")))
+        self.assertFalse(os.path.exists("test_shards.json"))
+
+    def test_save_writes_changed_classes_only(self):
+        self.user.first_name = "Betty"
+        City()
+        serializer = self.storage._FileStorage__serializer
+        with mock.patch.object(serializer, "dump",
+                               wraps=serializer.dump) as dump:
+            self.storage.save()
+        self.assertEqual(["City.json.tmp", "User.json.tmp"],
+                         sorted(os.path.basename(call.args[1])
+                                for call in dump.call_args_list))
+        self.assertEqual("Betty",
+                         self.read_shard("User")["User." + self.user.id]
+                         ["first_name"])
+
+    def test_save_removes_empty_class(self):
+        self.storage.delete(self.state)
+        del self.storage.all()["Place." + self.place.id]
+        self.storage.save()
+        self.assertEqual(["User.json"], os.listdir("test_shards"))
+
+    def test_reload(self):
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(3, self.storage.count())
+        self.assertIn("Place." + self.place.id, self.storage.all())
+
+    def test_reload_selected_classes(self):
+        self.clear()
+        self.storage.reload(class_names=["User", "Review"])
+        self.assertEqual(["User." + self.user.id],
+                         list(self.storage.all()))
+        self.storage.reload(class_names=("State",))
+        self.assertEqual(2, self.storage.count())
+
+    def test_reload_selected_classes_needs_shards(self):
+        with self.assertRaises(ValueError):
+            FileStorage().reload(class_names=["User"])
+
+    def test_migration(self):
+        shutil.rmtree("test_shards")
+        snapshot = FileStorage()
+        snapshot._FileStorage__file_path = "test_shards.json"
+        snapshot.save()
+        self.clear()
+        self.storage.reload()
+        self.assertFalse(os.path.exists("test_shards.json"))
+        self.assertEqual(["Place.json", "State.json", "User.json"],
+                         sorted(os.listdir("test_shards")))
+        self.assertEqual(3, self.storage.count())
+
+    def test_journal_compaction(self):
+        storage = FileStorage(journal=True, sharded=True)
+        storage._FileStorage__file_path = "test_shards.json"
+        self.user.first_name = "Betty"
+        storage.delete(self.state)
+        storage.save()
+        self.clear()
+        storage.reload(class_names=["State"])
+        self.assertEqual(0, storage.count())
+        storage.compact(wait=True)
+        self.assertEqual(["Place.json", "User.json"],
+                         sorted(os.listdir("test_shards")))
+        self.assertEqual("Betty",
+                         self.read_shard("User")["User." + self.user.id]
+                         ["first_name"])
+
+    def test_lazy_mapped(self):
+        storage = FileStorage(lazy=True, serializer="mapped", sharded=True)
+        storage._FileStorage__file_path = "test_shards.json"
+        city = City()
+        storage.save()
+        self.assertTrue(os.path.exists(os.path.join("test_shards",
+                                                    "City.snap")))
+        self.clear()
+        storage.reload()
+        self.assertEqual(1, storage.count())
+        self.assertEqual(city.id, storage.get(City, city.id).id)
+
+class TestFileStoragePartitioned(StorageTestCase):
+    """Test the partitions of the FileStorage class in sharded mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = self.make_storage()
+        # Fixed ids, so that every partition of 3 or 4 holds reviews
+        self.reviews = []
+        for n in range(20):
+            review = Review(id="review-{}".format(n),
+                            created_at="2023-08-13T15:53:37",
+                            updated_at="2023-08-13T15:53:37")
+            self.storage.new(review)
+            self.reviews.append(review)
+        self.user = User()
+        self.storage.save()
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_shards.json", "test_shards.json.log"):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree("test_shards", ignore_errors=True)
+
+    def make_storage(self, **options):
+        options.setdefault("partitions", {"Review": 4})
+        storage = FileStorage(sharded=True, **options)
+        storage._FileStorage__file_path = "test_shards.json"
+        return storage
+
+    def review_files(self):
+        return sorted(name for name in os.listdir("test_shards")
+                      if name.startswith("Review."))
+
+    def read_partitions(self):
+        objects = {}
+        for name in self.review_files():
+            with open(os.path.join("test_shards", name)) as f:
+                objects[name] = json.load(f)
+        return objects
+
+    def test_invalid_partitions(self):
+        with self.assertRaises(ValueError):
+            FileStorage(partitions={"Review": 4})
+        with self.assertRaises(ValueError):
+            FileStorage(sharded=True, partitions={"Review": 0})
+
+    def test_save_writes_partitions(self):
+        self.assertEqual(["Review.{}-of-4.json".format(n) for n in range(4)],
+                         self.review_files())
+        partitions = self.read_partitions()
+        self.assertEqual(20, sum(len(objects)
+                                 for objects in partitions.values()))
+        self.assertTrue(os.path.exists(os.path.join("test_shards",
+                                                    "User.json")))
+
+    def test_save_writes_changed_partition_only(self):
+        self.reviews[0].text = "Great"
+        serializer = self.storage._FileStorage__serializer
+        with mock.patch.object(serializer, "dump",
+                               wraps=serializer.dump) as dump:
+            self.storage.save()
+        self.assertEqual(1, dump.call_count)
+        path = dump.call_args.args[1]
+        self.assertTrue(path.endswith(".tmp"))
+        self.assertIn("Review." + self.reviews[0].id, dump.call_args.args[0])
+        with open(path[:-len(".tmp")]) as f:
+            self.assertEqual("Great",
+                             json.load(f)["Review." + self.reviews[0].id]
+                             ["text"])
+
+    def test_reload(self):
+        self.clear()
+        self.storage.reload()
+        self.assertEqual(20, self.storage.count(Review))
+        self.assertEqual(21, self.storage.count())
+
+    def test_reload_with_workers(self):
+        self.clear()
+        self.make_storage(workers=3).reload()
+        self.assertEqual(20, self.storage.count(Review))
+        self.assertIn("User." + self.user.id, self.storage.all())
+
+    def test_reload_with_workers_invalid_file(self):
+        with open(os.path.join("test_shards", "Review.2-of-4.json"),
+                  "w") as f:
+            f.write("{")
+        self.clear()
+        with self.assertRaises(ValueError):
+            self.make_storage(workers=3).reload()
+
+    def test_import_with_workers(self):
+        # Importing models reloads the storage with the workers; pickling
+        # anything defined in models for them would wait for the import
+        # to end
+        script = ("import multiprocessing\n"
+                  "started = []\n"
+                  "Process = multiprocessing.get_context('fork').Process\n"
+                  "start = Process.start\n"
+                  "Process.start = lambda self: (started.append(self),\n"
+                  "                              start(self))\n"
+                  "import models\n"
+                  "print(models.storage.count(), len(started))\n")
+        with tempfile.TemporaryDirectory() as directory:
+            shutil.copytree("test_shards", os.path.join(directory, "file"))
+            root = os.path.dirname(os.path.abspath(models.__path__[0]))
+            env = dict(os.environ, PYTHONPATH=root, HBNB_FS_SHARDED="1",
+                       HBNB_FS_PARTITIONS="Review=4", HBNB_FS_WORKERS="4")
+            result = subprocess.run(
+                [sys.executable, "-c", script], cwd=directory, env=env,
+                capture_output=True, text=True, timeout=60)
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual("21 4", result.stdout.strip())
+
+    def test_reload_changes_layout(self):
+        self.clear()
+        storage = self.make_storage(partitions={"Review": 3})
+        storage.reload()
+        self.assertEqual(["Review.{}-of-3.json".format(n) for n in range(3)],
+                         self.review_files())
+        self.assertEqual(20, storage.count(Review))
+        self.clear()
+        storage = self.make_storage(partitions={})
+        storage.reload()
+        self.assertEqual(["Review.json"], self.review_files())
+        self.assertEqual(20, storage.count(Review))
+
+    def test_journal_compaction(self):
+        storage = self.make_storage(journal=True)
+        self.reviews[0].text = "Great"
+        storage.delete(self.reviews[1])
+        storage.save()
+        storage.compact(wait=True)
+        self.clear()
+        storage.reload()
+        self.assertEqual(19, storage.count(Review))
+        self.assertEqual("Great",
+                         storage.get(Review, self.reviews[0].id).text)
+
+    def test_lazy_mapped(self):
+        storage = self.make_storage(lazy=True, serializer="mapped")
+        storage.all()
+        for review in self.reviews:
+            storage.new(review)
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual(20, storage.count(Review))
+        self.assertEqual({}, FileStorage._FileStorage__serialized)
+        review = storage.get(Review, self.reviews[5].id)
+        self.assertEqual(self.reviews[5].id, review.id)
+        review.text = "Great"
+        storage.save()
+        self.clear()
+        storage.reload()
+        self.assertEqual("Great",
+                         storage.get(Review, self.reviews[5].id).text)
+        self.assertEqual(20, len(storage.all(Review)))
+
+
+class TestFileStorageDurability(StorageTestCase):
+    """Test the atomic and durable writes of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User()
+        self.storage = self.make_storage()
+        self.storage.save()
+
+    def tearDown(self):
+        super().tearDown()
+        for path in ("test_durable.json", "test_durable.json.tmp",
+                     "test_durable.json.log"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def make_storage(self, **options):
+        storage = FileStorage(**options)
+        storage._FileStorage__file_path = "test_durable.json"
+        return storage
+
+    def test_unknown_durability(self):
+        with self.assertRaises(ValueError):
+            FileStorage(durability="never")
+
+    def test_crash_during_save_keeps_snapshot(self):
+        State()
+        serializer = self.storage._FileStorage__serializer
+
+        def crash(objects, path):
+            with open(path, "w") as f:
+                f.write('{"State.1234": {"id": ')
+            raise KeyboardInterrupt
+
+        with mock.patch.object(serializer, "dump", side_effect=crash):
+            with self.assertRaises(KeyboardInterrupt):
+                self.storage.save()
+        self.assertFalse(os.path.exists("test_durable.json.tmp"))
+        with open("test_durable.json") as f:
+            self.assertEqual(["User." + self.user.id], list(json.load(f)))
+
+    def count_fsyncs(self, storage):
+        self.user.first_name = "Betty"
+        with mock.patch("os.fsync", wraps=os.fsync) as fsync:
+            storage.save()
+        return fsync.call_count
+
+    def test_save_levels(self):
+        self.assertEqual(0, self.count_fsyncs(
+            self.make_storage(durability="atomic")))
+        self.assertEqual(1, self.count_fsyncs(self.make_storage()))
+        self.assertEqual(2, self.count_fsyncs(
+            self.make_storage(durability="full")))
+
+    def test_journal_levels(self):
+        self.assertEqual(0, self.count_fsyncs(
+            self.make_storage(journal=True, durability="atomic")))
+        self.assertEqual(1, self.count_fsyncs(
+            self.make_storage(journal=True)))
+
+
+class TestFileStorageGroupCommit(StorageTestCase):
+    """Test the group commit mode and batch() of the FileStorage class."""
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_group.json"):
+            os.remove("test_group.json")
+
+    def make_storage(self, **options):
+        storage = FileStorage(**options)
+        storage._FileStorage__file_path = "test_group.json"
+        self.addCleanup(storage.flush)
+        return storage
+
+    def count_writes(self, storage):
+        serializer = storage._FileStorage__serializer
+        patcher = mock.patch.object(serializer, "dump",
+                                    wraps=serializer.dump)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            FileStorage(commit_delay=-1)
+        with self.assertRaises(ValueError):
+            FileStorage(commit_size=-1)
+
+    def test_batch(self):
+        storage = self.make_storage()
+        dump = self.count_writes(storage)
+        with storage.batch() as batch:
+            self.assertIs(storage, batch)
+            for _ in range(5):
+                User().save()
+                storage.save()
+            with storage.batch():
+                State().save()
+            self.assertEqual(0, dump.call_count)
+            self.assertFalse(os.path.exists("test_group.json"))
+        self.assertEqual(1, dump.call_count)
+        with open("test_group.json") as f:
+            self.assertEqual(6, len(json.load(f)))
+        storage.save()
+        self.assertEqual(2, dump.call_count)
+
+    def test_batch_exception(self):
+        storage = self.make_storage()
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                User()
+                storage.save()
+                raise KeyError
+        with open("test_group.json") as f:
+            self.assertEqual(1, len(json.load(f)))
+
+    def test_commit_delay_while_changing(self):
+        storage = self.make_storage(commit_delay=0.001)
+        errors = []
+        # Switch threads often so the timer thread runs between changes
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        with mock.patch("models.storage", storage), \
+                mock.patch("threading.excepthook", errors.append):
+            for n in range(5000):
+                user = User()
+                user.first_name = str(n)
+                storage.save()
+            storage.flush()
+        self.assertEqual([], errors)
+        with open("test_group.json") as f:
+            self.assertEqual(5000, len(json.load(f)))
+
+    def test_commit_size(self):
+        storage = self.make_storage(commit_size=3)
+        dump = self.count_writes(storage)
+        User()
+        storage.save()
+        User()
+        storage.save()
+        self.assertEqual(0, dump.call_count)
+        User()
+        storage.save()
+        self.assertEqual(1, dump.call_count)
+        with open("test_group.json") as f:
+            self.assertEqual(3, len(json.load(f)))
+        storage.flush()
+        self.assertEqual(1, dump.call_count)
+
+    def test_commit_delay(self):
+        storage = self.make_storage(commit_delay=0.05)
+        dump = self.count_writes(storage)
+        User()
+        storage.save()
+        timer = storage._FileStorage__commit_timer
+        User()
+        storage.save()
+        self.assertIs(timer, storage._FileStorage__commit_timer)
+        self.assertEqual(0, dump.call_count)
+        timer.join()
+        self.assertEqual(1, dump.call_count)
+        self.assertIsNone(storage._FileStorage__commit_timer)
+        with open("test_group.json") as f:
+            self.assertEqual(2, len(json.load(f)))
+
+    def test_flush(self):
+        storage = self.make_storage(commit_delay=60)
+        dump = self.count_writes(storage)
+        storage.flush()
+        self.assertEqual(0, dump.call_count)
+        User()
+        storage.save()
+        timer = storage._FileStorage__commit_timer
+        storage.flush()
+        self.assertEqual(1, dump.call_count)
+        self.assertFalse(timer.is_alive())
+
+    def test_reload_flushes(self):
+        storage = self.make_storage(commit_size=100)
+        user = User()
+        storage.save()
+        storage.reload()
+        with open("test_group.json") as f:
+            self.assertEqual(["User." + user.id], list(json.load(f)))
+
+
+class TestFileStorageThreadSafe(StorageTestCase):
+    """Test the thread-safe mode of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileStorage(thread_safe=True)
+        self.storage._FileStorage__file_path = "test_threads.json"
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists("test_threads.json"):
+            os.remove("test_threads.json")
+
+    def test_attribute_assignment_marks_object(self):
+        user = User()
+        self.storage.save()
+        self.storage.create_index(User, "first_name")
+        user.first_name = "Betty"
+        self.assertIn("User." + user.id,
+                      FileStorage._FileStorage__pending)
+        self.assertEqual([user],
+                         self.storage.query(User, first_name="Betty"))
+
+    def test_all_is_a_copy(self):
+        user = User()
+        objects = self.storage.all()
+        objects.clear()
+        self.assertIs(user, self.storage.get(User, user.id))
+        self.assertIsNot(objects, self.storage.all())
+
+    def test_concurrent_changes(self):
+        errors = []
+
+        def work(number):
+            try:
+                for n in range(200):
+                    user = User()
+                    user.first_name = "user {} {}".format(number, n)
+                    for obj in self.storage.all().values():
+                        obj.to_dict()
+                    self.storage.count(User)
+                    if n % 2:
+                        self.storage.delete(user)
+                    if n % 50 == 0:
+                        self.storage.save()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(number,))
+                   for number in range(4)]
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.storage.save()
+        self.assertEqual(400, self.storage.count(User))
+        with open("test_threads.json") as f:
+            self.assertEqual(set(self.storage.all()), set(json.load(f)))
+
+    def test_save_writes_outside_of_mutex(self):
+        User()
+        serializer = self.storage._FileStorage__serializer
+        write = serializer.dump
+        mutex = FileStorage._FileStorage__mutex
+        acquired = []
+
+        def acquire():
+            acquired.append(mutex.acquire(timeout=5))
+            if acquired[-1]:
+                mutex.release()
+
+        def dump(objects, path):
+            thread = threading.Thread(target=acquire)
+            thread.start()
+            thread.join()
+            write(objects, path)
+
+        with mock.patch.object(serializer, "dump", side_effect=dump):
+            self.storage.save()
+        self.assertEqual([True], acquired)
+
+
+class TestFileStorageShared(StorageTestCase):
+    """Test the shared mode of the FileStorage class."""
+
+    options = {}
+
+    def setUp(self):
+        super().setUp()
+        self.storage = self.make_storage()
+        self.storage.new(User(id="a", created_at="2023-08-13T15:53:37",
+                              updated_at="2023-08-13T15:53:37"))
+        self.storage.save()
+
+    def tearDown(self):
+        super().tearDown()
+        for suffix in ("", ".lock", ".log"):
+            if os.path.exists("test_shared.json" + suffix):
+                os.remove("test_shared.json" + suffix)
+
+    def make_storage(self):
+        storage = FileStorage(shared=True, **self.options)
+        storage._FileStorage__file_path = "test_shared.json"
+        return storage
+
+    def save_in_process(self, obj_id):
+        """Saves a new user from another process sharing the files"""
+        def save():
+            storage = self.make_storage()
+            storage.new(User(id=obj_id, created_at="2023-08-13T15:53:37",
+                             updated_at="2023-08-13T15:53:37"))
+            storage.save()
+
+        process = multiprocessing.get_context("fork").Process(target=save)
+        process.start()
+        process.join()
+        self.assertEqual(0, process.exitcode)
+
+    def saved_keys(self):
+        storage = self.make_storage()
+        self.clear()
+        storage.reload()
+        return set(storage.all())
+
+    def test_refresh(self):
+        self.assertFalse(self.storage.refresh())
+        self.save_in_process("b")
+        self.assertTrue(self.storage.refresh())
+        self.assertIsNotNone(self.storage.get(User, "b"))
+        self.assertFalse(self.storage.refresh())
+
+    def test_refresh_unchanged_reads_nothing(self):
+        serializer = self.storage._FileStorage__serializer
+        with mock.patch.object(serializer, "load") as load:
+            self.assertFalse(self.storage.refresh())
+        load.assert_not_called()
+
+    def test_refresh_keeps_unsaved_changes(self):
+        user = self.storage.get(User, "a")
+        user.first_name = "Betty"
+        self.save_in_process("b")
+        self.assertTrue(self.storage.refresh())
+        self.assertIs(user, self.storage.get(User, "a"))
+        self.storage.save()
+        self.assertEqual({"User.a", "User.b"}, self.saved_keys())
+        self.assertEqual("Betty", FileStorage().get(User, "a").first_name)
+
+    def test_merge_keeps_held_objects(self):
+        user = self.storage.get(User, "a")
+
+        def rename():
+            storage = self.make_storage()
+            storage.reload()
+            storage.get(User, "a").last_name = "Holberton"
+            storage.save()
+
+        process = multiprocessing.get_context("fork").Process(target=rename)
+        process.start()
+        process.join()
+        self.storage.new(User(id="c", created_at="2023-08-13T15:53:37",
+                              updated_at="2023-08-13T15:53:37"))
+        self.storage.save()
+        self.assertIs(user, self.storage.get(User, "a"))
+        self.assertEqual("Holberton", user.last_name)
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual({"User.a", "User.c"}, self.saved_keys())
+        saved = FileStorage().get(User, "a")
+        self.assertEqual(("Betty", "Holberton"),
+                         (saved.first_name, saved.last_name))
+
+    def test_save_merges(self):
+        self.save_in_process("b")
+        self.storage.new(User(id="c", created_at="2023-08-13T15:53:37",
+                              updated_at="2023-08-13T15:53:37"))
+        self.storage.delete(self.storage.get(User, "a"))
+        self.storage.save()
+        self.assertIsNotNone(self.storage.get(User, "b"))
+        self.assertEqual({"User.b", "User.c"}, self.saved_keys())
+
+    def test_changed_without_lock(self):
+        with open("test_shared.json", "w") as f:
+            json.dump({}, f)
+        if os.path.exists("test_shared.json.log"):
+            os.remove("test_shared.json.log")
+        os.utime("test_shared.json", ns=(0, 0))
+        self.assertTrue(self.storage.refresh())
+        self.assertIsNone(self.storage.get(User, "a"))
+
+    def test_no_fcntl(self):
+        with mock.patch("models.engine.locking.fcntl", None):
+            with self.assertRaises(ValueError):
+                FileStorage(shared=True)
+
+
+class TestFileStorageSharedJournal(TestFileStorageShared):
+    """Test the shared mode of the FileStorage class with a journal."""
+
+    options = {"journal": True}
+
+    def test_compaction(self):
+        self.save_in_process("b")
+        self.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("test_shared.json.log"))
+        self.assertEqual({"User.a", "User.b"}, self.saved_keys())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/indexes.py."""
+
+import unittest
+from models.base_model import BaseModel
+from models.engine.indexes import HashIndex, SortedIndex
+from models.place import Place
+
+
+class TestHashIndex(unittest.TestCase):
+    """Test the HashIndex class."""
+
+    def setUp(self):
+        self.index = HashIndex("city_id")
+
+    def test_add_and_get(self):
+        place = Place()
+        place.city_id = "1234"
+        self.index.add(place)
+        self.assertEqual({place.id: place}, self.index.get("1234"))
+        self.assertEqual({}, self.index.get("5678"))
+
+    def test_add_replaces_previous_value(self):
+        place = Place()
+        place.city_id = "1234"
+        self.index.add(place)
+        place.city_id = "5678"
+        self.index.add(place)
+        self.assertEqual({}, self.index.get("1234"))
+        self.assertEqual({place.id: place}, self.index.get("5678"))
+
+    def test_remove(self):
+        place = Place()
+        self.index.add(place)
+        self.index.remove(place.id)
+        self.assertEqual({}, self.index.get(""))
+        self.index.remove(place.id)
+
+    def test_list_values(self):
+        index = HashIndex("amenity_ids")
+        place = Place()
+        place.amenity_ids = ["a", "b", "a"]
+        index.add(place)
+        self.assertEqual({place.id: place}, index.get("a"))
+        self.assertEqual({place.id: place}, index.get("b"))
+        index.remove(place.id)
+        self.assertEqual({}, index.get("a"))
+
+    def test_unhashable_values(self):
+        place = Place()
+        place.city_id = {"not": "hashable"}
+        self.index.add(place)
+        self.assertEqual({}, self.index.get({"not": "hashable"}))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Test the SortedIndex class."""
+
+    def setUp(self):
+        self.index = SortedIndex("price_by_night")
+        self.places = []
+        for price in (50, 100, 100, 150, 200):
+            place = Place()
+            place.price_by_night = price
+            self.index.add(place)
+            self.places.append(place)
+
+    def ids(self, objects):
+        return sorted(objects)
+
+    def expected(self, *positions):
+        return sorted(self.places[n].id for n in positions)
+
+    def test_get(self):
+        self.assertEqual(self.expected(1, 2), self.ids(self.index.get(100)))
+        self.assertEqual([], self.ids(self.index.get(75)))
+
+    def test_range(self):
+        self.assertEqual(self.expected(1, 2, 3),
+                         self.ids(self.index.range(100, 150)))
+        self.assertEqual(self.expected(3),
+                         self.ids(self.index.range(100, 150, False, True)))
+        self.assertEqual(self.expected(0),
+                         self.ids(self.index.range(None, 100, True, False)))
+        self.assertEqual(self.expected(4), self.ids(self.index.range(175)))
+
+    def test_lookup_and_estimate(self):
+        conditions = [("lt", 100, (0,)), ("le", 100, (0, 1, 2)),
+                      ("gt", 100, (3, 4)), ("ge", 150, (3, 4)),
+                      ("eq", 200, (4,)), ("in", [50, 200], (0, 4))]
+        for operator, value, positions in conditions:
+            self.assertEqual(self.expected(*positions),
+                             self.ids(self.index.lookup(operator, value)))
+            self.assertEqual(len(positions),
+                             self.index.estimate(operator, value))
+
+    def test_add_replaces_previous_value(self):
+        self.places[0].price_by_night = 300
+        self.index.add(self.places[0])
+        self.assertEqual([], self.ids(self.index.get(50)))
+        self.assertEqual(self.expected(0), self.ids(self.index.range(250)))
+
+    def test_remove(self):
+        self.index.remove(self.places[1].id)
+        self.assertEqual(self.expected(2), self.ids(self.index.get(100)))
+
+    def test_incomparable_values(self):
+        place = Place()
+        place.price_by_night = "free"
+        self.index.add(place)
+        self.assertIsNone(self.index.estimate("ge", 0))
+        self.assertEqual({}, self.index.range("a"))
+        self.index.remove(place.id)
+        self.assertEqual(5, self.index.estimate("ge", 0))
+
+    def test_none_values(self):
+        index = SortedIndex("max_guest")
+        places = [Place(), Place(), Place()]
+        places[0].max_guest = None
+        places[1].max_guest = 20
+        places[2].max_guest = 30
+        for place in places:
+            index.add(place)
+        index.add(BaseModel())
+        self.assertEqual(2, index.estimate("ge", 18))
+        self.assertEqual(sorted(place.id for place in places[1:]),
+                         self.ids(index.lookup("ge", 18)))
+        self.assertIsNone(index.estimate("eq", None))
+        self.assertIsNone(index.estimate("in", [20, None]))
+
+
+if __name__ == "__main__":
+    unittest.main()
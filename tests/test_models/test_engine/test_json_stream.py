@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/json_stream.py."""
+
+import io
+import json
+import unittest
+from models.engine.json_stream import iter_object
+
+
+class TestIterObject(unittest.TestCase):
+    """Test the iter_object function."""
+
+    document = {
+        "User.1": {"id": "1", "__class__": "User", "first_name": "Betty"},
+        "Place.2": {"id": "2", "__class__": "Place", "price_by_night": 120,
+                    "amenity_ids": ["a", "b"], "latitude": 48.8566},
+        "State.3": {"id": "3", "__class__": "State", "name": "{\"},:"},
+    }
+
+    def items(self, text, chunk_size=1 << 16):
+        return list(iter_object(io.StringIO(text), chunk_size))
+
+    def test_items_in_order(self):
+        text = json.dumps(self.document)
+        self.assertEqual(list(self.document.items()), self.items(text))
+
+    def test_small_chunks(self):
+        text = json.dumps(self.document, indent=4)
+        for chunk_size in (1, 2, 7, 64):
+            self.assertEqual(list(self.document.items()),
+                             self.items(text, chunk_size))
+
+    def test_number_split_across_chunks(self):
+        self.assertEqual([("a", 123456)], self.items('{"a": 123456}', 8))
+        self.assertEqual([("a", 123456)], self.items('{"a":123456}', 11))
+
+    def test_number_split_after_point_or_exponent(self):
+        for text in ('{"a": 1.5, "b": -2e+10}', '{"a": 1.5}'):
+            expected = list(json.loads(text).items())
+            for chunk_size in range(1, len(text) + 1):
+                self.assertEqual(expected, self.items(text, chunk_size),
+                                 msg=chunk_size)
+
+    def test_keys_shared(self):
+        text = json.dumps(self.document)
+        first, second = (list(value)[0] for _, value in self.items(text)[:2])
+        self.assertIs(first, second)
+
+    def test_empty_object(self):
+        self.assertEqual([], self.items(" { } "))
+
+    def test_invalid_documents(self):
+        for text in ("", "[]", '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}',
+                     '{1: 2}', '{"a": {"b": }'):
+            with self.assertRaises(json.JSONDecodeError, msg=text):
+                self.items(text, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/locking.py."""
+
+import fcntl
+import os
+import unittest
+from models.engine import locking
+
+
+class TestLocked(unittest.TestCase):
+    """Test the locked function."""
+
+    def tearDown(self):
+        if os.path.exists("test_locking.lock"):
+            os.remove("test_locking.lock")
+
+    def try_lock(self, operation):
+        fd = os.open("test_locking.lock", os.O_RDWR)
+        try:
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+        finally:
+            os.close(fd)
+
+    def test_exclusive(self):
+        with locking.locked("test_locking.lock", True):
+            self.assertTrue(os.path.exists("test_locking.lock"))
+            self.assertFalse(self.try_lock(fcntl.LOCK_SH))
+        self.assertTrue(self.try_lock(fcntl.LOCK_EX))
+
+    def test_shared(self):
+        with locking.locked("test_locking.lock", False):
+            self.assertTrue(self.try_lock(fcntl.LOCK_SH))
+            self.assertFalse(self.try_lock(fcntl.LOCK_EX))
+
+
+class TestGeneration(unittest.TestCase):
+    """Test the read_generation and next_generation functions."""
+
+    def tearDown(self):
+        if os.path.exists("test_locking.lock"):
+            os.remove("test_locking.lock")
+
+    def test_missing(self):
+        self.assertEqual(0, locking.read_generation("test_locking.lock"))
+
+    def test_next_generation(self):
+        with locking.locked("test_locking.lock", True) as fd:
+            self.assertEqual(0, locking.read_generation("test_locking.lock"))
+            self.assertEqual(1, locking.next_generation(fd))
+            self.assertEqual(2, locking.next_generation(fd))
+        self.assertEqual(2, locking.read_generation("test_locking.lock"))
+        with open("test_locking.lock", "w") as f:
+            f.write("9\n")
+        with locking.locked("test_locking.lock", True) as fd:
+            self.assertEqual(10, locking.next_generation(fd))
+        self.assertEqual(10, locking.read_generation("test_locking.lock"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/query.py."""
+
+import unittest
+from models.engine import query
+from models.engine.indexes import HashIndex
+from models.place import Place
+
+
+class TestQueryParse(unittest.TestCase):
+    """Test the parse function."""
+
+    def test_operators(self):
+        self.assertEqual(
+            [("name", "eq", "a"), ("max_guest", "ge", 4),
+             ("city_id", "in", ["a", "b"])],
+            query.parse({"name": "a", "max_guest__ge": 4,
+                         "city_id__in": ("a", "b")}))
+
+    def test_attribute_with_double_underscore(self):
+        self.assertEqual([("__class__", "eq", "Place")],
+                         query.parse({"__class__": "Place"}))
+
+
+class TestQueryMatches(unittest.TestCase):
+    """Test the matches function."""
+
+    def setUp(self):
+        self.place = Place()
+        self.place.price_by_night = 80
+        self.place.max_guest = 4
+
+    def test_all_predicates_hold(self):
+        self.assertTrue(query.matches(self.place, [
+            ("price_by_night", "lt", 100), ("max_guest", "ge", 4)]))
+        self.assertFalse(query.matches(self.place, [
+            ("price_by_night", "lt", 100), ("max_guest", "gt", 4)]))
+
+    def test_missing_attribute(self):
+        self.assertFalse(query.matches(self.place, [("color", "eq", None)]))
+
+    def test_incomparable_value(self):
+        self.assertFalse(query.matches(self.place,
+                                       [("price_by_night", "lt", "100")]))
+
+    def test_list_attribute(self):
+        self.place.amenity_ids = ["a", "b"]
+        self.assertTrue(query.matches(self.place,
+                                      [("amenity_ids", "eq", "b")]))
+        self.assertFalse(query.matches(self.place,
+                                       [("amenity_ids", "in", ["c"])]))
+
+
+class TestQueryPlan(unittest.TestCase):
+    """Test the plan function."""
+
+    def setUp(self):
+        self.places = {}
+        for n in range(10):
+            place = Place()
+            place.city_id = str(n % 2)
+            place.user_id = str(n)
+            self.places[place.id] = place
+        self.indexes = {}
+        for attribute in ("city_id", "user_id"):
+            self.indexes[attribute] = HashIndex(attribute)
+            for place in self.places.values():
+                self.indexes[attribute].add(place)
+
+    def test_scan_without_index(self):
+        candidates = query.plan(self.indexes, [("name", "eq", "")],
+                                self.places)
+        self.assertEqual(10, len(list(candidates)))
+
+    def test_most_selective_index(self):
+        candidates = query.plan(self.indexes, [("city_id", "eq", "0"),
+                                               ("user_id", "eq", "4")],
+                                self.places)
+        self.assertEqual(["4"], [place.user_id for place in candidates])
+
+    def test_unsupported_operator_scans(self):
+        candidates = query.plan(self.indexes, [("user_id", "lt", "4")],
+                                self.places)
+        self.assertEqual(10, len(list(candidates)))
+
+
+if __name__ == "__main__":
+    unittest.main()
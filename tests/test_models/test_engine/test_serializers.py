@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/serializers.py."""
+
+import json
+import os
+import pickle
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+from models.engine import serializers
+from models.engine.serializers import BinarySerializer, JSONSerializer
+from models.engine.serializers import MappedSerializer
+from models.engine.serializers import convert, serializer_for
+
+
+class SerializerTestCase(unittest.TestCase):
+    """Base class for the tests writing snapshots."""
+
+    paths = ("test_snapshot.json", "test_snapshot.bin", "test_snapshot.snap")
+
+    def setUp(self):
+        self.objects = {
+            "User.1": {"id": "1", "created_at": "2023-08-13T15:53:37.646643",
+                       "updated_at": "2023-08-13T15:53:37.646643",
+                       "__class__": "User", "first_name": "Betty"},
+            "Place.2": {"id": "2", "created_at": "2023-08-13T15:53:37",
+                        "updated_at": "2023-08-14T10:00:00.000001",
+                        "__class__": "Place", "max_guest": 4,
+                        "latitude": 48.85, "amenity_ids": ["a", "b"]},
+            "Place.3": {"id": "3", "created_at": "2023-08-13T15:53:37.5",
+                        "updated_at": "2023-08-13T15:53:37.5",
+                        "__class__": "Place", "name": "Loft"},
+        }
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def timestamps_as_datetimes(self, objects):
+        return {key: {name: datetime.fromisoformat(field)
+                      if name in ("created_at", "updated_at") else field
+                      for name, field in value.items()}
+                for key, value in objects.items()}
+
+
+class TestJSONSerializer(SerializerTestCase):
+    """Test the JSONSerializer class."""
+
+    def test_round_trip(self):
+        JSONSerializer().dump(self.objects, "test_snapshot.json")
+        self.assertEqual(self.objects,
+                         dict(JSONSerializer().load("test_snapshot.json")))
+
+    def test_datetimes_written_as_text(self):
+        objects = self.timestamps_as_datetimes(self.objects)
+        JSONSerializer().dump(objects, "test_snapshot.json")
+        loaded = dict(JSONSerializer().load("test_snapshot.json"))
+        self.assertEqual("2023-08-13T15:53:37.646643",
+                         loaded["User.1"]["created_at"])
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            list(JSONSerializer().load("test_snapshot.json"))
+
+    def test_chunks(self):
+        for size in (1, 2, 3, 4):
+            with mock.patch.object(serializers, "CHUNK_SIZE", size):
+                JSONSerializer().dump(self.objects, "test_snapshot.json")
+            with open("test_snapshot.json") as f:
+                self.assertEqual(json.dumps(self.objects), f.read())
+        JSONSerializer().dump({}, "test_snapshot.json")
+        with open("test_snapshot.json") as f:
+            self.assertEqual("{}", f.read())
+
+
+class TestBinarySerializer(SerializerTestCase):
+    """Test the BinarySerializer class."""
+
+    def test_round_trip(self):
+        BinarySerializer().dump(self.objects, "test_snapshot.bin")
+        self.assertEqual(self.timestamps_as_datetimes(self.objects),
+                         dict(BinarySerializer().load("test_snapshot.bin")))
+
+    def test_datetimes_in(self):
+        objects = self.timestamps_as_datetimes(self.objects)
+        BinarySerializer().dump(objects, "test_snapshot.bin")
+        self.assertEqual(objects,
+                         dict(BinarySerializer().load("test_snapshot.bin")))
+
+    def test_other_values_as_in_json(self):
+        self.objects["User.1"]["last_login"] = datetime(2023, 8, 14, 9, 30)
+        self.objects["Place.2"]["amenity_ids"] = ("a", datetime(2023, 1, 1))
+        self.objects["Place.3"]["rules"] = {"pets": [False]}
+        JSONSerializer().dump(self.objects, "test_snapshot.json")
+        BinarySerializer().dump(self.objects, "test_snapshot.bin")
+        self.assertEqual(
+            self.timestamps_as_datetimes(dict(
+                JSONSerializer().load("test_snapshot.json"))),
+            dict(BinarySerializer().load("test_snapshot.bin")))
+        self.objects["Place.3"]["price"] = Decimal("1.5")
+        with self.assertRaises(TypeError):
+            BinarySerializer().dump(self.objects, "test_snapshot.bin")
+
+    def test_equal_timestamps_shared(self):
+        BinarySerializer().dump(self.objects, "test_snapshot.bin")
+        user = dict(BinarySerializer().load("test_snapshot.bin"))["User.1"]
+        self.assertIs(user["created_at"], user["updated_at"])
+
+    def test_smaller_than_json(self):
+        JSONSerializer().dump(self.objects, "test_snapshot.json")
+        BinarySerializer().dump(self.objects, "test_snapshot.bin")
+        self.assertLess(os.path.getsize("test_snapshot.bin"),
+                        os.path.getsize("test_snapshot.json"))
+
+    def test_not_a_snapshot(self):
+        JSONSerializer().dump(self.objects, "test_snapshot.bin")
+        with self.assertRaises(ValueError):
+            list(BinarySerializer().load("test_snapshot.bin"))
+
+    def test_globals_refused(self):
+        with open("test_snapshot.bin", "wb") as file:
+            file.write(BinarySerializer.MAGIC)
+            pickle.dump([(("id",), [(os.getcwd,)])], file)
+        with self.assertRaises(pickle.UnpicklingError):
+            list(BinarySerializer().load("test_snapshot.bin"))
+
+
+class TestMappedSerializer(SerializerTestCase):
+    """Test the MappedSerializer class."""
+
+    def test_round_trip(self):
+        MappedSerializer().dump(self.objects, "test_snapshot.snap")
+        self.assertEqual(self.objects,
+                         dict(MappedSerializer().load("test_snapshot.snap")))
+        self.assertFalse(os.path.exists("test_snapshot.snap.tmp"))
+
+    def test_datetimes_written_as_text(self):
+        objects = self.timestamps_as_datetimes(self.objects)
+        MappedSerializer().dump(objects, "test_snapshot.snap")
+        loaded = dict(MappedSerializer().load("test_snapshot.snap"))
+        self.assertEqual("2023-08-13T15:53:37.646643",
+                         loaded["User.1"]["created_at"])
+
+    def test_open(self):
+        MappedSerializer().dump(self.objects, "test_snapshot.snap")
+        snapshot = MappedSerializer().open("test_snapshot.snap")
+        try:
+            self.assertEqual(2, snapshot.count("Place"))
+            position = snapshot.find("Place", "3")
+            self.assertEqual(self.objects["Place.3"],
+                             snapshot.value("Place", position))
+        finally:
+            snapshot.close()
+
+    def test_open_keeps_replaced_snapshot(self):
+        MappedSerializer().dump(self.objects, "test_snapshot.snap")
+        snapshot = MappedSerializer().open("test_snapshot.snap")
+        try:
+            MappedSerializer().dump({}, "test_snapshot.snap")
+            self.assertEqual(self.objects, dict(snapshot.items()))
+        finally:
+            snapshot.close()
+
+
+class TestConvert(SerializerTestCase):
+    """Test the conversion between formats."""
+
+    def test_serializer_for(self):
+        self.assertIsInstance(serializer_for("file.json"), JSONSerializer)
+        self.assertIsInstance(serializer_for("a/file.bin"), BinarySerializer)
+        self.assertIsInstance(serializer_for("file.snap"), MappedSerializer)
+        with self.assertRaises(ValueError):
+            serializer_for("file.csv")
+
+    def test_convert_both_ways(self):
+        JSONSerializer().dump(self.objects, "test_snapshot.json")
+        self.assertEqual(3, convert("test_snapshot.json",
+                                    "test_snapshot.bin"))
+        os.remove("test_snapshot.json")
+        self.assertEqual(3, convert("test_snapshot.bin",
+                                    "test_snapshot.json"))
+        # The timestamps come back as isoformat() text of the same instants
+        loaded = dict(JSONSerializer().load("test_snapshot.json"))
+        self.assertEqual(self.timestamps_as_datetimes(self.objects),
+                         self.timestamps_as_datetimes(loaded))
+
+
+if __name__ == "__main__":
+    unittest.main()
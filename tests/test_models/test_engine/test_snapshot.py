@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/snapshot.py."""
+
+import json
+import os
+import unittest
+from models.engine.snapshot import MappedKeys, MappedSnapshot
+from models.engine.snapshot import write_snapshot
+
+
+class SnapshotTestCase(unittest.TestCase):
+    """Base class for the tests reading a mapped snapshot."""
+
+    def setUp(self):
+        self.objects = {
+            "User.b": {"id": "b", "__class__": "User", "first_name": "Bo"},
+            "User.a": {"id": "a", "__class__": "User", "first_name": "Al"},
+            "User.é": {"id": "é", "__class__": "User"},
+            "Place.1": {"id": "1", "__class__": "Place", "max_guest": 4},
+        }
+        write_snapshot(((key, json.dumps(value).encode())
+                        for key, value in self.objects.items()),
+                       "test_snapshot.snap")
+        self.snapshot = MappedSnapshot("test_snapshot.snap")
+
+    def tearDown(self):
+        self.snapshot.close()
+        os.remove("test_snapshot.snap")
+
+
+class TestMappedSnapshot(SnapshotTestCase):
+    """Test the MappedSnapshot class."""
+
+    def test_classes_and_count(self):
+        self.assertEqual(["User", "Place"], self.snapshot.classes())
+        self.assertEqual(3, self.snapshot.count("User"))
+        self.assertEqual(0, self.snapshot.count("State"))
+
+    def test_ids_sorted(self):
+        self.assertEqual(["a", "b", "é"], list(self.snapshot.ids("User")))
+        self.assertEqual([], list(self.snapshot.ids("State")))
+
+    def test_find_and_value(self):
+        for key, value in self.objects.items():
+            class_name, _, obj_id = key.partition(".")
+            position = self.snapshot.find(class_name, obj_id)
+            self.assertEqual(value, self.snapshot.value(class_name, position))
+
+    def test_find_missing(self):
+        self.assertEqual(-1, self.snapshot.find("User", "c"))
+        self.assertEqual(-1, self.snapshot.find("User", "1"))
+        self.assertEqual(-1, self.snapshot.find("State", "a"))
+
+    def test_items(self):
+        self.assertEqual(self.objects, dict(self.snapshot.items()))
+
+    def test_not_a_snapshot(self):
+        with open("test_snapshot.json", "w") as file:
+            file.write("{}")
+        try:
+            with self.assertRaises(ValueError):
+                MappedSnapshot("test_snapshot.json")
+        finally:
+            os.remove("test_snapshot.json")
+
+    def test_empty(self):
+        write_snapshot([], "test_empty.snap")
+        snapshot = MappedSnapshot("test_empty.snap")
+        try:
+            self.assertEqual([], snapshot.classes())
+            self.assertEqual([], list(snapshot.items()))
+        finally:
+            snapshot.close()
+            os.remove("test_empty.snap")
+
+
+class TestMappedKeys(SnapshotTestCase):
+    """Test the MappedKeys class."""
+
+    def setUp(self):
+        super().setUp()
+        self.keys = MappedKeys([self.snapshot], "User")
+
+    def test_contains(self):
+        self.assertIn("User.a", self.keys)
+        self.assertNotIn("User.c", self.keys)
+        self.assertNotIn("Place.1", self.keys)
+        self.assertNotIn(1, self.keys)
+
+    def test_add_and_discard(self):
+        self.keys.add("User.c")
+        self.keys.add("User.a")
+        self.keys.discard("User.b")
+        self.keys.discard("User.d")
+        self.assertEqual({"User.a", "User.c", "User.é"}, set(self.keys))
+        self.assertEqual(3, len(self.keys))
+        self.keys.add("User.b")
+        self.keys.discard("User.c")
+        self.assertEqual({"User.a", "User.b", "User.é"}, set(self.keys))
+
+    def test_remove_last(self):
+        for key in list(self.keys):
+            self.keys.remove(key)
+        self.assertFalse(self.keys)
+        with self.assertRaises(KeyError):
+            self.keys.remove("User.a")
+
+    def test_value(self):
+        self.keys.discard("User.a")
+        self.assertEqual(self.objects["User.a"], self.keys.value("User.a"))
+        with self.assertRaises(KeyError):
+            self.keys.value("User.c")
+
+    def test_items(self):
+        self.keys.discard("User.b")
+        self.keys.add("User.c")
+        self.assertEqual([("User.a", self.objects["User.a"]),
+                          ("User.é", self.objects["User.é"]),
+                          ("User.c", None)], list(self.keys.items()))
+
+
+class TestMappedKeysPartitions(SnapshotTestCase):
+    """Test the MappedKeys class over the snapshots of partitions."""
+
+    def setUp(self):
+        super().setUp()
+        write_snapshot([("User.c", b'{"id": "c"}')], "test_partition.snap")
+        self.partition = MappedSnapshot("test_partition.snap")
+        self.keys = MappedKeys([self.snapshot, None, self.partition], "User",
+                               lambda obj_id: 2 if obj_id == "c" else 0)
+
+    def tearDown(self):
+        self.partition.close()
+        os.remove("test_partition.snap")
+        super().tearDown()
+
+    def test_contains_and_len(self):
+        self.assertEqual(4, len(self.keys))
+        self.assertIn("User.c", self.keys)
+        self.assertIn("User.a", self.keys)
+
+    def test_routed_search(self):
+        keys = MappedKeys([self.snapshot, self.partition], "User",
+                          lambda obj_id: 1)
+        self.assertNotIn("User.a", keys)
+        self.assertEqual({"id": "c"}, keys.value("User.c"))
+
+    def test_items(self):
+        self.assertEqual(["User.a", "User.b", "User.é", "User.c"],
+                         [key for key, _ in self.keys.items()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/spatial.py."""
+
+import unittest
+from models.engine.spatial import GridIndex, distance
+from models.place import Place
+
+
+class TestDistance(unittest.TestCase):
+    """Test the distance function."""
+
+    def test_same_point(self):
+        self.assertEqual(0, distance(12.5, -3.2, 12.5, -3.2))
+
+    def test_paris_lyon(self):
+        self.assertAlmostEqual(392, distance(48.8566, 2.3522,
+                                             45.7640, 4.8357), delta=2)
+
+
+class TestGridIndex(unittest.TestCase):
+    """Test the GridIndex class."""
+
+    def setUp(self):
+        self.index = GridIndex()
+
+    def add(self, lat, lon):
+        place = Place()
+        place.latitude = lat
+        place.longitude = lon
+        self.index.add(place)
+        return place
+
+    def test_near_sorted_by_distance(self):
+        far = self.add(0.05, 0.05)
+        near = self.add(0.01, 0.01)
+        self.add(1, 1)
+        found = self.index.near(0, 0, 10)
+        self.assertEqual([near, far], [obj for _, obj in found])
+        self.assertLess(found[0][0], found[1][0])
+
+    def test_within(self):
+        inside = self.add(10.5, 20.5)
+        self.add(10.5, 21.5)
+        self.assertEqual([inside], self.index.within(10, 20, 11, 21))
+
+    def test_across_antimeridian(self):
+        east = self.add(0, 179.99)
+        west = self.add(0, -179.99)
+        self.add(0, 0)
+        self.assertEqual({east.id, west.id},
+                         {obj.id for _, obj in self.index.near(0, 180, 5)})
+        self.assertEqual({east.id, west.id},
+                         {obj.id for obj in
+                          self.index.within(-1, 179, 1, -179)})
+
+    def test_near_pole(self):
+        north = self.add(89.99, 45)
+        other_side = self.add(89.99, -135)
+        self.assertEqual({north.id, other_side.id},
+                         {obj.id for _, obj in self.index.near(90, 0, 5)})
+
+    def test_large_area_scans_occupied_cells(self):
+        places = [self.add(lat, lon) for lat, lon in ((-80, -170), (80, 170))]
+        self.assertEqual({place.id for place in places},
+                         {obj.id for obj in
+                          self.index.within(-90, -180, 90, 180)})
+
+    def test_add_replaces_position(self):
+        place = self.add(10, 10)
+        place.latitude = -10
+        self.index.add(place)
+        self.assertEqual([], self.index.within(9, 9, 11, 11))
+        self.assertEqual([place], self.index.within(-11, 9, -9, 11))
+
+    def test_remove(self):
+        place = self.add(10, 10)
+        self.index.remove(place.id)
+        self.assertEqual([], self.index.within(9, 9, 11, 11))
+
+    def test_invalid_coordinates_not_indexed(self):
+        place = Place()
+        place.latitude = "north"
+        self.index.add(place)
+        place.latitude = 95.0
+        self.index.add(place)
+        self.assertEqual([], self.index.within(-90, -180, 90, 180))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+#!/usr/bin/python3
+
+"""Unit tests for models/engine/storage.py, and the conformance tests every
+storage engine must pass.
+
+StorageConformance only goes through the StorageEngine interface. A new
+engine is tested by a TestCase mixing it in and defining open_storage(),
+which returns an empty engine, and reopen(), which returns an engine
+reading what self.storage saved.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from models.base_model import classes
+from models.city import City
+from models.engine import query
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.storage import StorageEngine
+from models.place import Place
+from models.state import State
+from models.user import User
+from tests.test_models.test_engine.test_file_storage import StorageTestCase
+
+TIMESTAMP = "2023-08-13T15:53:37.646643"
+
+
+class DictStorage(StorageEngine):
+    """Engine implementing the abstract methods only, over a dictionary of
+    serialized objects standing for the disk."""
+
+    def __init__(self, disk):
+        self.disk = disk
+        self.objects = {}
+
+    def all(self, cls=None):
+        if cls is None:
+            return dict(self.objects)
+        prefix = (cls if isinstance(cls, str) else cls.__name__) + "."
+        return {key: obj for key, obj in self.objects.items()
+                if key.startswith(prefix)}
+
+    def get(self, cls, obj_id):
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        return self.objects.get("{}.{}".format(class_name, obj_id))
+
+    def new(self, obj):
+        self.objects["{}.{}".format(type(obj).__name__, obj.id)] = obj
+
+    def delete(self, obj=None):
+        if obj is not None:
+            self.objects.pop("{}.{}".format(type(obj).__name__, obj.id),
+                             None)
+
+    def save(self):
+        self.disk.clear()
+        for key, obj in self.objects.items():
+            self.disk[key] = json.dumps(obj.to_dict())
+
+    def reload(self):
+        for key, data in self.disk.items():
+            value = json.loads(data)
+            self.objects[key] = classes[value["__class__"]](**value)
+
+    def count(self, cls=None):
+        return len(self.all(cls))
+
+    def query(self, cls, **conditions):
+        predicates = query.parse(conditions)
+        return [obj for obj in self.all(cls).values()
+                if query.matches(obj, predicates)]
+
+
+class StorageConformance:
+    """Tests of the StorageEngine interface, for any engine."""
+
+    def open_storage(self):
+        raise NotImplementedError
+
+    def reopen(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        super().setUp()
+        self.storage = self.open_storage()
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make(self, cls, obj_id, **attributes):
+        obj = cls(id=obj_id, created_at=TIMESTAMP, updated_at=TIMESTAMP,
+                  **attributes)
+        self.storage.new(obj)
+        return obj
+
+    def ids(self, objects):
+        return sorted(obj.id for obj in objects)
+
+    def test_is_engine(self):
+        self.assertIsInstance(self.storage, StorageEngine)
+        self.assertIsInstance(self.storage.thread_safe, bool)
+
+    def test_new_get_all_count(self):
+        user = User()
+        place = self.make(Place, "p1", name="Loft")
+        self.assertIs(user, self.storage.get(User, user.id))
+        self.assertIs(place, self.storage.get("Place", "p1"))
+        self.assertIsNone(self.storage.get(Place, "p2"))
+        self.assertIsNone(self.storage.get("Unknown", "p1"))
+        self.assertEqual({"Place.p1": place}, self.storage.all(Place))
+        self.assertEqual({"Place.p1", "User." + user.id},
+                         set(self.storage.all()))
+        self.assertEqual(2, self.storage.count())
+        self.assertEqual(1, self.storage.count("User"))
+        self.assertEqual(0, self.storage.count(State))
+
+    def test_delete(self):
+        self.make(Place, "p1")
+        self.make(Place, "p2")
+        self.storage.save()
+        self.storage.delete(self.storage.get(Place, "p1"))
+        self.storage.delete(None)
+        self.assertIsNone(self.storage.get(Place, "p1"))
+        self.assertEqual(["p2"], self.ids(self.storage.all(Place).values()))
+        self.assertEqual(1, self.storage.count(Place))
+        self.storage.save()
+        reopened = self.reopen()
+        self.assertIsNone(reopened.get(Place, "p1"))
+        self.assertEqual(1, reopened.count(Place))
+
+    def test_save_and_reopen(self):
+        place = self.make(Place, "p1", name="Loft", max_guest=4,
+                          amenity_ids=["a", "b"], extra={"wifi": True})
+        user = User()
+        user.email = "a@b.c"
+        user.save()
+        reopened = self.reopen()
+        self.assertEqual(place.to_dict(),
+                         reopened.get(Place, "p1").to_dict())
+        self.assertEqual("a@b.c", reopened.get(User, user.id).email)
+        self.assertEqual(2, reopened.count())
+
+    def test_assignment_saved(self):
+        place = self.make(Place, "p1", name="Loft")
+        self.storage.save()
+        place.name = "Attic"
+        self.storage.save()
+        self.assertEqual("Attic", self.reopen().get(Place, "p1").name)
+
+    def test_reload_replaces_changes_not_saved(self):
+        self.make(Place, "p1", name="Loft")
+        self.storage.save()
+        self.storage.get(Place, "p1").name = "Attic"
+        self.storage.reload()
+        self.assertEqual("Loft", self.storage.get(Place, "p1").name)
+
+    def test_query(self):
+        self.make(Place, "p1", city_id="c1", price_by_night=80,
+                  amenity_ids=["a", "b"])
+        self.make(Place, "p2", city_id="c1", price_by_night=150)
+        self.make(Place, "p3", city_id="c2", price_by_night="free",
+                  amenity_ids=["b"])
+        self.storage.save()
+        for storage in (self.storage, self.reopen()):
+            def ids(**conditions):
+                return self.ids(storage.query(Place, **conditions))
+
+            self.assertEqual(["p1", "p2", "p3"], ids())
+            self.assertEqual(["p1", "p2"], ids(city_id="c1"))
+            self.assertEqual(["p1"], ids(city_id="c1",
+                                         price_by_night__lt=100))
+            self.assertEqual(["p2"], ids(price_by_night__ge=100))
+            self.assertEqual(["p3"], ids(price_by_night="free"))
+            self.assertEqual(["p1", "p3"], ids(amenity_ids="b"))
+            self.assertEqual(["p1"], ids(amenity_ids__in=["a", "c"]))
+            self.assertEqual([], ids(city_id__in=["c2", "x"],
+                                     price_by_night__gt=1))
+            self.assertEqual([], ids(unknown="x"))
+
+    def test_children(self):
+        self.make(State, "s1")
+        self.make(City, "c1", state_id="s1")
+        self.make(City, "c2", state_id="s2")
+        self.storage.save()
+        self.assertEqual(["c1"], self.ids(self.storage.children(
+            State, "s1", City)))
+        with self.assertRaises(ValueError):
+            self.storage.children(User, "u1", City)
+
+    def test_nearby_and_within(self):
+        self.make(Place, "sf", latitude=37.7749, longitude=-122.4194)
+        self.make(Place, "oakland", latitude=37.8044, longitude=-122.2712)
+        self.make(Place, "fiji", latitude=-17.7, longitude=179.9)
+        self.make(Place, "samoa", latitude=-13.8, longitude=-171.8)
+        self.storage.save()
+        self.assertEqual(["sf", "oakland"], [obj.id for obj in
+                         self.storage.nearby(Place, 37.77, -122.42, 20)])
+        self.assertEqual(["fiji", "samoa"], self.ids(
+            self.storage.within(Place, -20, 170, -10, -170)))
+        with self.assertRaises(ValueError):
+            self.storage.nearby(User, 0, 0, 10)
+
+    def test_aggregate(self):
+        self.make(Place, "p1", city_id="a", price_by_night=100, max_guest=2)
+        self.make(Place, "p2", city_id="a", price_by_night=50, max_guest=4)
+        self.make(Place, "p3", city_id="b", price_by_night=80, max_guest=4)
+        self.storage.save()
+        self.assertEqual(230, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+        self.assertEqual({"a": 1, "b": 1}, self.storage.aggregate(
+            Place, "count", by="city_id", max_guest__ge=4))
+        self.assertEqual(50, self.storage.aggregate(Place, "min",
+                                                    "price_by_night"))
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "median", "price_by_night")
+
+    def test_aggregate_by_list(self):
+        self.make(Place, "p1", price_by_night=100, amenity_ids=["a", "b"])
+        self.make(Place, "p2", price_by_night=50, amenity_ids=["b", "b"])
+        self.make(Place, "p3", price_by_night=80, amenity_ids=[])
+        self.storage.save()
+        self.assertEqual({"a": 100, "b": 150}, self.storage.aggregate(
+            Place, "sum", "price_by_night", by="amenity_ids"))
+
+    def test_refresh(self):
+        self.assertIsInstance(self.storage.refresh(), bool)
+
+
+class TestStorageEngine(unittest.TestCase):
+    """Test the StorageEngine interface."""
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            StorageEngine()
+
+        class Incomplete(StorageEngine):
+            def all(self, cls=None):
+                return {}
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_engines(self):
+        self.assertTrue(issubclass(FileStorage, StorageEngine))
+        self.assertTrue(issubclass(DBStorage, StorageEngine))
+
+
+class TestDictStorageConformance(StorageConformance, unittest.TestCase):
+    """Run the conformance tests on the default methods of StorageEngine."""
+
+    def open_storage(self):
+        self.disk = {}
+        return DictStorage(self.disk)
+
+    def reopen(self):
+        storage = DictStorage(self.disk)
+        storage.reload()
+        return storage
+
+
+class TestFileStorageConformance(StorageConformance, StorageTestCase):
+    """Run the conformance tests on a FileStorage."""
+
+    options = {}
+
+    def open_storage(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "file.json")
+        return self.open_file_storage()
+
+    def open_file_storage(self):
+        storage = FileStorage(compact_threshold=0, **self.options)
+        storage._FileStorage__file_path = self.path
+        return storage
+
+    def reopen(self):
+        # The objects of FileStorage are shared by its instances
+        self.clear()
+        storage = self.open_file_storage()
+        storage.reload()
+        return storage
+
+
+class TestFileStorageJournalConformance(TestFileStorageConformance):
+    """Run the conformance tests on a FileStorage in journal mode."""
+
+    options = {"journal": True}
+
+
+class TestFileStorageLazyConformance(TestFileStorageConformance):
+    """Run the conformance tests on a FileStorage in sharded lazy mode."""
+
+    options = {"lazy": True, "sharded": True}
+
+
+class TestDBStorageConformance(StorageConformance, unittest.TestCase):
+    """Run the conformance tests on a DBStorage."""
+
+    def open_storage(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "file.db")
+        return self.reopen()
+
+    def reopen(self):
+        storage = DBStorage(self.path)
+        storage.reload()
+        self.addCleanup(storage.close)
+        return storage
+
+
+if __name__ == "__main__":
+    unittest.main()